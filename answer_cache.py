@@ -0,0 +1,185 @@
+"""
+Answer cache module for Victoria on Move application.
+Serves repeated and near-duplicate questions without running the RAG chain.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_MAX_ENTRIES
+)
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for exact-match lookups.
+
+    Args:
+        question: Question as typed by the user
+
+    Returns:
+        Lowercased question with collapsed whitespace and no trailing punctuation
+    """
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+class CacheEntry(NamedTuple):
+    """A cached response with the question embedding it was stored under."""
+
+    response: dict
+    vector: np.ndarray
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Cache of RAG responses keyed by question.
+
+    Lookups try an exact match on the normalized question first and then
+    fall back to the most similar cached question by cosine similarity of
+    their embeddings. Entries expire after a TTL and the least recently
+    used entry is evicted when the cache is full.
+
+    Entries belong to the current index version, adopted from the first
+    lookup or store and moved forward with advance() when a new index
+    generation starts serving, which drops all entries. Lookups and stores
+    carrying any other version, e.g. from requests that started before a
+    hot swap, miss and are dropped without touching the cache.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES
+    ):
+        """
+        Initialize the answer cache.
+
+        Args:
+            embeddings: Embeddings used to compare questions
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            ttl_seconds: Lifetime of a cached answer in seconds
+            max_entries: Maximum number of cached answers
+        """
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.index_version: Optional[str] = None
+        self.stats: Dict[str, int] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _is_current(self, index_version: Optional[str]) -> bool:
+        """Check whether a version is the current one, adopting it if there is none yet."""
+        if self.index_version is None:
+            self.index_version = index_version
+        return index_version == self.index_version
+
+    def advance(self, index_version: Optional[str]) -> None:
+        """
+        Move the cache to a new index version, dropping all entries.
+
+        Args:
+            index_version: Version of the index now serving queries
+        """
+        with self._lock:
+            if index_version != self.index_version:
+                self._entries.clear()
+                self.index_version = index_version
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, question: str, index_version: Optional[str]) -> Optional[dict]:
+        """
+        Look up a cached response for a question.
+
+        Args:
+            question: The question to look up
+            index_version: Version of the index the answer must come from
+
+        Returns:
+            Cached response for the question, or None on a miss
+        """
+        key = normalize_question(question)
+        with self._lock:
+            if not self._is_current(index_version):
+                self.stats["misses"] += 1
+                return None
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return dict(entry.response, input=question)
+            if not self._entries:
+                self.stats["misses"] += 1
+                return None
+
+        vector = self._embed(question)
+
+        with self._lock:
+            if index_version != self.index_version or not self._entries:
+                self.stats["misses"] += 1
+                return None
+            keys: List[str] = list(self._entries.keys())
+            matrix = np.stack([self._entries[k].vector for k in keys])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(keys[best])
+            self.stats["semantic_hits"] += 1
+            return dict(self._entries[keys[best]].response, input=question)
+
+    def put(self, question: str, index_version: Optional[str], response: dict) -> None:
+        """
+        Cache a response for a question.
+
+        Responses from another index version than the current one are
+        dropped.
+
+        Args:
+            question: The question that was answered
+            index_version: Version of the index the answer came from
+            response: Response returned by the RAG chain
+        """
+        with self._lock:
+            if not self._is_current(index_version):
+                return
+        key = normalize_question(question)
+        vector = self._embed(question)
+        with self._lock:
+            if index_version != self.index_version:
+                return
+            self._entries[key] = CacheEntry(response, vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries.clear()
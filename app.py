@@ -1,7 +1,10 @@
 import os
+from itertools import chain
+
 import streamlit as st
 from dotenv import load_dotenv
 from rag_service import RAGService
+from refresher import IndexRefresher
 from config import (
     PAGE_CONFIG,
     SAMPLE_QUESTIONS,
@@ -22,33 +25,34 @@ def initialize_rag_system():
     try:
         rag_service = RAGService()
 
-        # Load documents
-        with st.spinner("Loading documents from Victoria on Move website..."):
-            rag_service.load_documents()
-
-        # Split documents
-        with st.spinner("Processing documents..."):
-            docs = rag_service.split_documents()
-
         # Create embeddings
         with st.spinner("Creating embeddings..."):
             rag_service.create_embeddings()
 
-        # Create vector store
+        # Load the cached vector store, or load and process documents into a new one
         with st.spinner("Setting up vector database..."):
-            rag_service.create_vectorstore(docs)
+            doc_count = rag_service.load_or_build_vectorstore()
 
         # Create retriever and RAG chain
         with st.spinner("Initializing AI assistant..."):
             rag_service.create_retriever()
             rag_chain = rag_service.create_rag_chain()
 
-        return rag_chain, len(docs), rag_service
+        # Pick up new site content without restarting; rebuilt indexes are hot-swapped in
+        IndexRefresher(rag_service).start()
+
+        return rag_chain, doc_count, rag_service
 
     except Exception as e:
         st.error(f"Error initializing RAG system: {str(e)}")
         return None, 0, None
 
+def stream_answer(rag_service, question):
+    """Yield the answer tokens for a question as they are generated."""
+    for part in rag_service.stream_query(question):
+        if "answer" in part:
+            yield part["answer"]
+
 def main():
     # Header
     st.title("🚚 Victoria on Move - AI Assistant")
@@ -104,19 +108,22 @@ def main():
         user_question = st.session_state.messages[-1]["content"]
 
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    response = st.session_state.rag_chain.invoke({"input": user_question})
-                    answer = response["answer"]
-                    st.markdown(answer)
-
-                    # Add assistant response to chat history
-                    st.session_state.messages.append({"role": "assistant", "content": answer})
-
-                except Exception as e:
-                    error_msg = f"I'm sorry, I encountered an error: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": ERROR_MESSAGES["response_error"]})
+            try:
+                tokens = stream_answer(st.session_state.rag_service, user_question)
+                # The spinner only covers the wait for the first token
+                with st.spinner("Thinking..."):
+                    first_token = next(tokens, "")
+
+                # Render tokens as they arrive instead of waiting for the full answer
+                answer = st.write_stream(chain([first_token], tokens))
+
+                # Add assistant response to chat history
+                st.session_state.messages.append({"role": "assistant", "content": answer})
+
+            except Exception as e:
+                error_msg = f"I'm sorry, I encountered an error: {str(e)}"
+                st.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": ERROR_MESSAGES["response_error"]})
 
     # Clear chat button
     if st.session_state.messages:
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval benchmark for the RAG service.
+
+Runs the full pipeline against a fixture corpus with deterministic local
+embeddings and a stub LLM, and reports per-stage latency percentiles, index
+build time, memory footprint and recall@k as JSON.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import FakeListLLM
+
+from config import RETRIEVAL_K, INDEX_TYPE
+from rag_service import RAGService
+from retrievers import STOPWORDS
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "benchmark_corpus.json")
+STUB_ANSWER = "This is a stub answer used for benchmarking."
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic local embeddings built from hashed word counts.
+
+    Texts sharing words get similar vectors, which is enough to exercise
+    retrieval offline in tests and benchmarks without a model download or
+    network access.
+    """
+
+    def __init__(self, size: int = 384):
+        """
+        Initialize the hashing embeddings.
+
+        Args:
+            size: Dimension of the embedding vectors
+        """
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            if token in STOPWORDS:
+                continue
+            if len(token) > 3 and token.endswith("s"):
+                token = token[:-1]
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+            vector[digest % self.size] += 1.0 if (digest >> 63) else -1.0
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm > 0 else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents."""
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self._embed(text)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples in milliseconds."""
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": sum(samples) / len(samples) * 1000
+    }
+
+
+def load_corpus(path: str, scale: int = 1) -> dict:
+    """
+    Load the fixture corpus.
+
+    Args:
+        path: JSON file with "pages" and labeled "questions"
+        scale: Number of copies of every page, to benchmark larger corpora
+
+    Returns:
+        Dictionary with "documents" and "questions"
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    documents = []
+    for copy in range(scale):
+        for page in corpus["pages"]:
+            source = page["source"] if copy == 0 else f"{page['source']}#copy-{copy}"
+            documents.append(Document(page_content=page["text"], metadata={"source": source}))
+    return {"documents": documents, "questions": corpus["questions"]}
+
+
+def base_source(source: str) -> str:
+    """Strip the copy suffix added by load_corpus."""
+    return source.split("#copy-")[0]
+
+
+def time_call(func, *args):
+    """Call a function and return its result and duration in seconds."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(
+    corpus_path: str = DEFAULT_CORPUS,
+    repeat: int = 5,
+    k: int = RETRIEVAL_K,
+    scale: int = 1,
+    index_type: str = INDEX_TYPE
+) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        corpus_path: Fixture corpus to index
+        repeat: Number of times every question is run per stage
+        k: Number of documents retrieved per question
+        scale: Number of copies of every page in the corpus
+        index_type: FAISS index type to build
+
+    Returns:
+        Benchmark results
+    """
+    corpus = load_corpus(corpus_path, scale)
+    questions = corpus["questions"]
+
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.llm = FakeListLLM(responses=[STUB_ANSWER])
+
+    docs, split_seconds = time_call(service.split_documents, corpus["documents"])
+    _, build_seconds = time_call(service.create_vectorstore, docs, index_type)
+
+    # Rebuild under tracemalloc so tracing overhead does not skew the build time
+    tracemalloc.start()
+    service.create_vectorstore(docs, index_type)
+    _, build_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    service.create_retriever(k)
+    service.create_rag_chain()
+    # Measure the pipeline itself, not answer cache hits
+    service.answer_cache = None
+
+    retrieval_samples = []
+    query_samples = []
+    hits = 0
+    for _ in range(repeat):
+        for item in questions:
+            _, seconds = time_call(service.get_relevant_documents, item["question"])
+            retrieval_samples.append(seconds)
+            _, seconds = time_call(service.query, item["question"])
+            query_samples.append(seconds)
+
+    tokens_retrieved = 0
+    tokens_packed = 0
+    for item in questions:
+        retrieved = service.get_relevant_documents(item["question"])
+        if service.context_packer is not None:
+            packed = service.context_packer.pack(item["question"], retrieved)
+            tokens_retrieved += packed.tokens_in
+            tokens_packed += packed.tokens_out
+        sources = {base_source(doc.metadata.get("source", "")) for doc in retrieved}
+        relevant = set(item["relevant_sources"])
+        hits += len(sources & relevant) / len(relevant)
+
+    index = service.vectorstore.index
+    index_recall = service.evaluate_index_recall([item["question"] for item in questions], k, index_type)
+    return {
+        "corpus": {
+            "path": corpus_path,
+            "scale": scale,
+            "documents": len(corpus["documents"]),
+            "chunks": len(docs),
+            "questions": len(questions)
+        },
+        "index": {
+            "type": index_type,
+            "split_seconds": split_seconds,
+            "build_seconds": build_seconds,
+            "vectors": index.ntotal,
+            "dimension": index.d,
+            "vector_bytes": index.ntotal * index.d * 4,
+            "index_bytes": index_recall["approximate_bytes"],
+            "recall_vs_flat": index_recall["recall_at_k"]
+        },
+        "memory": {
+            "build_peak_traced_bytes": build_peak_bytes,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        },
+        "latency": {
+            "get_relevant_documents": summarize(retrieval_samples),
+            "query": summarize(query_samples)
+        },
+        "context": {
+            "packing": service.context_packer is not None,
+            "tokens_retrieved_per_query": tokens_retrieved / len(questions),
+            "tokens_packed_per_query": tokens_packed / len(questions)
+        },
+        "recall": {
+            "k": k,
+            "recall_at_k": hits / len(questions)
+        }
+    }
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark the RAG pipeline offline.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="fixture corpus JSON file")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per question and stage")
+    parser.add_argument("-k", type=int, default=RETRIEVAL_K, help="documents retrieved per question")
+    parser.add_argument("--scale", type=int, default=1, help="copies of every fixture page")
+    parser.add_argument("--index-type", default=INDEX_TYPE, help="FAISS index type to build")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.corpus, args.repeat, args.k, args.scale, args.index_type)
+    output = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Chunk store module for Victoria on Move application.
+Keeps the chunks of a cached index in memory-mapped files instead of
+in-memory Document objects, so worker processes share them through the
+OS page cache.
+"""
+
+import json
+import mmap
+import os
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+TEXTS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+IDS_FILE = "chunk_ids.npy"
+ID_ORDER_FILE = "chunk_id_order.npy"
+RECORDS_FILE = "chunk_records.npy"
+METADATA_FILE = "chunk_metadata.json"
+VECTORS_FILE = "chunk_vectors.npy"
+
+
+def _open_texts(path: str) -> Union[mmap.mmap, bytes]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ChunkIdMap(MutableMapping):
+    """
+    FAISS position to docstore ID mapping backed by the chunk store's ID file.
+
+    Positions added after loading are kept in a small in-memory overlay.
+    """
+
+    def __init__(self, ids: np.ndarray):
+        self._ids = ids
+        self._extra: Dict[int, str] = {}
+
+    def __getitem__(self, position: int) -> str:
+        if position in self._extra:
+            return self._extra[position]
+        if not 0 <= position < len(self._ids):
+            raise KeyError(position)
+        return self._ids[position].decode("utf-8")
+
+    def __setitem__(self, position: int, chunk_id: str) -> None:
+        self._extra[position] = chunk_id
+
+    def __delitem__(self, position: int) -> None:
+        if position not in self._extra:
+            raise TypeError("Stored chunk positions cannot be deleted")
+        del self._extra[position]
+
+    def __iter__(self) -> Iterator[int]:
+        yield from range(len(self._ids))
+        yield from (position for position in self._extra if position >= len(self._ids))
+
+    def __len__(self) -> int:
+        return len(self._ids) + sum(1 for position in self._extra if position >= len(self._ids))
+
+
+class ChunkStore(Docstore, AddableMixin):
+    """
+    Docstore reading chunks from memory-mapped files.
+
+    Chunk texts are concatenated in one UTF-8 file addressed through an
+    offset table, in FAISS index order. Metadata is interned: each distinct
+    metadata record, usually one per page, is stored once and chunks refer
+    to it by slot. Documents are only materialized when looked up, so a
+    process's resident memory does not grow with the corpus, and processes
+    opening the same index version share its pages through the page cache.
+
+    Chunks added or deleted after loading, e.g. by refresh(), are kept in
+    an in-memory overlay until the index is saved again.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a chunk store written by write().
+
+        Args:
+            path: Directory holding the chunk store files
+        """
+        self.path = path
+        self._texts = _open_texts(os.path.join(path, TEXTS_FILE))
+        self._offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        self._ids = np.load(os.path.join(path, IDS_FILE), mmap_mode="r")
+        self._id_order = np.load(os.path.join(path, ID_ORDER_FILE), mmap_mode="r")
+        self._records = np.load(os.path.join(path, RECORDS_FILE), mmap_mode="r")
+        with open(os.path.join(path, METADATA_FILE), "r", encoding="utf-8") as f:
+            self._metadata: List[list] = json.load(f)
+
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        self.vectors: Optional[np.ndarray] = (
+            np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+        )
+        self._added: Dict[str, Document] = {}
+        self._deleted = set()
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Check whether a directory holds a chunk store."""
+        return os.path.exists(os.path.join(path, RECORDS_FILE))
+
+    @staticmethod
+    def write(path: str, vectorstore: FAISS, vectors: Optional[np.ndarray] = None) -> None:
+        """
+        Write the chunks of a vector store as a chunk store.
+
+        Args:
+            path: Directory to write the files to
+            vectorstore: Vector store whose docstore holds the chunks
+            vectors: Optional vectors in index order, stored as float16
+        """
+        ids = [vectorstore.index_to_docstore_id[i] for i in range(len(vectorstore.index_to_docstore_id))]
+        offsets = [0]
+        records = []
+        interned: Dict[str, int] = {}
+
+        with open(os.path.join(path, TEXTS_FILE), "wb") as f:
+            for chunk_id in ids:
+                doc = vectorstore.docstore.search(chunk_id)
+                data = doc.page_content.encode("utf-8")
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+
+                # Chunk IDs are unique per chunk, so they are restored from the ID table
+                metadata = dict(doc.metadata)
+                own_id = metadata.get("chunk_id") == chunk_id
+                if own_id:
+                    del metadata["chunk_id"]
+                record = json.dumps([metadata, own_id], sort_keys=True)
+                records.append(interned.setdefault(record, len(interned)))
+
+        id_array = np.array([chunk_id.encode("utf-8") for chunk_id in ids], dtype="S") if ids else np.zeros(0, "S1")
+        np.save(os.path.join(path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+        np.save(os.path.join(path, IDS_FILE), id_array)
+        np.save(os.path.join(path, ID_ORDER_FILE), np.argsort(id_array, kind="stable").astype(np.int64))
+        np.save(os.path.join(path, RECORDS_FILE), np.asarray(records, dtype=np.int32))
+        with open(os.path.join(path, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump([json.loads(record) for record in interned], f)
+        if vectors is not None:
+            np.save(os.path.join(path, VECTORS_FILE), np.asarray(vectors, dtype=np.float16))
+
+    def id_map(self) -> ChunkIdMap:
+        """Return the FAISS position to docstore ID mapping of the stored chunks."""
+        return ChunkIdMap(self._ids)
+
+    def _slot(self, chunk_id: str) -> Optional[int]:
+        key = chunk_id.encode("utf-8")
+        position = int(np.searchsorted(self._ids, key, sorter=self._id_order))
+        if position == len(self._ids):
+            return None
+        slot = int(self._id_order[position])
+        return slot if self._ids[slot] == key else None
+
+    def _document(self, slot: int, chunk_id: str) -> Document:
+        text = bytes(self._texts[self._offsets[slot]:self._offsets[slot + 1]]).decode("utf-8")
+        metadata, own_id = self._metadata[self._records[slot]]
+        metadata = dict(metadata)
+        if own_id:
+            metadata["chunk_id"] = chunk_id
+        return Document(page_content=text, metadata=metadata)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Look up a chunk by docstore ID.
+
+        Args:
+            search: Docstore ID
+
+        Returns:
+            Document if found, else an error message, like InMemoryDocstore
+        """
+        if search in self._added:
+            return self._added[search]
+        slot = None if search in self._deleted else self._slot(search)
+        if slot is None:
+            return f"ID {search} not found."
+        return self._document(slot, search)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Add chunks to the in-memory overlay."""
+        overlapping = [chunk_id for chunk_id in texts if isinstance(self.search(chunk_id), Document)]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._added.update(texts)
+        self._deleted.difference_update(texts)
+
+    def delete(self, ids: List) -> None:
+        """Delete chunks, hiding stored ones until the index is saved again."""
+        found = [chunk_id for chunk_id in ids if isinstance(self.search(chunk_id), Document)]
+        if not found:
+            raise ValueError(f"Tried to delete ids that does not exist: {ids}")
+        for chunk_id in found:
+            if self._added.pop(chunk_id, None) is None:
+                self._deleted.add(chunk_id)
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted) + len(self._added)
@@ -0,0 +1,182 @@
+"""
+Request coalescing module for Victoria on Move application.
+Lets concurrent identical requests share one execution instead of each
+running its own embedding, search and LLM calls.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from metrics import metrics
+
+
+class _Call:
+    """An execution in flight, shared by the threads waiting for its result."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one execution per key at a time.
+
+    The first caller for a key runs the work; callers arriving with the same
+    key while it is in flight wait for it and receive the same result or
+    exception. Nothing is kept once the execution finishes, so this only
+    flattens concurrent bursts and is not a cache.
+
+    Synchronous calls are coalesced across threads. Asynchronous calls are
+    coalesced per event loop, since futures cannot be shared between loops.
+    Long-running results that are consumed while they are produced, such as
+    streamed answers, are shared with share().
+    """
+
+    def __init__(self, name: str = "requests"):
+        """
+        Initialize with no executions in flight.
+
+        Args:
+            name: Prefix of the "<name>_coalesced" metrics counter
+        """
+        self.name = name
+        self.stats: Dict[str, int] = {"executions": 0, "coalesced": 0}
+        self._calls: Dict[Hashable, _Call] = {}
+        self._shared: Dict[Hashable, Any] = {}
+        self._async_calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func, or wait for the execution already running for key.
+
+        Args:
+            key: Identity of the request
+            func: Work to run if no execution for key is in flight
+
+        Returns:
+            Result of the shared execution
+
+        Raises:
+            Exception: Whatever the shared execution raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["executions"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            metrics.incr(f"{self.name}_coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func(), or the execution already running for key on this loop.
+
+        The execution runs as a task detached from its callers, so a caller
+        that is cancelled, the first one included, only stops waiting and
+        the execution still finishes for the others.
+
+        Args:
+            key: Identity of the request
+            func: Coroutine function to run if no execution for key is in flight
+
+        Returns:
+            Result of the shared execution
+
+        Raises:
+            Exception: Whatever the shared execution raised
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            task = calls.get(key)
+            leader = task is None
+            if leader:
+                task = calls[key] = loop.create_task(func())
+                self.stats["executions"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if leader:
+            task.add_done_callback(lambda done: self._forget_async(calls, key, done))
+        else:
+            metrics.incr(f"{self.name}_coalesced")
+        # A cancelled caller must not cancel the shared execution
+        return await asyncio.shield(task)
+
+    def _forget_async(self, calls: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if calls.get(key) is task:
+                del calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case nobody was waiting any more
+            task.exception()
+
+    def share(self, key: Hashable, start: Callable[[], Any]) -> Any:
+        """
+        Start a background execution, or join the one already running for key.
+
+        Unlike do(), the caller does not wait for the execution: it gets the
+        running object, e.g. a TokenStream, and reads from it. The object
+        stays shared until it reports completion through add_done_callback().
+
+        Args:
+            key: Identity of the request
+            start: Function starting the execution and returning an object
+                with an add_done_callback(callback) method
+
+        Returns:
+            The execution started by this or an earlier caller
+        """
+        with self._lock:
+            running = self._shared.get(key)
+            leader = running is None
+            if leader:
+                running = self._shared[key] = start()
+                self.stats["executions"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if leader:
+            running.add_done_callback(lambda: self._forget(key, running))
+        else:
+            metrics.incr(f"{self.name}_coalesced")
+        return running
+
+    def _forget(self, key: Hashable, running: Any) -> None:
+        with self._lock:
+            if self._shared.get(key) is running:
+                del self._shared[key]
+
+    def in_flight(self) -> int:
+        """Return the number of executions currently running."""
+        with self._lock:
+            return (
+                len(self._calls) + len(self._shared)
+                + sum(len(calls) for calls in self._async_calls.values())
+            )
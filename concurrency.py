@@ -0,0 +1,122 @@
+"""
+Concurrency limiting module for Victoria on Move application.
+Caps the number of LLM calls in flight across the whole process, for
+threads and event loops alike.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Tuple, Union
+
+from config import LLM_MAX_CONCURRENCY
+
+_AsyncWaiter = Tuple[asyncio.AbstractEventLoop, asyncio.Future]
+
+
+class ConcurrencyLimiter:
+    """
+    Counting semaphore shared by synchronous and asynchronous callers.
+
+    Threads block in acquire(), coroutines wait in aacquire() without
+    blocking their event loop, and both draw from the same pool of slots,
+    so the limit holds however many threads and event loops use it. Slots
+    are handed to waiters in arrival order.
+
+    Use it as a context manager from threads and as an async context
+    manager from coroutines.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize with all slots free.
+
+        Args:
+            limit: Maximum number of slots held at a time
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self._available = limit
+        self._waiters: Deque[Union[threading.Event, _AsyncWaiter]] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a slot, blocking the calling thread until one is free."""
+        with self._lock:
+            if self._available and not self._waiters:
+                self._available -= 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        # release() hands the slot over before setting the event
+        event.wait()
+
+    async def aacquire(self) -> None:
+        """Take a slot, waiting without blocking the event loop until one is free."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._available and not self._waiters:
+                self._available -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed over. If the grant has not run yet,
+            # it finds the future cancelled and releases the slot itself.
+            if not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it to the longest waiting caller if any."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    # The waiter's event loop is closed
+                    continue
+            self._available += 1
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def in_use(self) -> int:
+        """Return the number of slots currently held."""
+        with self._lock:
+            return self.limit - self._available
+
+    def __enter__(self) -> "ConcurrencyLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+# Process-wide cap on LLM generations in flight
+llm_limiter = ConcurrencyLimiter(LLM_MAX_CONCURRENCY)
@@ -9,17 +9,166 @@ VICTORIA_ON_MOVE_URLS = [
     'https://victoriaonmove.com.au/contact.html'
 ]
 
+# Document loading configuration
+# "concurrent" fetches pages with ConcurrentURLLoader, "crawl" discovers pages from the URLs' sites
+# with SiteCrawler, "sequential" uses UnstructuredURLLoader
+LOADER_MODE = "concurrent"
+LOADER_MAX_CONCURRENCY = 8
+LOADER_TIMEOUT = 15  # seconds per request
+LOADER_RETRIES = 2
+LOADER_PARSE_WORKERS = 2
+LOADER_USER_AGENT = "Mozilla/5.0 (compatible; VictoriaOnMoveRAG/1.0)"
+# Revalidate pages with ETag / Last-Modified and reuse parsed text when unchanged.
+# The parsed text of each page is kept in a "fetch_pages" directory next to the metadata file
+LOADER_CONDITIONAL_FETCH = True
+FETCH_METADATA_PATH = ".index_cache/fetch_metadata.json"
+
+# Site crawler configuration (LOADER_MODE = "crawl")
+# Maximum pages fetched and links followed from a seed or sitemap URL
+CRAWL_MAX_PAGES = 200
+CRAWL_MAX_DEPTH = 3
+# Seed the crawl from sitemap.xml and the sitemaps listed in robots.txt
+CRAWL_USE_SITEMAP = True
+CRAWL_RESPECT_ROBOTS = True
+# Pages whose SimHash fingerprints differ in at most this many bits are near duplicates
+CRAWL_SIMHASH_DISTANCE = 3
+
 # Model configurations
 EMBEDDING_MODEL = "models/embedding-001"
 LLM_MODEL = "gemini-2.0-flash"
 
+# Embedding backend: "google" (EMBEDDING_MODEL via the Gemini API) or "local"
+# (LOCAL_EMBEDDING_MODEL with sentence-transformers on CPU, no network calls)
+EMBEDDING_BACKEND = "google"
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+LOCAL_EMBEDDING_BATCH_SIZE = 64
+# CPU threads used by the local model
+LOCAL_EMBEDDING_THREADS = 4
+# "torch", or "onnx" for ONNX Runtime inference
+LOCAL_EMBEDDING_RUNTIME = "torch"
+# ONNX model file inside the model repository, e.g. "onnx/model_qint8_avx512.onnx" for int8 weights.
+# None uses the default float32 export.
+LOCAL_EMBEDDING_ONNX_FILE = None
+
 # Text splitting configuration
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 
+# Content cleaning configuration
+# Drop text blocks (menus, footers, banners) repeated across pages before splitting.
+# The first page a block appears on keeps it.
+BOILERPLATE_STRIPPING_ENABLED = True
+
 # Retrieval configuration
+# "similarity" is plain vector search; "hybrid" (opt-in) fuses BM25 and vector results;
+# any other value is passed to FAISS as_retriever
 RETRIEVAL_TYPE = "similarity"
 RETRIEVAL_K = 3
+# Candidates fetched from each of the lexical and vector indexes before fusion
+HYBRID_FETCH_K = 10
+# Reciprocal rank fusion rank offset
+RRF_K = 60
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Vector index configuration
+# One of "flat" (exact), "ivf", "ivf_sq8", "ivf_pq", "hnsw", "hnsw_sq8", "sq8", "sq_fp16".
+# Approximate indexes trade a little recall for faster search and smaller memory on large corpora.
+INDEX_TYPE = "flat"
+# Upper bound on IVF lists; small corpora get fewer so every list has enough training points
+IVF_NLIST = 1024
+# IVF lists visited per query, higher is slower with better recall
+IVF_NPROBE = 16
+# HNSW graph neighbours per node and candidate list size per query
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+# Maximum number of product quantizer sub-vectors for "ivf_pq"
+PQ_M = 64
+
+# Reranking configuration
+# Over-fetch candidates and rerank them with a local CPU cross-encoder (needs sentence-transformers)
+RERANK_ENABLED = False
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# Candidates fetched before reranking down to RETRIEVAL_K
+RERANK_FETCH_K = 20
+RERANK_BATCH_SIZE = 32
+# Maximum number of cached (question, chunk) scores
+RERANK_CACHE_SIZE = 4096
+
+# Context packing configuration
+# Drop text repeated between retrieved chunks and fit the rest into a token budget
+CONTEXT_PACKING_ENABLED = True
+# Maximum estimated tokens of retrieved context per prompt
+CONTEXT_TOKEN_BUDGET = 1500
+# Keep only the sentences of each chunk that share terms with the question
+CONTEXT_SENTENCE_EXTRACTION = False
+# Shortest repeated span between adjacent chunks that is removed, in characters
+CONTEXT_MIN_OVERLAP_CHARS = 20
+
+# Relevance gate configuration
+# Answer with NO_ANSWER_RESPONSE, without calling the LLM, when no retrieved chunk's vector
+# relevance score reaches RELEVANCE_SCORE_THRESHOLD. Scores follow LangChain's FAISS relevance
+# scale (higher is better) and depend on the embedding model, so tune the threshold on real
+# in-scope and off-topic questions (e.g. with RAGService.batch_retrieve) before enabling.
+RELEVANCE_GATE_ENABLED = False
+RELEVANCE_SCORE_THRESHOLD = 0.3
+NO_ANSWER_RESPONSE = (
+    "I don't know. I can only answer questions about Victoria on Move's "
+    "moving and removalist services."
+)
+
+# Metrics exporters: any of "log" (latency breakdown log lines) and "prometheus" (served at /metrics)
+METRICS_EXPORTERS = ["log", "prometheus"]
+
+# Maximum number of LLM generations in flight per process, shared by sync, streaming and async callers
+LLM_MAX_CONCURRENCY = 8
+# Let concurrent identical questions (same normalized text and index version) share one execution
+REQUEST_COALESCING_ENABLED = True
+
+# Index cache configuration
+INDEX_CACHE_ENABLED = True
+INDEX_CACHE_DIR = ".index_cache"
+# Re-scrape sources on startup and compare content hashes before reusing a cached index.
+# Pages are hashed and spooled to a temporary file as they stream in; on a miss the build reads the spool.
+# When False, the latest cached index for the current configuration is loaded without scraping.
+INDEX_CACHE_VERIFY_SOURCES = True
+# Bump when the on-disk index layout changes so stale caches are rebuilt
+INDEX_FORMAT_VERSION = 3
+
+# Chunk store configuration
+# Keep chunk texts and metadata of cached indexes in memory-mapped files shared by worker processes,
+# instead of a pickled in-memory docstore
+CHUNK_STORE_ENABLED = True
+# Also store a float16 copy of the index vectors, used to evaluate approximate indexes without re-embedding
+CHUNK_STORE_FLOAT16_VECTORS = False
+
+# Background index refresh configuration
+# Seconds between background rebuilds that re-scrape the sources and hot-swap the new index in.
+# 0 disables the schedule; rebuilds then only run when triggered.
+INDEX_REFRESH_INTERVAL = 24 * 60 * 60
+# With several server workers, only the holder of this lock rebuilds the index. The other
+# workers check for a new leader, rebuild requests and index versions every INDEX_FOLLOW_INTERVAL seconds.
+REFRESH_LOCK_PATH = ".index_cache/refresher.lock"
+INDEX_FOLLOW_INTERVAL = 60
+
+# Embedding cache configuration
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = ".index_cache/embeddings.sqlite3"
+EMBEDDING_QUERY_CACHE_SIZE = 1024
+
+# Batched embedding configuration
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MAX_IN_FLIGHT = 4
+EMBEDDING_MAX_RETRIES = 5
+EMBEDDING_BACKOFF_SECONDS = 1.0
+
+# Answer cache configuration
+ANSWER_CACHE_ENABLED = True
+# Minimum cosine similarity between questions for a near-duplicate cache hit
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+ANSWER_CACHE_TTL_SECONDS = 60 * 60
+ANSWER_CACHE_MAX_ENTRIES = 1000
 
 # System prompt for the RAG chain
 SYSTEM_PROMPT = (
@@ -55,6 +204,14 @@ SAMPLE_QUESTIONS = [
     "Can you help with office relocations?"
 ]
 
+# HTTP query server configuration
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 8000
+# Each worker loads the shared on-disk index from the index cache; only the elected
+# leader scrapes the sources and rebuilds (see REFRESH_LOCK_PATH)
+SERVER_WORKERS = 2
+SERVER_WARMUP_QUESTIONS = SAMPLE_QUESTIONS[:3]
+
 # CSS styling
 CUSTOM_CSS = """
 <style>
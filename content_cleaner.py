@@ -0,0 +1,159 @@
+"""
+Content cleaning module for Victoria on Move application.
+Strips boilerplate such as navigation menus, footers and contact banners,
+which repeat on every page, before pages are split into chunks.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Sequence, Set
+
+from langchain_core.documents import Document
+
+from index_store import hash_text
+
+BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+
+
+def split_blocks(text: str) -> List[str]:
+    """Split page text into the blocks (page elements) it was joined from."""
+    return [block.strip() for block in BLOCK_SEPARATOR.split(text) if block.strip()]
+
+
+def block_key(block: str) -> str:
+    """Hash a block, ignoring case and whitespace differences."""
+    return hash_text(" ".join(block.lower().split()))
+
+
+class BoilerplateStripper:
+    """
+    Drops text blocks that repeat across pages.
+
+    Every block is owned by one page, which keeps it, so site-wide facts
+    such as the phone number stay retrievable once, and every other page
+    drops it. The owner is the highest ranked page containing the block:
+    configured sources in their configured order, then any other page, e.g.
+    one found by the crawler, in the order it was first seen. A block is
+    handed to the next page containing it when its owner changes or
+    disappears.
+
+    Pages are cleaned one at a time, so the stripper works on streamed
+    pages as well as on a loaded corpus. A streamed page only competes with
+    the pages seen before it, which gives the same owners as cleaning the
+    whole corpus at once as long as pages arrive in rank order: the loaders
+    yield pages in configured order and the crawler in crawl order.
+    """
+
+    def __init__(self, source_order: Sequence[str] = ()):
+        """
+        Initialize the stripper.
+
+        Args:
+            source_order: Sources in ranking order, e.g. the configured URLs
+        """
+        self.source_order = list(source_order)
+        self.stats: Dict[str, int] = {"pages": 0, "blocks_removed": 0, "chars_removed": 0}
+        self._ranks: Dict[str, int] = {}
+        self._next_rank = 0
+        self._reset_ranks()
+        # Block key to the pages containing it, and page to its block keys
+        self._pages: Dict[str, Set[str]] = {}
+        self._blocks: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _reset_ranks(self) -> None:
+        self._ranks = {source: position for position, source in enumerate(self.source_order)}
+        self._next_rank = len(self.source_order)
+
+    def _register(self, source: str, keys: Set[str]) -> None:
+        """Record the blocks of a page, releasing the ones it no longer has."""
+        if source not in self._ranks:
+            self._ranks[source] = self._next_rank
+            self._next_rank += 1
+        old_keys = self._blocks.get(source, set())
+        for key in old_keys - keys:
+            self._release(key, source)
+        for key in keys - old_keys:
+            self._pages.setdefault(key, set()).add(source)
+        self._blocks[source] = keys
+
+    def _release(self, key: str, source: str) -> None:
+        sources = self._pages[key]
+        sources.discard(source)
+        if not sources:
+            del self._pages[key]
+
+    def clean(self, document: Document) -> Document:
+        """
+        Remove the blocks another page owns.
+
+        Args:
+            document: Loaded page
+
+        Returns:
+            New document with the page's own blocks, joined by blank lines,
+            and the original metadata
+        """
+        return self.clean_pages([document])[0]
+
+    def clean_pages(self, documents: List[Document]) -> List[Document]:
+        """
+        Remove the blocks other pages own from a set of pages.
+
+        All pages are registered before any is cleaned, so a block dropped
+        by a changed page goes to the next page containing it whatever the
+        order of the pages.
+
+        Args:
+            documents: Loaded pages
+
+        Returns:
+            New documents with each page's own blocks, in input order
+        """
+        pages = []
+        for document in documents:
+            blocks = [(block_key(block), block) for block in split_blocks(document.page_content)]
+            pages.append((document, document.metadata.get("source", ""), blocks))
+
+        cleaned = []
+        with self._lock:
+            for _, source, blocks in pages:
+                self._register(source, {key for key, _ in blocks})
+            for document, source, blocks in pages:
+                kept = []
+                removed_blocks = 0
+                removed_chars = 0
+                for key, block in blocks:
+                    if min(self._pages[key], key=self._ranks.__getitem__) == source:
+                        kept.append(block)
+                    else:
+                        removed_blocks += 1
+                        removed_chars += len(block)
+                self.stats["pages"] += 1
+                self.stats["blocks_removed"] += removed_blocks
+                self.stats["chars_removed"] += removed_chars
+                cleaned.append(Document(page_content="\n\n".join(kept), metadata=dict(document.metadata)))
+        return cleaned
+
+    def retain(self, sources: Iterable[str]) -> None:
+        """
+        Forget the pages that are no longer part of the corpus.
+
+        Args:
+            sources: Sources of all current pages
+        """
+        sources = set(sources)
+        with self._lock:
+            for source in [source for source in self._blocks if source not in sources]:
+                for key in self._blocks.pop(source):
+                    self._release(key, source)
+                if self._ranks[source] >= len(self.source_order):
+                    del self._ranks[source]
+
+    def reset(self) -> None:
+        """Forget block ownership, e.g. before rebuilding the index from scratch."""
+        with self._lock:
+            self._pages = {}
+            self._blocks = {}
+            self._reset_ranks()
+            self.stats = {"pages": 0, "blocks_removed": 0, "chars_removed": 0}
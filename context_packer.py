@@ -0,0 +1,164 @@
+"""
+Context packing module for Victoria on Move application.
+Assembles retrieved chunks into a compact LLM context: overlapping text
+from adjacent chunks is removed and the result is fitted to a token budget.
+"""
+
+import re
+from typing import Dict, List, NamedTuple
+
+from langchain_core.documents import Document
+
+from config import (
+    CHUNK_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_SENTENCE_EXTRACTION,
+    CONTEXT_MIN_OVERLAP_CHARS
+)
+from metrics import estimate_tokens
+from retrievers import tokenize
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Metadata scores set by the reranker and the retrievers, most authoritative first
+SCORE_KEYS = ("rerank_score", "relevance_score", "score")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and lines, dropping empty ones."""
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+def overlap_length(
+    previous: str,
+    text: str,
+    min_overlap: int = CONTEXT_MIN_OVERLAP_CHARS,
+    max_overlap: int = CHUNK_OVERLAP
+) -> int:
+    """
+    Find how much of the start of a text repeats the end of another.
+
+    Args:
+        previous: Earlier text
+        text: Text that may start with the end of previous
+        min_overlap: Shortest overlap worth removing, in characters
+        max_overlap: Longest overlap to look for, in characters
+
+    Returns:
+        Length of the longest suffix of previous that is a prefix of text,
+        or 0 if it is shorter than min_overlap
+    """
+    for length in range(min(len(previous), len(text), max_overlap), min_overlap - 1, -1):
+        if previous.endswith(text[:length]):
+            return length
+    return 0
+
+
+class PackedContext(NamedTuple):
+    """Packed documents with the estimated context size before and after packing."""
+
+    documents: List[Document]
+    tokens_in: int
+    tokens_out: int
+
+
+class ContextPacker:
+    """
+    Builds the context passed to the LLM from retrieved chunks.
+
+    Chunks are taken best first. Text that repeats an already packed chunk,
+    such as the overlap between adjacent chunks of a page or sentences
+    repeated across pages, is dropped, and packing stops when the token
+    budget is reached. With sentence extraction enabled, each chunk is cut
+    down to the sentences that share terms with the question.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        sentence_extraction: bool = CONTEXT_SENTENCE_EXTRACTION,
+        min_overlap: int = CONTEXT_MIN_OVERLAP_CHARS
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            token_budget: Maximum estimated tokens of packed context
+            sentence_extraction: Keep only query-relevant sentences per chunk
+            min_overlap: Shortest overlap between chunks worth removing
+        """
+        self.token_budget = token_budget
+        self.sentence_extraction = sentence_extraction
+        self.min_overlap = min_overlap
+
+    def _relevant_sentences(self, question: str, sentences: List[str]) -> List[str]:
+        """Keep the sentences sharing terms with the question, in page order."""
+        terms = set(tokenize(question))
+        scored = [len(terms & set(tokenize(sentence))) for sentence in sentences]
+        if not any(scored):
+            return sentences
+        return [sentence for sentence, score in zip(sentences, scored) if score]
+
+    def pack(self, question: str, documents: List[Document]) -> PackedContext:
+        """
+        Pack retrieved documents into the token budget.
+
+        Documents are ordered by the first of SCORE_KEYS that all of them
+        carry, so reranker scores win over vector relevance scores. When no
+        score is shared by every document, e.g. hybrid results mixing
+        vector and keyword-only hits, retrieval order is kept.
+
+        Args:
+            question: The question being answered
+            documents: Retrieved documents, best first
+
+        Returns:
+            New documents holding the packed text, with the original
+            metadata, and the estimated tokens before and after packing
+        """
+        for key in SCORE_KEYS:
+            if documents and all(key in doc.metadata for doc in documents):
+                documents = sorted(documents, key=lambda doc: doc.metadata[key], reverse=True)
+                break
+
+        packed: List[Document] = []
+        seen_sentences = set()
+        texts_by_source: Dict[str, List[str]] = {}
+        tokens_in = sum(estimate_tokens(doc.page_content) for doc in documents)
+        tokens_used = 0
+
+        for doc in documents:
+            text = doc.page_content
+            source = doc.metadata.get("source", "")
+
+            # Adjacent chunks of a page share CHUNK_OVERLAP characters at the seam
+            for previous in texts_by_source.get(source, []):
+                text = text[overlap_length(previous, text, self.min_overlap):]
+                cut = overlap_length(text, previous, self.min_overlap)
+                if cut:
+                    text = text[:-cut]
+
+            sentences = [
+                sentence for sentence in split_sentences(text)
+                if sentence.lower() not in seen_sentences
+            ]
+            if self.sentence_extraction:
+                sentences = self._relevant_sentences(question, sentences)
+
+            kept = []
+            for sentence in sentences:
+                tokens = estimate_tokens(sentence) + 1
+                if tokens_used + tokens > self.token_budget:
+                    break
+                kept.append(sentence)
+                seen_sentences.add(sentence.lower())
+                tokens_used += tokens
+
+            texts_by_source.setdefault(source, []).append(doc.page_content)
+            if kept:
+                packed.append(Document(page_content="\n".join(kept), metadata=dict(doc.metadata)))
+            if tokens_used >= self.token_budget or len(kept) < len(sentences):
+                break
+
+        tokens_out = sum(estimate_tokens(doc.page_content) for doc in packed)
+        return PackedContext(packed, tokens_in, tokens_out)
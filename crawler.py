@@ -0,0 +1,432 @@
+"""
+Crawler module for Victoria on Move application.
+Discovers site pages from sitemap.xml and in-domain links, respecting
+robots.txt, and skips near-duplicate pages before they are indexed.
+"""
+
+import hashlib
+import logging
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from config import (
+    LOADER_MAX_CONCURRENCY,
+    LOADER_TIMEOUT,
+    LOADER_RETRIES,
+    LOADER_USER_AGENT,
+    CRAWL_MAX_PAGES,
+    CRAWL_MAX_DEPTH,
+    CRAWL_USE_SITEMAP,
+    CRAWL_RESPECT_ROBOTS,
+    CRAWL_SIMHASH_DISTANCE
+)
+from loaders import FetchError, parse_html
+
+logger = logging.getLogger(__name__)
+
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
+    ".zip", ".mp4", ".mp3", ".css", ".js", ".xml", ".doc", ".docx"
+)
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so different spellings of a page are crawled once.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the query string and collapses an empty path
+    to "/".
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """
+    Compute the SimHash fingerprint of a text.
+
+    Texts sharing most of their word 3-grams get fingerprints that differ in
+    only a few bits.
+
+    Args:
+        text: Text to fingerprint
+        bits: Fingerprint size in bits
+
+    Returns:
+        Fingerprint as an integer
+    """
+    words = re.findall(r"\w+", text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * bits
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+
+class NearDuplicateFilter:
+    """
+    Remembers page fingerprints and flags pages close to one already seen.
+
+    Fingerprints are split into bands, so a page is only compared with the
+    pages sharing at least one band instead of every page crawled so far.
+    """
+
+    def __init__(self, max_distance: int = CRAWL_SIMHASH_DISTANCE, bits: int = 64):
+        """
+        Initialize the filter.
+
+        Args:
+            max_distance: Largest Hamming distance counted as a near duplicate
+            bits: Fingerprint size in bits
+        """
+        self.max_distance = max_distance
+        self.bits = bits
+        # With more bands than the allowed distance, near duplicates share a band
+        self.bands = max_distance + 1
+        self.band_bits = bits // self.bands
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Check a page against the pages added so far.
+
+        Args:
+            text: Page text
+
+        Returns:
+            URL of a near-duplicate page, or None
+        """
+        fingerprint = simhash(text, self.bits)
+        for key in self._band_keys(fingerprint):
+            for other, url in self._buckets.get(key, []):
+                if bin(fingerprint ^ other).count("1") <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, url: str, text: str) -> None:
+        """
+        Remember a page.
+
+        Args:
+            url: Page URL
+            text: Page text
+        """
+        fingerprint = simhash(text, self.bits)
+        for key in self._band_keys(fingerprint):
+            self._buckets.setdefault(key, []).append((fingerprint, url))
+
+
+class _LinkExtractor(HTMLParser):
+    """Collects the href of every anchor in an HTML page."""
+
+    def __init__(self):
+        super().__init__()
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+
+def extract_links(base_url: str, html: str) -> List[str]:
+    """
+    Extract absolute HTTP(S) links from an HTML page.
+
+    Args:
+        base_url: URL the page was fetched from
+        html: Raw HTML of the page
+
+    Returns:
+        Normalized absolute URLs, in page order
+    """
+    extractor = _LinkExtractor()
+    try:
+        extractor.feed(html)
+    except Exception as e:
+        logger.warning("Could not extract links from %s: %s", base_url, e)
+    links = []
+    for href in extractor.links:
+        url = urljoin(base_url, href)
+        if urlsplit(url).scheme in ("http", "https"):
+            links.append(normalize_url(url))
+    return links
+
+
+class SiteCrawler(BaseLoader):
+    """
+    Load documents by crawling a site.
+
+    Pages are discovered from the site's sitemap.xml (including sitemaps
+    listed in robots.txt) and by following in-domain links breadth first,
+    up to a maximum depth and page count. robots.txt rules are respected,
+    and pages whose text nearly duplicates an already crawled page are
+    skipped before they reach splitting and embedding.
+    """
+
+    def __init__(
+        self,
+        start_urls: List[str],
+        max_pages: int = CRAWL_MAX_PAGES,
+        max_depth: int = CRAWL_MAX_DEPTH,
+        use_sitemap: bool = CRAWL_USE_SITEMAP,
+        respect_robots: bool = CRAWL_RESPECT_ROBOTS,
+        max_concurrency: int = LOADER_MAX_CONCURRENCY,
+        timeout: float = LOADER_TIMEOUT,
+        retries: int = LOADER_RETRIES,
+        parser: Callable[[str, str], str] = parse_html,
+        duplicate_filter: Optional[NearDuplicateFilter] = None
+    ):
+        """
+        Initialize the crawler.
+
+        Args:
+            start_urls: Seed URLs. Their hosts are the domains crawled.
+            max_pages: Maximum number of pages fetched
+            max_depth: Maximum number of links followed from a seed or
+                sitemap URL
+            use_sitemap: Seed the crawl from the sites' sitemap.xml
+            respect_robots: Skip URLs disallowed by robots.txt
+            max_concurrency: Maximum number of requests in flight
+            timeout: Timeout in seconds for each request
+            retries: Number of retries per URL after the first attempt
+            parser: Function turning (url, html) into page text
+            duplicate_filter: Near-duplicate filter. If None, one with the
+                configured distance is created for each crawl.
+        """
+        self.start_urls = [normalize_url(url) for url in start_urls]
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.use_sitemap = use_sitemap
+        self.respect_robots = respect_robots
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.parser = parser
+        self.duplicate_filter = duplicate_filter
+        self.domains = {urlsplit(url).netloc for url in self.start_urls}
+        self.failures: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {}
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = LOADER_USER_AGENT
+        return session
+
+    def _get(self, session: requests.Session, url: str) -> requests.Response:
+        """GET a URL, retrying connection errors and 429/5xx responses."""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(2 ** (attempt - 1) * 0.5, 8))
+            try:
+                response = session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                continue
+            return response
+        raise FetchError(f"Failed to fetch {url}: {str(last_error)}")
+
+    def _robots_for(self, session: requests.Session, url: str) -> Optional[RobotFileParser]:
+        """Fetch and cache the robots.txt rules of a URL's site."""
+        parts = urlsplit(url)
+        root = f"{parts.scheme}://{parts.netloc}"
+        if root not in self._robots:
+            robots = None
+            try:
+                response = self._get(session, f"{root}/robots.txt")
+                if response.status_code == 200:
+                    robots = RobotFileParser()
+                    robots.parse(response.text.splitlines())
+            except FetchError as e:
+                logger.warning("Could not fetch robots.txt for %s: %s", root, e)
+            self._robots[root] = robots
+        return self._robots[root]
+
+    def _in_scope(self, url: str) -> bool:
+        """Check that a URL is in the crawled domains and looks like a page."""
+        parts = urlsplit(url)
+        return parts.netloc in self.domains and not parts.path.lower().endswith(SKIPPED_EXTENSIONS)
+
+    def _allowed(self, session: requests.Session, url: str) -> bool:
+        """Check that robots.txt allows fetching a URL."""
+        if not self.respect_robots:
+            return True
+        robots = self._robots_for(session, url)
+        return robots is None or robots.can_fetch(LOADER_USER_AGENT, url)
+
+    def _sitemap_urls(self, session: requests.Session) -> List[str]:
+        """Collect page URLs from the sitemaps of the crawled sites."""
+        sitemaps = []
+        for url in self.start_urls:
+            parts = urlsplit(url)
+            root = f"{parts.scheme}://{parts.netloc}"
+            robots = self._robots_for(session, url) if self.respect_robots else None
+            listed = robots.site_maps() if robots is not None else None
+            for sitemap in listed or [f"{root}/sitemap.xml"]:
+                if sitemap not in sitemaps:
+                    sitemaps.append(sitemap)
+
+        urls: List[str] = []
+        seen_sitemaps: Set[str] = set()
+        while sitemaps and len(urls) < self.max_pages:
+            sitemap = sitemaps.pop(0)
+            if sitemap in seen_sitemaps:
+                continue
+            seen_sitemaps.add(sitemap)
+            try:
+                response = self._get(session, sitemap)
+                if response.status_code != 200:
+                    continue
+                root = ElementTree.fromstring(response.content)
+            except (FetchError, ElementTree.ParseError) as e:
+                logger.warning("Skipping sitemap %s: %s", sitemap, e)
+                continue
+            for loc in root.iter(f"{SITEMAP_NAMESPACE}loc"):
+                location = (loc.text or "").strip()
+                if not location:
+                    continue
+                if root.tag == f"{SITEMAP_NAMESPACE}sitemapindex":
+                    sitemaps.append(location)
+                else:
+                    urls.append(normalize_url(location))
+        return urls
+
+    def _fetch_page(self, session: requests.Session, url: str) -> Tuple[str, str]:
+        """Fetch a page and return its HTML and extracted text."""
+        response = self._get(session, url)
+        response.raise_for_status()
+        if "html" not in response.headers.get("Content-Type", "text/html"):
+            raise FetchError(f"Not an HTML page: {url}")
+        html = response.text
+        return html, self.parser(url, html)
+
+    def lazy_load(self) -> Iterator[Document]:
+        """
+        Crawl the site, yielding pages as they are fetched.
+
+        Pages are fetched concurrently, but results are processed in
+        frontier order: links are queued and near-duplicates resolved as if
+        pages had been fetched one by one, so the same site always yields
+        the same pages under the same URLs and the first page in crawl order
+        is the copy kept.
+
+        Yields:
+            Documents with "source" and "depth" metadata
+        """
+        self.failures = {}
+        self.stats = {"fetched": 0, "near_duplicates": 0, "disallowed": 0}
+        duplicates = self.duplicate_filter or NearDuplicateFilter()
+        session = self._create_session()
+
+        frontier: Deque[Tuple[str, int]] = deque((url, 0) for url in self.start_urls)
+        seen: Set[str] = set(self.start_urls)
+
+        try:
+            if self.use_sitemap:
+                for url in self._sitemap_urls(session):
+                    if url not in seen and self._in_scope(url):
+                        seen.add(url)
+                        frontier.append((url, 0))
+
+            with ThreadPoolExecutor(self.max_concurrency) as pool:
+                pending: Dict[Future, int] = {}
+                pages: Dict[int, Tuple[str, int]] = {}
+                # Finished fetches by crawl position, until all earlier pages are processed
+                finished: Dict[int, Future] = {}
+                submitted = 0
+                next_index = 0
+                window = 2 * self.max_concurrency
+                while frontier or pending:
+                    while (
+                        frontier
+                        and len(pending) < self.max_concurrency
+                        and submitted - next_index < window
+                        and submitted < self.max_pages
+                    ):
+                        url, depth = frontier.popleft()
+                        if not self._allowed(session, url):
+                            self.stats["disallowed"] += 1
+                            continue
+                        pending[pool.submit(self._fetch_page, session, url)] = submitted
+                        pages[submitted] = (url, depth)
+                        submitted += 1
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished[pending.pop(future)] = future
+
+                    while next_index in finished:
+                        future = finished.pop(next_index)
+                        url, depth = pages.pop(next_index)
+                        next_index += 1
+                        try:
+                            html, text = future.result()
+                        except Exception as e:
+                            logger.warning("Skipping %s: %s", url, e)
+                            self.failures[url] = str(e)
+                            continue
+                        self.stats["fetched"] += 1
+
+                        if depth < self.max_depth:
+                            for link in extract_links(url, html):
+                                if link not in seen and self._in_scope(link):
+                                    seen.add(link)
+                                    frontier.append((link, depth + 1))
+
+                        duplicate_of = duplicates.find(text)
+                        if duplicate_of is not None:
+                            logger.info("Skipping %s, near duplicate of %s", url, duplicate_of)
+                            self.stats["near_duplicates"] += 1
+                            continue
+                        duplicates.add(url, text)
+                        yield Document(page_content=text, metadata={"source": url, "depth": depth})
+        finally:
+            session.close()
@@ -0,0 +1,370 @@
+"""
+Embeddings module for Victoria on Move application.
+Provides a cache layer in front of the embedding model and a local CPU
+embedding backend.
+"""
+
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_QUERY_CACHE_SIZE,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_BATCH_SIZE,
+    LOCAL_EMBEDDING_THREADS,
+    LOCAL_EMBEDDING_RUNTIME,
+    LOCAL_EMBEDDING_ONNX_FILE
+)
+from index_store import hash_text
+from metrics import metrics
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Cache-backed wrapper around an embeddings model.
+
+    Query embeddings are kept in an in-memory LRU cache. Document embeddings
+    are persisted in SQLite, keyed by model name and text hash, so identical
+    chunks are only ever sent to the embedding endpoint once.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        cache_path: Optional[str] = EMBEDDING_CACHE_PATH,
+        query_cache_size: int = EMBEDDING_QUERY_CACHE_SIZE
+    ):
+        """
+        Initialize the cached embeddings.
+
+        Args:
+            underlying: Embeddings model to call on cache misses
+            model_name: Model name used to namespace cached vectors
+            cache_path: SQLite file for document embeddings. If None, an
+                in-memory database is used.
+            query_cache_size: Maximum number of cached query embeddings
+        """
+        self.underlying = underlying
+        self.model_name = model_name
+        self.query_cache_size = query_cache_size
+        self.stats: Dict[str, int] = {
+            "query_hits": 0,
+            "query_misses": 0,
+            "document_hits": 0,
+            "document_misses": 0
+        }
+
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if cache_path is None:
+            cache_path = ":memory:"
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+
+    def _get_vectors(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def _put_vectors(self, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [
+                    (self.model_name, text_hash, array("f", vector).tobytes())
+                    for text_hash, vector in vectors.items()
+                ]
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, calling the underlying model only for uncached texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embeddings, one per input text
+        """
+        hashes = [hash_text(text) for text in texts]
+        cached = self._get_vectors(list(set(hashes)))
+
+        missing: Dict[str, str] = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached:
+                missing.setdefault(text_hash, text)
+
+        if missing:
+            with metrics.span("embed_documents"):
+                vectors = self.underlying.embed_documents(list(missing.values()))
+            # Round through float32 so fresh and cached results are identical
+            computed = {
+                text_hash: array("f", vector).tolist()
+                for text_hash, vector in zip(missing.keys(), vectors)
+            }
+            self._put_vectors(computed)
+            cached.update(computed)
+
+        with self._lock:
+            self.stats["document_misses"] += len(missing)
+            self.stats["document_hits"] += len(texts) - len(missing)
+        metrics.incr("embedding_cache_misses", len(missing), kind="document")
+        metrics.incr("embedding_cache_hits", len(texts) - len(missing), kind="document")
+
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query, serving repeated queries from the LRU cache.
+
+        Args:
+            text: Query text to embed
+
+        Returns:
+            Query embedding
+        """
+        with self._lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+                self.stats["query_hits"] += 1
+                metrics.incr("embedding_cache_hits", kind="query")
+                return vector
+            self.stats["query_misses"] += 1
+
+        metrics.incr("embedding_cache_misses", kind="query")
+        with metrics.span("embed_query"):
+            vector = self.underlying.embed_query(text)
+
+        with self._lock:
+            self._query_cache[text] = vector
+            self._query_cache.move_to_end(text)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries, batching the ones missing from the LRU cache.
+
+        Args:
+            texts: Query texts to embed
+
+        Returns:
+            List of embeddings, one per input text
+        """
+        vectors: Dict[str, List[float]] = {}
+        with self._lock:
+            for text in texts:
+                vector = self._query_cache.get(text)
+                if vector is not None:
+                    self._query_cache.move_to_end(text)
+                    vectors[text] = vector
+            missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+            self.stats["query_hits"] += len(texts) - len(missing)
+            self.stats["query_misses"] += len(missing)
+        metrics.incr("embedding_cache_hits", len(texts) - len(missing), kind="query")
+        metrics.incr("embedding_cache_misses", len(missing), kind="query")
+
+        if missing:
+            with metrics.span("embed_query", mode="batch"):
+                computed = embed_queries(self.underlying, missing)
+            with self._lock:
+                for text, vector in zip(missing, computed):
+                    vectors[text] = vector
+                    self._query_cache[text] = vector
+                    self._query_cache.move_to_end(text)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return [vectors[text] for text in texts]
+
+    def clear_query_cache(self) -> None:
+        """Drop all cached query embeddings."""
+        with self._lock:
+            self._query_cache.clear()
+
+
+_local_models: Dict[tuple, Any] = {}
+_local_models_lock = threading.Lock()
+
+
+def _load_sentence_transformer(model_name: str, runtime: str, onnx_file: Optional[str], threads: int) -> Any:
+    """Load a sentence-transformers model once per process and configuration."""
+    key = (model_name, runtime, onnx_file, threads)
+    with _local_models_lock:
+        model = _local_models.get(key)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            if runtime == "onnx":
+                import onnxruntime
+
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = threads
+                model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+                if onnx_file:
+                    model_kwargs["file_name"] = onnx_file
+                model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+            elif runtime == "torch":
+                import torch
+
+                torch.set_num_threads(threads)
+                model = SentenceTransformer(model_name, device="cpu")
+            else:
+                raise ValueError(f"Unknown local embedding runtime {runtime!r}, expected 'torch' or 'onnx'")
+            _local_models[key] = model
+        return model
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Embeddings computed on CPU with a local sentence-transformers model.
+
+    Texts are encoded in batches without any network round trip. The model
+    is loaded on first use and shared by every instance with the same
+    configuration in the process.
+    """
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_EMBEDDING_MODEL,
+        batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+        threads: int = LOCAL_EMBEDDING_THREADS,
+        runtime: str = LOCAL_EMBEDDING_RUNTIME,
+        onnx_file: Optional[str] = LOCAL_EMBEDDING_ONNX_FILE,
+        model: Optional[Any] = None
+    ):
+        """
+        Initialize the local embeddings.
+
+        Args:
+            model_name: sentence-transformers model name or path
+            batch_size: Texts encoded per forward pass
+            threads: CPU threads used for inference
+            runtime: "torch", or "onnx" for ONNX Runtime
+            onnx_file: ONNX file inside the model repository, e.g. a
+                quantized int8 export
+            model: Preloaded object with an encode() method, mainly for tests
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.runtime = runtime
+        self.onnx_file = onnx_file
+        self._model = model
+
+    @property
+    def model(self) -> Any:
+        """The underlying sentence-transformers model, loaded on first use."""
+        if self._model is None:
+            self._model = _load_sentence_transformer(self.model_name, self.runtime, self.onnx_file, self.threads)
+        return self._model
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents."""
+        if not texts:
+            return []
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self._encode([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in batched forward passes."""
+        if not texts:
+            return []
+        return self._encode(texts)
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries with as few model calls as the model allows.
+
+    Models with an embed_queries() method, such as CachedEmbeddings and
+    LocalEmbeddings, batch themselves. Google embeddings, including
+    subclasses, use the batch endpoint with the query task type.
+
+    Args:
+        embeddings: Embeddings model
+        texts: Query texts to embed
+
+    Returns:
+        List of embeddings, one per input text
+    """
+    if not texts:
+        return []
+    embed_batch = getattr(embeddings, "embed_queries", None)
+    if embed_batch is not None:
+        return embed_batch(texts)
+    try:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    except ImportError:
+        GoogleGenerativeAIEmbeddings = None
+    if GoogleGenerativeAIEmbeddings is not None and isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+        # The batch endpoint embeds documents unless told the texts are queries
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def embedding_model_id(backend: str = EMBEDDING_BACKEND) -> str:
+    """
+    Return an identifier for the configured embedding model.
+
+    Cached vectors and indexes are keyed by it, so switching backend,
+    model or quantized export never mixes incompatible vectors.
+
+    Args:
+        backend: "google" or "local"
+
+    Returns:
+        Model identifier
+    """
+    if backend == "google":
+        return EMBEDDING_MODEL
+    if backend == "local":
+        model_id = f"local:{LOCAL_EMBEDDING_MODEL}"
+        if LOCAL_EMBEDDING_RUNTIME == "onnx":
+            model_id += f":onnx:{LOCAL_EMBEDDING_ONNX_FILE or 'default'}"
+        return model_id
+    raise ValueError(f"Unknown embedding backend {backend!r}, expected 'google' or 'local'")
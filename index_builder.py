@@ -0,0 +1,246 @@
+"""
+Index builder module for Victoria on Move application.
+Builds approximate nearest neighbour FAISS indexes (IVF, HNSW and quantized
+variants) and measures their recall against an exact flat index.
+"""
+
+import math
+import time
+from typing import Dict, List
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from config import (
+    INDEX_TYPE,
+    IVF_NLIST,
+    IVF_NPROBE,
+    HNSW_M,
+    HNSW_EF_SEARCH,
+    PQ_M
+)
+
+INDEX_TYPES = ("flat", "ivf", "ivf_sq8", "ivf_pq", "hnsw", "hnsw_sq8", "sq8", "sq_fp16")
+
+# FAISS warns below this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def _pq_params(dimension: int, count: int) -> str:
+    """Pick PQ sub-quantizers dividing the dimension and a trainable code size."""
+    m = max(divisor for divisor in range(1, min(PQ_M, dimension) + 1) if dimension % divisor == 0)
+    nbits = min(8, max(1, int(math.log2(max(2, count // MIN_POINTS_PER_CENTROID)))))
+    return f"PQ{m}x{nbits}"
+
+
+def index_factory_string(index_type: str, dimension: int, count: int) -> str:
+    """
+    Return the FAISS index factory string for an index type.
+
+    The number of IVF lists is capped so every centroid gets enough training
+    points, which matters for small corpora.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        dimension: Dimension of the vectors
+        count: Number of vectors the index is trained on
+
+    Returns:
+        FAISS index factory string
+    """
+    nlist = max(1, min(IVF_NLIST, count // MIN_POINTS_PER_CENTROID))
+    factories = {
+        "flat": "Flat",
+        "ivf": f"IVF{nlist},Flat",
+        "ivf_sq8": f"IVF{nlist},SQ8",
+        "ivf_pq": f"IVF{nlist},{_pq_params(dimension, count)}",
+        "hnsw": f"HNSW{HNSW_M}",
+        "hnsw_sq8": f"HNSW{HNSW_M},SQ8",
+        "sq8": "SQ8",
+        "sq_fp16": "SQfp16"
+    }
+    if index_type not in factories:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {', '.join(INDEX_TYPES)}")
+    return factories[index_type]
+
+
+def apply_search_params(index, nprobe: int = IVF_NPROBE, ef_search: int = HNSW_EF_SEARCH) -> None:
+    """
+    Set the search-time parameters of an index.
+
+    Args:
+        index: FAISS index
+        nprobe: Number of IVF lists visited per query
+        ef_search: Size of the HNSW candidate list per query
+    """
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def build_index(vectors: np.ndarray, index_type: str = INDEX_TYPE):
+    """
+    Build and train a FAISS index over a set of vectors.
+
+    Args:
+        vectors: float32 array of shape (count, dimension)
+        index_type: One of INDEX_TYPES
+
+    Returns:
+        FAISS index containing the vectors, in input order
+    """
+    count, dimension = vectors.shape
+    index = faiss.index_factory(dimension, index_factory_string(index_type, dimension, count))
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index)
+    return index
+
+
+def index_vectors(index) -> np.ndarray:
+    """Return the vectors stored in an index, decoded if it is quantized."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def convert_vectorstore(vectorstore: FAISS, index_type: str = INDEX_TYPE) -> FAISS:
+    """
+    Replace the index of a vector store with one of another type, in place.
+
+    Vectors keep their positions, so the docstore mapping stays valid.
+
+    Args:
+        vectorstore: Vector store whose index holds exact vectors
+        index_type: One of INDEX_TYPES
+
+    Returns:
+        The same vector store
+    """
+    vectorstore.index = build_index(index_vectors(vectorstore.index), index_type)
+    return vectorstore
+
+
+def make_index_writable(vectorstore: FAISS) -> None:
+    """
+    Copy memory-mapped IVF lists into memory so vectors can be added.
+
+    IVF indexes loaded with IO_FLAG_MMAP keep their lists in read-only
+    OnDiskInvertedLists. Other index types are left as they are.
+
+    Args:
+        vectorstore: Vector store about to be modified
+    """
+    ivf = faiss.try_extract_index_ivf(vectorstore.index)
+    if ivf is None:
+        return
+    on_disk = faiss.downcast_InvertedLists(ivf.invlists)
+    if not isinstance(on_disk, faiss.OnDiskInvertedLists):
+        return
+    in_memory = faiss.ArrayInvertedLists(on_disk.nlist, on_disk.code_size)
+    for list_no in range(on_disk.nlist):
+        size = on_disk.list_size(list_no)
+        if size:
+            in_memory.add_entries(list_no, size, on_disk.get_ids(list_no), on_disk.get_codes(list_no))
+    # The index takes ownership of the new lists and frees the memory-mapped ones
+    in_memory.this.disown()
+    ivf.replace_invlists(in_memory, True)
+
+
+def delete_from_vectorstore(vectorstore: FAISS, ids: List[str], index_type: str = INDEX_TYPE) -> None:
+    """
+    Delete documents from a vector store, whatever its index type.
+
+    LangChain renumbers the remaining vectors to contiguous positions after
+    a delete, which only matches the index for types that compact on
+    remove_ids, such as flat and scalar quantized indexes. IVF indexes keep
+    the original labels and HNSW indexes cannot remove vectors at all, so
+    both are rebuilt from the remaining vectors instead.
+
+    Args:
+        vectorstore: Vector store to delete from
+        ids: Docstore IDs to delete
+        index_type: Type to rebuild the index as when it cannot remove vectors
+    """
+    if faiss.try_extract_index_ivf(vectorstore.index) is None:
+        try:
+            vectorstore.delete(ids)
+            return
+        except RuntimeError:
+            # FAISS refuses remove_ids before touching anything, so the store is intact
+            pass
+    flat = faiss.IndexFlatL2(vectorstore.index.d)
+    flat.add(index_vectors(vectorstore.index))
+    vectorstore.index = flat
+    vectorstore.delete(ids)
+    if flat.ntotal:
+        convert_vectorstore(vectorstore, index_type)
+
+
+def _search_seconds(index, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    _, indices = index.search(queries, k)
+    return indices, time.perf_counter() - start
+
+
+def _index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def evaluate_recall(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    index_type: str = INDEX_TYPE
+) -> Dict[str, float]:
+    """
+    Compare an approximate index with the exact flat baseline.
+
+    Args:
+        vectors: Exact document vectors, float32 of shape (count, dimension)
+        queries: Query vectors, float32 of shape (queries, dimension)
+        k: Number of neighbours compared per query
+        index_type: One of INDEX_TYPES
+
+    Returns:
+        Recall@k of the approximate index, search latencies and index sizes
+    """
+    flat = build_index(vectors, "flat")
+    approximate = build_index(vectors, index_type)
+
+    expected, flat_seconds = _search_seconds(flat, queries, k)
+    found, approximate_seconds = _search_seconds(approximate, queries, k)
+
+    # A hit is any returned vector at least as close as the k-th exact neighbour,
+    # so duplicate vectors tied at the same distance are not counted as misses
+    overlap = 0
+    total = 0
+    for query, expected_row, found_row in zip(queries, expected, found):
+        expected_row = expected_row[expected_row >= 0]
+        found_row = found_row[found_row >= 0]
+        if not len(expected_row):
+            continue
+        radius = ((vectors[expected_row] - query) ** 2).sum(axis=1).max()
+        distances = ((vectors[found_row] - query) ** 2).sum(axis=1)
+        overlap += int((distances <= radius * (1 + 1e-5) + 1e-6).sum())
+        total += len(expected_row)
+
+    return {
+        "index_type": index_type,
+        "k": k,
+        "queries": len(queries),
+        "recall_at_k": overlap / total if total else 1.0,
+        "flat_ms_per_query": flat_seconds / len(queries) * 1000,
+        "approximate_ms_per_query": approximate_seconds / len(queries) * 1000,
+        "flat_bytes": _index_bytes(flat),
+        "approximate_bytes": _index_bytes(approximate)
+    }
@@ -0,0 +1,362 @@
+"""
+Index store module for Victoria on Move application.
+Persists FAISS indexes on disk under versioned cache keys so that new
+processes can reuse an index instead of re-embedding the whole corpus.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    INDEX_CACHE_DIR,
+    INDEX_FORMAT_VERSION,
+    EMBEDDING_MODEL,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    INDEX_TYPE,
+    BOILERPLATE_STRIPPING_ENABLED,
+    CHUNK_STORE_ENABLED,
+    CHUNK_STORE_FLOAT16_VECTORS
+)
+from chunk_store import ChunkStore
+from index_builder import index_vectors
+
+if TYPE_CHECKING:
+    from retrievers import BM25Index
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+MANIFEST_FILE = "manifest.json"
+LEXICAL_FILE = "bm25.json"
+POINTERS_FILE = "latest.json"
+
+
+def hash_text(text: str) -> str:
+    """
+    Return a stable hex digest for a piece of text.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        SHA-256 hex digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SourceHasher:
+    """
+    Incrementally hashes loaded documents per source URL.
+
+    Documents can be released as soon as they are added, so streaming
+    ingestion does not need to keep page text around to compute the cache
+    key.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, "hashlib._Hash"] = {}
+
+    def add(self, doc: Document) -> None:
+        """Add a document to the hash of its source."""
+        source = doc.metadata.get("source", "")
+        digest = self._hashes.get(source)
+        if digest is None:
+            digest = self._hashes[source] = hashlib.sha256()
+        else:
+            digest.update(b"\n")
+        digest.update(doc.page_content.encode("utf-8"))
+
+    def hexdigests(self) -> Dict[str, str]:
+        """Return the mapping of source URL to content hash."""
+        return {source: digest.hexdigest() for source, digest in sorted(self._hashes.items())}
+
+
+def compute_source_hashes(documents: List[Document]) -> Dict[str, str]:
+    """
+    Hash the content of loaded documents per source URL.
+
+    Args:
+        documents: Documents as returned by the loader
+
+    Returns:
+        Mapping of source URL to content hash
+    """
+    hasher = SourceHasher()
+    for doc in documents:
+        hasher.add(doc)
+    return hasher.hexdigests()
+
+
+def compute_chunk_id(doc: Document) -> str:
+    """
+    Build the content-addressed ID of a document chunk.
+
+    Args:
+        doc: Document chunk with a "source" metadata entry
+
+    Returns:
+        Hex digest of the chunk's source URL and text
+    """
+    return hash_text(doc.metadata.get("source", "") + "\n" + doc.page_content)
+
+
+def compute_config_fingerprint(
+    urls: List[str],
+    embedding_model: str = EMBEDDING_MODEL,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    index_type: str = INDEX_TYPE,
+    strip_boilerplate: bool = BOILERPLATE_STRIPPING_ENABLED
+) -> str:
+    """
+    Fingerprint the settings that determine how an index is built.
+
+    Args:
+        urls: Source URLs of the corpus
+        embedding_model: Name of the embedding model
+        chunk_size: Text splitter chunk size
+        chunk_overlap: Text splitter chunk overlap
+        index_type: FAISS index type
+        strip_boilerplate: Whether repeated blocks are stripped before splitting
+
+    Returns:
+        Short hex fingerprint of the configuration
+    """
+    payload = json.dumps({
+        "format": INDEX_FORMAT_VERSION,
+        "urls": sorted(urls),
+        "embedding_model": embedding_model,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "index_type": index_type,
+        "strip_boilerplate": strip_boilerplate
+    }, sort_keys=True)
+    return hash_text(payload)[:16]
+
+
+def compute_cache_key(config_fingerprint: str, source_hashes: Dict[str, str]) -> str:
+    """
+    Build the cache key for an index from its configuration and content.
+
+    Args:
+        config_fingerprint: Fingerprint from compute_config_fingerprint
+        source_hashes: Content hashes from compute_source_hashes
+
+    Returns:
+        Short hex cache key
+    """
+    payload = json.dumps({
+        "config": config_fingerprint,
+        "sources": source_hashes
+    }, sort_keys=True)
+    return hash_text(payload)[:16]
+
+
+class IndexStore:
+    """
+    Versioned on-disk store for FAISS indexes and their docstores.
+
+    Each index version lives in its own directory named after its cache key.
+    A small pointer file remembers the latest key for every configuration
+    fingerprint so a process can load an index without re-scraping sources.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = INDEX_CACHE_DIR,
+        chunk_store: bool = CHUNK_STORE_ENABLED,
+        float16_vectors: bool = CHUNK_STORE_FLOAT16_VECTORS
+    ):
+        """
+        Initialize the index store.
+
+        Args:
+            cache_dir: Directory where index versions are stored
+            chunk_store: Store chunks in a memory-mapped ChunkStore instead
+                of a pickled docstore
+            float16_vectors: Store a float16 copy of the vectors in the
+                chunk store
+        """
+        self.cache_dir = cache_dir
+        self.chunk_store = chunk_store
+        self.float16_vectors = float16_vectors
+
+    def path_for(self, key: str) -> str:
+        """Return the directory holding the index version for a key."""
+        return os.path.join(self.cache_dir, key)
+
+    def exists(self, key: str) -> bool:
+        """Check whether a complete index version exists for a key."""
+        return os.path.exists(os.path.join(self.path_for(key), MANIFEST_FILE))
+
+    def read_manifest(self, key: str) -> dict:
+        """Read the manifest of a stored index version."""
+        with open(os.path.join(self.path_for(key), MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(
+        self,
+        vectorstore: FAISS,
+        key: str,
+        manifest: dict,
+        lexical_index: Optional["BM25Index"] = None
+    ) -> str:
+        """
+        Save a vector store under a cache key.
+
+        The index is written to a temporary directory first and then renamed
+        into place, so concurrent readers never see a half-written version.
+
+        Args:
+            vectorstore: FAISS vector store to persist
+            key: Cache key of this index version
+            manifest: Extra information to record alongside the index
+            lexical_index: BM25 index over the same chunks, if any
+
+        Returns:
+            Path of the saved index version
+        """
+        final_path = self.path_for(key)
+        if self.exists(key):
+            # Keys are content addressed, so the stored version is identical
+            return final_path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir)
+
+        try:
+            faiss.write_index(vectorstore.index, os.path.join(tmp_path, INDEX_FILE))
+            if self.chunk_store:
+                vectors = index_vectors(vectorstore.index) if self.float16_vectors else None
+                ChunkStore.write(tmp_path, vectorstore, vectors)
+            else:
+                self._write_docstore(tmp_path, vectorstore)
+            if lexical_index is not None:
+                lexical_index.save(os.path.join(tmp_path, LEXICAL_FILE))
+            manifest = dict(manifest, key=key, format=INDEX_FORMAT_VERSION, created_at=time.time())
+            with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+
+            try:
+                os.replace(tmp_path, final_path)
+            except OSError:
+                # Another process stored the same version first
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        return final_path
+
+    def load(self, key: str, embeddings: Embeddings) -> FAISS:
+        """
+        Load a stored vector store.
+
+        The FAISS index is opened with memory mapping where the index type
+        supports it, and read into memory otherwise. Memory-mapped IVF lists
+        are read-only; index_builder.make_index_writable() copies them into
+        memory before chunks are added. Chunks are served from
+        the memory-mapped ChunkStore when the version has one, and from the
+        pickled docstore otherwise.
+
+        Args:
+            key: Cache key of the index version
+            embeddings: Embeddings used to embed queries
+
+        Returns:
+            FAISS vector store instance
+        """
+        path = self.path_for(key)
+        index_path = os.path.join(path, INDEX_FILE)
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            index = faiss.read_index(index_path)
+
+        if ChunkStore.exists(path):
+            docstore = ChunkStore(path)
+            index_to_docstore_id = docstore.id_map()
+        else:
+            # The docstore is only ever written by save() above
+            with open(os.path.join(path, DOCSTORE_FILE), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+
+        return FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
+        )
+
+    def _write_docstore(self, path: str, vectorstore: FAISS) -> None:
+        """Pickle the chunks as an in-memory docstore, the layout FAISS.save_local uses."""
+        ids = dict(vectorstore.index_to_docstore_id)
+        docstore = vectorstore.docstore
+        if not isinstance(docstore, InMemoryDocstore):
+            docstore = InMemoryDocstore({chunk_id: docstore.search(chunk_id) for chunk_id in ids.values()})
+        with open(os.path.join(path, DOCSTORE_FILE), "wb") as f:
+            pickle.dump((docstore, ids), f)
+
+    def lexical_index_path(self, key: str) -> Optional[str]:
+        """
+        Return the BM25 index file stored with an index version.
+
+        Args:
+            key: Cache key of the index version
+
+        Returns:
+            Path of the file for BM25Index.load, or None if the version has none
+        """
+        path = os.path.join(self.path_for(key), LEXICAL_FILE)
+        return path if os.path.exists(path) else None
+
+    def _read_pointers(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.cache_dir, POINTERS_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def latest_key(self, config_fingerprint: str) -> Optional[str]:
+        """
+        Return the most recently stored key for a configuration.
+
+        Args:
+            config_fingerprint: Fingerprint from compute_config_fingerprint
+
+        Returns:
+            Cache key, or None if no complete version is stored
+        """
+        key = self._read_pointers().get(config_fingerprint)
+        if key and self.exists(key):
+            return key
+        return None
+
+    def set_latest(self, config_fingerprint: str, key: str) -> None:
+        """
+        Record a key as the latest version for a configuration.
+
+        Args:
+            config_fingerprint: Fingerprint from compute_config_fingerprint
+            key: Cache key of the stored index version
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pointers = self._read_pointers()
+        pointers[config_fingerprint] = key
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".latest-", dir=self.cache_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(pointers, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.cache_dir, POINTERS_FILE))
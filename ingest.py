@@ -0,0 +1,245 @@
+"""
+Ingest module for Victoria on Move application.
+Embeds document chunks in concurrent batches and adds them to the vector store.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_IN_FLIGHT,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_BACKOFF_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MARKERS = ("429", "rate limit", "resource exhausted", "resource has been exhausted", "quota")
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Check whether an error, or any error it was raised from, is a rate limit.
+
+    Args:
+        error: Exception raised by an embeddings call
+
+    Returns:
+        True if the error looks like an HTTP 429 / quota error
+    """
+    while error is not None:
+        if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+            return True
+        message = str(error).lower()
+        if any(marker in message for marker in RATE_LIMIT_MARKERS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class BatchEmbeddingError(Exception):
+    """
+    Raised when some batches could not be embedded.
+
+    The vector store holding every batch that did succeed is available as
+    the vectorstore attribute, and the IDs that are missing from it as
+    failed_ids.
+    """
+
+    def __init__(self, message: str, vectorstore: Optional[FAISS], failed_ids: List[str]):
+        super().__init__(message)
+        self.vectorstore = vectorstore
+        self.failed_ids = failed_ids
+
+
+class BatchEmbedder:
+    """
+    Embeds chunks in fixed-size batches with several batches in flight.
+
+    Each batch is added to the FAISS index as soon as it is embedded, so a
+    failure midway keeps the work already done. Rate limit errors pause all
+    workers with exponential backoff before the batch is retried.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_in_flight: int = EMBEDDING_MAX_IN_FLIGHT,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        backoff_seconds: float = EMBEDDING_BACKOFF_SECONDS
+    ):
+        """
+        Initialize the batch embedder.
+
+        Args:
+            embeddings: Embeddings model used for the chunks
+            batch_size: Number of chunks per embedding request
+            max_in_flight: Maximum number of concurrent embedding requests
+            max_retries: Retries per batch after the first attempt
+            backoff_seconds: Base delay of the exponential backoff
+        """
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.stats: Dict[str, float] = {}
+
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _wait_for_pause(self) -> None:
+        with self._pause_lock:
+            delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, backing off and retrying on errors."""
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_pause()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.1)
+                if is_rate_limit_error(e):
+                    # Pause every worker, not just this one, until the quota recovers
+                    with self._pause_lock:
+                        self._pause_until = max(self._pause_until, time.monotonic() + delay)
+                    logger.warning("Embedding rate limited, backing off %.1fs", delay)
+                else:
+                    logger.warning("Embedding batch failed (%s), retrying in %.1fs", e, delay)
+                    time.sleep(delay)
+
+    def add_documents(
+        self,
+        vectorstore: Optional[FAISS],
+        docs: List[Document],
+        ids: List[str],
+        on_batch: Optional[Callable[[FAISS, List[Document], List[str]], None]] = None
+    ) -> FAISS:
+        """
+        Embed documents in batches and add them to a vector store.
+
+        Args:
+            vectorstore: Vector store to add to. If None, one is created from
+                the first completed batch.
+            docs: Document chunks to embed
+            ids: Docstore IDs of the chunks
+            on_batch: Called with the vector store, chunks and IDs after each
+                batch is added
+
+        Returns:
+            Vector store containing the documents
+
+        Raises:
+            BatchEmbeddingError: If any batch still fails after its retries
+        """
+        batches = [
+            (docs[i:i + self.batch_size], ids[i:i + self.batch_size])
+            for i in range(0, len(docs), self.batch_size)
+        ]
+        return self.add_stream(vectorstore, batches, on_batch)
+
+    def add_stream(
+        self,
+        vectorstore: Optional[FAISS],
+        batches: Iterable[Tuple[List[Document], List[str]]],
+        on_batch: Optional[Callable[[FAISS, List[Document], List[str]], None]] = None
+    ) -> FAISS:
+        """
+        Embed a stream of batches and add them to a vector store.
+
+        The next batch is only pulled from the iterable when fewer than
+        max_in_flight batches are being embedded, so a lazy producer (e.g. a
+        crawl being split into chunks) is held back by the embedding rate
+        rather than buffering the whole corpus.
+
+        Args:
+            vectorstore: Vector store to add to. If None, one is created from
+                the first completed batch.
+            batches: Iterable of (chunks, docstore IDs) batches
+            on_batch: Called with the vector store, chunks and IDs after each
+                batch is added
+
+        Returns:
+            Vector store containing the documents
+
+        Raises:
+            BatchEmbeddingError: If any batch still fails after its retries
+        """
+        start = time.perf_counter()
+        batches = iter(batches)
+        failed_ids: List[str] = []
+        errors: List[str] = []
+        embedded = 0
+        batch_count = 0
+
+        with ThreadPoolExecutor(self.max_in_flight) as pool:
+            pending: Dict[Future, Tuple[List[Document], List[str]]] = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.max_in_flight:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    batch_count += 1
+                    pending[pool.submit(self._embed_batch, [doc.page_content for doc in batch[0]])] = batch
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_docs, batch_ids = pending.pop(future)
+                    try:
+                        vectors = future.result()
+                    except Exception as e:
+                        failed_ids.extend(batch_ids)
+                        errors.append(str(e))
+                        continue
+
+                    text_embeddings = [(doc.page_content, vector) for doc, vector in zip(batch_docs, vectors)]
+                    metadatas = [doc.metadata for doc in batch_docs]
+                    if vectorstore is None:
+                        vectorstore = FAISS.from_embeddings(
+                            text_embeddings, self.embeddings, metadatas=metadatas, ids=batch_ids
+                        )
+                    else:
+                        vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_ids)
+                    embedded += len(batch_docs)
+                    if on_batch is not None:
+                        on_batch(vectorstore, batch_docs, batch_ids)
+
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "chunks": embedded,
+            "batches": batch_count,
+            "failed_chunks": len(failed_ids),
+            "seconds": elapsed,
+            "chunks_per_sec": embedded / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info(
+            "Embedded %d chunks in %d batches in %.2fs (%.1f chunks/sec)",
+            embedded, batch_count, elapsed, self.stats["chunks_per_sec"]
+        )
+
+        if failed_ids:
+            raise BatchEmbeddingError(
+                f"{len(failed_ids)} chunks failed to embed: {errors[0]}",
+                vectorstore,
+                failed_ids
+            )
+        return vectorstore
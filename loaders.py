@@ -0,0 +1,417 @@
+"""
+Document loaders module for Victoria on Move application.
+Fetches source pages concurrently and parses them in worker processes.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from config import (
+    LOADER_MAX_CONCURRENCY,
+    LOADER_TIMEOUT,
+    LOADER_RETRIES,
+    LOADER_PARSE_WORKERS,
+    LOADER_USER_AGENT,
+    FETCH_METADATA_PATH
+)
+from index_store import hash_text
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_html(url: str, html: str) -> str:
+    """
+    Extract the text of an HTML page the same way UnstructuredURLLoader does.
+
+    Args:
+        url: URL the page was fetched from
+        html: Raw HTML of the page
+
+    Returns:
+        Text of the page elements joined by blank lines
+    """
+    from unstructured.partition.html import partition_html
+
+    elements = partition_html(text=html)
+    return "\n\n".join([str(el) for el in elements])
+
+
+class FetchError(Exception):
+    """Raised when a URL could not be fetched after all retries."""
+
+
+class FetchResult(NamedTuple):
+    """Outcome of fetching a URL. html is None when the server answered 304."""
+
+    html: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class FetchMetadataStore:
+    """
+    JSON-backed store of per-URL fetch metadata.
+
+    Keeps the ETag, Last-Modified header and body hash of every page in
+    memory, and the parsed text of each page in its own file, so that
+    unchanged pages can be revalidated with a conditional request and
+    reused without parsing, while memory does not grow with the text of the
+    site.
+    """
+
+    def __init__(self, path: str = FETCH_METADATA_PATH, pages_dir: Optional[str] = None):
+        """
+        Initialize the store, loading existing metadata if present.
+
+        Args:
+            path: JSON file holding the metadata
+            pages_dir: Directory holding the parsed text of each page. If
+                None, a "fetch_pages" directory next to the metadata file.
+        """
+        self.path = path
+        self.pages_dir = pages_dir or os.path.join(os.path.dirname(os.path.abspath(path)), "fetch_pages")
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+        for entry in self._entries.values():
+            # Older stores kept the text inline; those pages are parsed again once
+            entry.pop("page_content", None)
+
+    def _page_path(self, url: str) -> str:
+        return os.path.join(self.pages_dir, hash_text(url) + ".txt")
+
+    def get(self, url: str) -> Optional[dict]:
+        """Return the stored metadata for a URL, if its parsed text is stored too."""
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None or not os.path.exists(self._page_path(url)):
+            return None
+        return entry
+
+    def read_text(self, url: str) -> str:
+        """
+        Read the stored parsed text of a page.
+
+        Args:
+            url: URL of a page returned by get()
+
+        Returns:
+            Parsed page text
+        """
+        with open(self._page_path(url), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def update(self, url: str, entry: dict, text: Optional[str] = None) -> None:
+        """
+        Replace the stored metadata for a URL.
+
+        Args:
+            url: URL of the page
+            entry: ETag, Last-Modified and content hash of the page
+            text: New parsed text of the page, or None to keep the stored text
+        """
+        if text is not None:
+            os.makedirs(self.pages_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".page-", dir=self.pages_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._page_path(url))
+        with self._lock:
+            self._entries[url] = entry
+
+    def save(self) -> None:
+        """Write the metadata to disk atomically."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=".fetch-", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class PageSpool:
+    """
+    Temporary file of loaded pages that can be replayed once loading is done.
+
+    Lets a caller make a decision over a full pass of the sources, such as
+    whether a cached index matches, and then act on the same pages without
+    loading them again or holding them in memory.
+    """
+
+    def __init__(self):
+        """Initialize an empty spool backed by an anonymous temporary file."""
+        self._file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+
+    def add(self, doc: Document) -> None:
+        """Append a page to the spool."""
+        json.dump({"page_content": doc.page_content, "metadata": doc.metadata}, self._file)
+        self._file.write("\n")
+
+    def __iter__(self) -> Iterator[Document]:
+        """Replay the spooled pages in the order they were added."""
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            record = json.loads(line)
+            yield Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def close(self) -> None:
+        """Delete the spool file."""
+        self._file.close()
+
+    def __enter__(self) -> "PageSpool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ConcurrentURLLoader(BaseLoader):
+    """
+    Load documents from URLs with bounded concurrency.
+
+    Pages are fetched by a thread pool sharing one pooled HTTP session. Each
+    URL has its own timeout and retries, so a slow or failing page does not
+    hold up the rest of the ingest. Fetched pages are parsed in parallel
+    worker processes.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_concurrency: int = LOADER_MAX_CONCURRENCY,
+        timeout: float = LOADER_TIMEOUT,
+        retries: int = LOADER_RETRIES,
+        parse_workers: int = LOADER_PARSE_WORKERS,
+        parser: Callable[[str, str], str] = parse_html,
+        metadata_store: Optional[FetchMetadataStore] = None
+    ):
+        """
+        Initialize the loader.
+
+        Args:
+            urls: List of URLs to load
+            max_concurrency: Maximum number of requests in flight
+            timeout: Timeout in seconds for each request
+            retries: Number of retries per URL after the first attempt
+            parse_workers: Number of parser processes. If 0, pages are parsed
+                in the calling thread.
+            parser: Picklable function turning (url, html) into page text
+            metadata_store: Store enabling conditional requests and reuse of
+                unchanged pages. If None, every page is fetched and parsed.
+        """
+        self.urls = urls
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.parse_workers = parse_workers
+        self.parser = parser
+        self.metadata_store = metadata_store
+        self.failures: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {}
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_concurrency,
+            pool_maxsize=self.max_concurrency
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = LOADER_USER_AGENT
+        return session
+
+    def _fetch(self, session: requests.Session, url: str) -> FetchResult:
+        """Fetch a single URL, retrying transient failures with backoff."""
+        headers = {}
+        entry = self.metadata_store.get(url) if self.metadata_store is not None else None
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(2 ** (attempt - 1) * 0.5, 8))
+            try:
+                response = session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                continue
+
+            if response.status_code == 304 and entry is not None:
+                return FetchResult(None, entry.get("etag"), entry.get("last_modified"))
+
+            response.raise_for_status()
+            return FetchResult(
+                response.text,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified")
+            )
+
+        raise FetchError(f"Failed to fetch {url}: {str(last_error)}")
+
+    def lazy_load(self) -> Iterator[Document]:
+        """
+        Load documents, yielding each one as soon as it and all pages before
+        it are parsed.
+
+        Pages are fetched concurrently but yielded in the order of the input
+        URLs, so order-sensitive stages such as boilerplate stripping see
+        the same sequence on every build. URLs that fail are skipped and
+        recorded in the failures attribute. With a metadata store, pages
+        answered with 304 Not Modified or with an unchanged body reuse their
+        previously parsed text.
+
+        At most twice max_concurrency pages are fetched, parsed or waiting
+        for an earlier page ahead of the consumer, so a slow consumer holds
+        back the crawl instead of letting fetched pages pile up in memory.
+
+        Yields:
+            Loaded documents
+        """
+        self.failures = {}
+        self.stats = {"fetched": 0, "not_modified": 0, "unchanged": 0, "parsed": 0}
+        session = self._create_session()
+        parse_pool = ProcessPoolExecutor(self.parse_workers) if self.parse_workers > 0 else None
+
+        try:
+            with ThreadPoolExecutor(self.max_concurrency) as fetch_pool:
+                urls = iter(self.urls)
+                fetches: Dict[Future, Tuple[int, str]] = {}
+                parses: Dict[Future, Tuple[int, str, FetchResult, str]] = {}
+                pending = set()
+                window = 2 * self.max_concurrency
+                # Finished pages by input position, None for skipped ones, until all earlier pages are yielded
+                ready: Dict[int, Optional[Document]] = {}
+                submitted = 0
+                next_index = 0
+
+                while True:
+                    while submitted - next_index < window:
+                        url = next(urls, None)
+                        if url is None:
+                            break
+                        future = fetch_pool.submit(self._fetch, session, url)
+                        fetches[future] = (submitted, url)
+                        pending.add(future)
+                        submitted += 1
+                    if not pending:
+                        break
+
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in parses:
+                            index, url, result, content_hash = parses.pop(future)
+                            ready[index] = self._to_document(url, future.result, result, content_hash)
+                            continue
+
+                        index, url = fetches.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.warning("Skipping %s: %s", url, e)
+                            self.failures[url] = str(e)
+                            ready[index] = None
+                            continue
+
+                        self.stats["fetched"] += 1
+                        if result.html is None:
+                            self.stats["not_modified"] += 1
+                            ready[index] = self._reuse_document(url, result)
+                            continue
+
+                        content_hash = hash_text(result.html)
+                        entry = self.metadata_store.get(url) if self.metadata_store is not None else None
+                        if entry is not None and entry.get("content_hash") == content_hash:
+                            self.stats["unchanged"] += 1
+                            ready[index] = self._reuse_document(url, result)
+                            continue
+
+                        if parse_pool is None:
+                            html = result.html
+                            ready[index] = self._to_document(
+                                url, lambda: self.parser(url, html), result, content_hash
+                            )
+                        else:
+                            parse = parse_pool.submit(self.parser, url, result.html)
+                            parses[parse] = (index, url, result, content_hash)
+                            pending.add(parse)
+
+                    while next_index in ready:
+                        document = ready.pop(next_index)
+                        next_index += 1
+                        if document is not None:
+                            yield document
+        finally:
+            session.close()
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+            if self.metadata_store is not None:
+                self.metadata_store.save()
+
+    def _reuse_document(self, url: str, result: FetchResult) -> Document:
+        entry = self.metadata_store.get(url)
+        self.metadata_store.update(url, dict(entry, etag=result.etag, last_modified=result.last_modified))
+        return Document(page_content=self.metadata_store.read_text(url), metadata={"source": url})
+
+    def _to_document(
+        self,
+        url: str,
+        get_text: Callable[[], str],
+        result: FetchResult,
+        content_hash: str
+    ) -> Optional[Document]:
+        try:
+            text = get_text()
+        except Exception as e:
+            logger.warning("Failed to parse %s: %s", url, e)
+            self.failures[url] = str(e)
+            return None
+
+        self.stats["parsed"] += 1
+        if self.metadata_store is not None:
+            self.metadata_store.update(url, {
+                "etag": result.etag,
+                "last_modified": result.last_modified,
+                "content_hash": content_hash
+            }, text)
+        return Document(page_content=text, metadata={"source": url})
+
+    def load(self) -> List[Document]:
+        """
+        Load all documents.
+
+        Returns:
+            List of loaded documents, in the order of the input URLs
+        """
+        return list(self.lazy_load())
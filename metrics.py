@@ -0,0 +1,294 @@
+"""
+Metrics module for Victoria on Move application.
+Provides timing spans and counters for the ingest and query pipelines,
+with pluggable exporters for logs, Prometheus and tests.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from config import METRICS_EXPORTERS
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English text, used when the LLM does not report usage
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate token count
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class Span:
+    """A timed pipeline stage, with the stages timed inside it."""
+
+    name: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+    children: List["Span"] = field(default_factory=list)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Return the total seconds spent per stage name within this span."""
+        totals: Dict[str, float] = {}
+        for child in self.children:
+            totals[child.name] = totals.get(child.name, 0.0) + child.duration
+            for name, seconds in child.breakdown().items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Metrics:
+    """
+    Registry that records spans and counters and forwards them to exporters.
+
+    Spans opened while another span is active become its children, so the
+    exporters see a per-request breakdown when the outermost span ends.
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            exporters: Objects with on_span(span, is_root) and
+                on_counter(name, value, labels) methods
+        """
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter: Any) -> None:
+        """Register an additional exporter."""
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Any) -> None:
+        """Unregister an exporter."""
+        self.exporters.remove(exporter)
+
+    def _finish(self, span: Span, parent: Optional[Span]) -> None:
+        if parent is not None:
+            parent.children.append(span)
+        for exporter in self.exporters:
+            exporter.on_span(span, parent is None)
+
+    @contextmanager
+    def span(self, name: str, **labels: str) -> Iterator[Span]:
+        """
+        Time a block of code as a pipeline stage.
+
+        Args:
+            name: Stage name
+            **labels: Extra labels attached to the span
+
+        Yields:
+            The span being timed
+        """
+        parent = _current_span.get()
+        span = Span(name, labels)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self._finish(span, parent)
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """
+        Record a stage that was timed by the caller.
+
+        Useful where a context manager cannot be held open, e.g. across the
+        yields of a generator.
+
+        Args:
+            name: Stage name
+            seconds: Duration of the stage
+            **labels: Extra labels attached to the span
+        """
+        self._finish(Span(name, labels, seconds), _current_span.get())
+
+    def incr(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name: Counter name
+            value: Amount to add
+            **labels: Extra labels attached to the counter
+        """
+        if not value:
+            return
+        for exporter in self.exporters:
+            exporter.on_counter(name, value, labels)
+
+
+class LoggingExporter:
+    """Logs a latency breakdown whenever an outermost span finishes."""
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def on_span(self, span: Span, is_root: bool) -> None:
+        if not is_root:
+            return
+        breakdown = " ".join(
+            f"{name}={seconds * 1000:.1f}ms" for name, seconds in span.breakdown().items()
+        )
+        logger.log(self.level, "%s %.1fms %s", span.name, span.duration * 1000, breakdown)
+
+    def on_counter(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        logger.debug("%s += %s %s", name, value, labels)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class PrometheusExporter:
+    """Aggregates spans and counters and renders them in Prometheus text format."""
+
+    def __init__(self, namespace: str = "rag"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._durations: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        self._counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+
+    def on_span(self, span: Span, is_root: bool) -> None:
+        key = _label_key(dict(span.labels, stage=span.name))
+        with self._lock:
+            totals = self._durations.setdefault(key, [0, 0.0])
+            totals[0] += 1
+            totals[1] += span.duration
+
+    def on_counter(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each pipeline stage.",
+            f"# TYPE {name} summary"
+        ]
+        with self._lock:
+            for key, (count, total) in sorted(self._durations.items()):
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+            for counter, series in sorted(self._counters.items()):
+                counter_name = f"{self.namespace}_{counter}_total"
+                lines.append(f"# TYPE {counter_name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{counter_name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class InMemoryExporter:
+    """Collects every span and counter total in memory, for tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.roots: List[Span] = []
+        self.counters: Dict[str, float] = {}
+
+    def on_span(self, span: Span, is_root: bool) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if is_root:
+                self.roots.append(span)
+
+    def on_counter(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def span_names(self) -> List[str]:
+        """Return the names of all recorded spans in completion order."""
+        with self._lock:
+            return [span.name for span in self.spans]
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that counts LLM calls and prompt/completion tokens."""
+
+    def __init__(self, registry: "Metrics"):
+        self.registry = registry
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self.registry.incr("llm_calls")
+        self.registry.incr("llm_tokens_in", sum(estimate_tokens(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        tokens_out = usage.get("completion_tokens")
+        if tokens_out is None:
+            tokens_out = sum(
+                estimate_tokens(generation.text)
+                for generations in response.generations
+                for generation in generations
+            )
+        self.registry.incr("llm_tokens_out", tokens_out)
+
+
+EXPORTER_TYPES = {
+    "log": LoggingExporter,
+    "prometheus": PrometheusExporter
+}
+
+
+def create_exporters(names: List[str]) -> List[Any]:
+    """
+    Create exporters by name.
+
+    Args:
+        names: Exporter names, any of "log" and "prometheus"
+
+    Returns:
+        List of exporter instances
+    """
+    return [EXPORTER_TYPES[name]() for name in names]
+
+
+# Process-wide registry used by the RAG pipeline
+metrics = Metrics(create_exporters(METRICS_EXPORTERS))
+metrics_callback = MetricsCallbackHandler(metrics)
+
+
+def get_exporter(exporter_type: type) -> Optional[Any]:
+    """Return the first registered exporter of a type, if any."""
+    for exporter in metrics.exporters:
+        if isinstance(exporter, exporter_type):
+            return exporter
+    return None
@@ -3,8 +3,15 @@ RAG Service module for Victoria on Move application.
 Handles document loading, embedding, and retrieval functionality.
 """
 
+import asyncio
+import math
 import os
-from typing import List, Tuple, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Union
+
+import numpy as np
 from langchain_community.document_loaders import UnstructuredURLLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
@@ -13,17 +20,69 @@ from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+from langchain_core.vectorstores import VectorStoreRetriever
 from langchain.schema import Document
 
 from config import (
     VICTORIA_ON_MOVE_URLS,
     EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MAX_IN_FLIGHT,
+    EMBEDDING_BATCH_SIZE,
     LLM_MODEL,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
+    BOILERPLATE_STRIPPING_ENABLED,
     RETRIEVAL_TYPE,
     RETRIEVAL_K,
-    SYSTEM_PROMPT
+    HYBRID_FETCH_K,
+    INDEX_TYPE,
+    SYSTEM_PROMPT,
+    INDEX_CACHE_ENABLED,
+    INDEX_CACHE_VERIFY_SOURCES,
+    EMBEDDING_CACHE_ENABLED,
+    LOADER_MODE,
+    LOADER_CONDITIONAL_FETCH,
+    ANSWER_CACHE_ENABLED,
+    CONTEXT_PACKING_ENABLED,
+    RERANK_ENABLED,
+    RERANK_FETCH_K,
+    LLM_MAX_CONCURRENCY,
+    REQUEST_COALESCING_ENABLED,
+    RELEVANCE_GATE_ENABLED,
+    RELEVANCE_SCORE_THRESHOLD,
+    NO_ANSWER_RESPONSE
+)
+from embeddings import CachedEmbeddings, LocalEmbeddings, embed_queries, embedding_model_id
+from crawler import SiteCrawler
+from loaders import ConcurrentURLLoader, FetchMetadataStore, PageSpool
+from ingest import BatchEmbedder, BatchEmbeddingError
+from answer_cache import SemanticAnswerCache, normalize_question
+from coalescing import SingleFlight
+from concurrency import ConcurrencyLimiter, llm_limiter
+from streaming import TokenStream
+from metrics import metrics, metrics_callback
+from retrievers import BM25Index, HybridRetriever, ScoredVectorRetriever, lookup_documents, search_vectors
+from content_cleaner import BoilerplateStripper
+from context_packer import ContextPacker
+from reranker import CrossEncoderReranker, RerankingRetriever
+from index_builder import (
+    apply_search_params,
+    convert_vectorstore,
+    delete_from_vectorstore,
+    evaluate_recall,
+    make_index_writable
+)
+from index_store import (
+    IndexStore,
+    SourceHasher,
+    compute_source_hashes,
+    compute_chunk_id,
+    compute_config_fingerprint,
+    compute_cache_key
 )
 
 
@@ -38,8 +97,32 @@ class RAGService:
         self.vectorstore: Optional[FAISS] = None
         self.retriever = None
         self.rag_chain = None
+        self.question_answer_chain = None
         self.embeddings = None
+        self.embedding_model = embedding_model_id(EMBEDDING_BACKEND)
         self.llm = None
+        self.index_store = IndexStore()
+        self.index_version: Optional[str] = None
+        self.chunk_manifest: Dict[str, str] = {}
+        self.lexical_index: Optional[BM25Index] = None
+        # Stored BM25 index of the loaded cache version, read on first use by get_lexical_index()
+        self._lexical_index_path: Optional[str] = None
+        self.ingest_stats: Dict[str, float] = {}
+        self.cleaning_stats: Dict[str, int] = {}
+        self.boilerplate_stripper: Optional[BoilerplateStripper] = (
+            BoilerplateStripper(VICTORIA_ON_MOVE_URLS) if BOILERPLATE_STRIPPING_ENABLED else None
+        )
+        self.answer_cache: Optional[SemanticAnswerCache] = None
+        self.context_packer: Optional[ContextPacker] = None
+        self.reranker: Optional[CrossEncoderReranker] = None
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if REQUEST_COALESCING_ENABLED else None
+        # Minimum relevance score of the best retrieved chunk for the LLM to be called, None disables the gate
+        self.relevance_threshold: Optional[float] = RELEVANCE_SCORE_THRESHOLD if RELEVANCE_GATE_ENABLED else None
+        # Guards the attributes swapped in by rebuild() so queries see one generation
+        self._generation_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # Shared by the sync, streaming, batch and async paths of every service in the process
+        self._llm_gate: ConcurrencyLimiter = llm_limiter
         
     def validate_environment(self) -> bool:
         """
@@ -70,15 +153,112 @@ class RAGService:
             urls = VICTORIA_ON_MOVE_URLS
             
         try:
-            loader = UnstructuredURLLoader(urls=urls)
-            self.documents = loader.load()
+            with metrics.span("load_documents"):
+                loader = self._create_loader(urls)
+                self.documents = loader.load()
+
+            self._record_loader_metrics(loader, len(self.documents))
             return self.documents
         except Exception as e:
             raise Exception(f"Failed to load documents: {str(e)}")
-    
+
+    def stream_documents(self, urls: List[str] = None) -> Iterator[Document]:
+        """
+        Load documents lazily, yielding each page as soon as it is parsed.
+
+        Unlike load_documents(), the pages are not kept on the service, so
+        each one can be released once the caller is done with it.
+
+        Args:
+            urls: List of URLs to load. If None, uses default URLs from config.
+
+        Yields:
+            Loaded documents
+
+        Raises:
+            Exception: If document loading fails
+        """
+        if urls is None:
+            urls = VICTORIA_ON_MOVE_URLS
+
+        loader = self._create_loader(urls)
+        count = 0
+        try:
+            for document in loader.lazy_load():
+                count += 1
+                yield document
+        except Exception as e:
+            raise Exception(f"Failed to load documents: {str(e)}")
+        self._record_loader_metrics(loader, count)
+
+    def _create_loader(self, urls: List[str]):
+        """Create the document loader selected by LOADER_MODE."""
+        if LOADER_MODE == "concurrent":
+            metadata_store = FetchMetadataStore() if LOADER_CONDITIONAL_FETCH else None
+            return ConcurrentURLLoader(urls=urls, metadata_store=metadata_store)
+        if LOADER_MODE == "crawl":
+            return SiteCrawler(start_urls=urls)
+        return UnstructuredURLLoader(urls=urls)
+
+    def _record_loader_metrics(self, loader, count: int) -> None:
+        """Count loaded, failed, revalidated and skipped pages."""
+        metrics.incr("documents_loaded", count)
+        if isinstance(loader, (ConcurrentURLLoader, SiteCrawler)):
+            metrics.incr("pages_failed", len(loader.failures))
+            for name, value in loader.stats.items():
+                metrics.incr(f"pages_{name}", value)
+
+    def clean_documents(self, documents: List[Document] = None) -> List[Document]:
+        """
+        Strip boilerplate repeated across pages before splitting.
+
+        Text blocks such as navigation menus, footers and contact banners
+        are kept only on the highest ranked page they appear on, see
+        BoilerplateStripper. The characters and chunks removed are added to
+        cleaning_stats and the metrics; chunks removed are estimated from
+        the characters removed from each page, so pages are split only
+        once. Documents are returned unchanged when
+        BOILERPLATE_STRIPPING_ENABLED is False.
+
+        Args:
+            documents: Loaded documents. If None, uses loaded documents.
+
+        Returns:
+            Cleaned documents
+        """
+        if documents is None:
+            documents = self.documents
+        if self.boilerplate_stripper is None:
+            return documents
+
+        chars_removed = 0
+        chunks_removed = 0
+        with metrics.span("clean_documents"):
+            cleaned = self.boilerplate_stripper.clean_pages(documents)
+            for doc, clean_doc in zip(documents, cleaned):
+                page_chars_removed = len(doc.page_content) - len(clean_doc.page_content)
+                chars_removed += page_chars_removed
+                chunks_removed += math.ceil(page_chars_removed / (CHUNK_SIZE - CHUNK_OVERLAP))
+
+        for name, value in (("pages", len(documents)), ("chars_removed", chars_removed),
+                            ("chunks_removed", chunks_removed)):
+            self.cleaning_stats[name] = self.cleaning_stats.get(name, 0) + value
+        metrics.incr("boilerplate_chars_removed", chars_removed)
+        metrics.incr("boilerplate_chunks_removed", chunks_removed)
+        return cleaned
+
+    def _create_text_splitter(self) -> RecursiveCharacterTextSplitter:
+        return RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP
+        )
+
     def split_documents(self, documents: List[Document] = None) -> List[Document]:
         """
         Split documents into smaller chunks.
+
+        Each chunk gets a content-addressed "chunk_id" metadata entry, and
+        duplicate chunks from the same source are dropped.
         
         Args:
             documents: List of documents to split. If None, uses loaded documents.
@@ -89,55 +269,550 @@ class RAGService:
         if documents is None:
             documents = self.documents
             
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP
-        )
-        return text_splitter.split_documents(documents)
+        text_splitter = self._create_text_splitter()
+
+        chunks = []
+        seen_ids = set()
+        with metrics.span("split_documents"):
+            for chunk in text_splitter.split_documents(documents):
+                chunk_id = compute_chunk_id(chunk)
+                if chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk_id)
+                chunk.metadata["chunk_id"] = chunk_id
+                chunks.append(chunk)
+        metrics.incr("chunks_created", len(chunks))
+        return chunks
     
-    def create_embeddings(self) -> GoogleGenerativeAIEmbeddings:
+    def create_embeddings(self) -> Embeddings:
         """
         Create embeddings model.
+
+        EMBEDDING_BACKEND selects the Gemini embedding API ("google") or a
+        local sentence-transformers model on CPU ("local"). When
+        EMBEDDING_CACHE_ENABLED is set, the model is wrapped in
+        CachedEmbeddings so repeated texts and queries are not re-embedded.
         
         Returns:
-            GoogleGenerativeAIEmbeddings instance
+            Embeddings instance
         """
-        self.embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+        if EMBEDDING_BACKEND == "local":
+            embeddings = LocalEmbeddings()
+        else:
+            embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+        self.embedding_model = embedding_model_id(EMBEDDING_BACKEND)
+        if EMBEDDING_CACHE_ENABLED:
+            embeddings = CachedEmbeddings(embeddings, model_name=self.embedding_model)
+        self.embeddings = embeddings
         return self.embeddings
     
-    def create_vectorstore(self, docs: List[Document]) -> FAISS:
+    def create_vectorstore(self, docs: List[Document], index_type: str = INDEX_TYPE) -> FAISS:
         """
         Create vector store from documents.
 
+        Chunks are embedded in concurrent batches. If some batches fail, the
+        vector store keeps every batch that succeeded before the error is
+        raised, and a later refresh() fills in the rest.
+
+        Vectors are first collected in an exact flat index, which is then
+        converted to an approximate index when index_type is not "flat".
+
         Args:
             docs: List of document chunks
+            index_type: FAISS index type, one of index_builder.INDEX_TYPES
 
         Returns:
             FAISS vector store instance
+
+        Raises:
+            ValueError: If there are no documents to index
+            BatchEmbeddingError: If some chunks could not be embedded
         """
+        if not docs:
+            raise ValueError("No documents to index")
+
         if self.embeddings is None:
             self.create_embeddings()
 
-        self.vectorstore = FAISS.from_documents(
-            documents=docs,
-            embedding=self.embeddings
-        )
+        ids = [doc.metadata.get("chunk_id") or compute_chunk_id(doc) for doc in docs]
+        self.vectorstore = None
+        self.chunk_manifest = {}
+        self.lexical_index = BM25Index()
+        self._add_chunks(docs, ids)
+
+        if index_type != "flat":
+            with metrics.span("build_ann_index", index_type=index_type):
+                convert_vectorstore(self.vectorstore, index_type)
         return self.vectorstore
+
+    def _add_chunks(self, docs: List[Document], ids: List[str]) -> None:
+        """Embed chunks in batches, add them to the vector store and manifest."""
+        if self.vectorstore is not None:
+            make_index_writable(self.vectorstore)
+        self._embed(lambda embedder: embedder.add_documents(self.vectorstore, docs, ids, self._record_batch))
+
+    def _embed(self, add: Callable[[BatchEmbedder], FAISS]) -> None:
+        """Run a BatchEmbedder call, keeping the partial vector store on failure."""
+        # A local model already uses every configured CPU thread per batch
+        max_in_flight = 1 if EMBEDDING_BACKEND == "local" else EMBEDDING_MAX_IN_FLIGHT
+        embedder = BatchEmbedder(self.embeddings, max_in_flight=max_in_flight)
+        try:
+            with metrics.span("embed_chunks"):
+                self.vectorstore = add(embedder)
+        except BatchEmbeddingError as e:
+            self.vectorstore = e.vectorstore
+            raise
+        finally:
+            self.ingest_stats = embedder.stats
+            metrics.incr("chunks_embedded", embedder.stats.get("chunks", 0))
+            metrics.incr("chunks_failed", embedder.stats.get("failed_chunks", 0))
+
+    def _record_batch(self, vectorstore: FAISS, docs: List[Document], ids: List[str]) -> None:
+        """Record an embedded batch in the manifest and the lexical index."""
+        self.vectorstore = vectorstore
+        for chunk_id, doc in zip(ids, docs):
+            self.chunk_manifest[chunk_id] = doc.metadata.get("source", "")
+        if self.lexical_index is not None:
+            with metrics.span("index_lexical"):
+                self.lexical_index.add(ids, [doc.page_content for doc in docs])
+
+    def build_vectorstore_streaming(
+        self,
+        pages: Iterable[Document],
+        index_type: str = INDEX_TYPE
+    ) -> Dict[str, str]:
+        """
+        Build the vector store from pages as they are loaded.
+
+        Pages flow through clean, split, embed and add without the corpus
+        being held in memory. Each page is cleaned and split as soon as it
+        arrives and dropped
+        once chunked, and its chunks are embedded in batches. Only
+        EMBEDDING_MAX_IN_FLIGHT batches are pulled ahead of the index, which
+        in turn holds back splitting and loading. The retriever is created
+        after the first batch, so partial results are searchable while the
+        rest of the corpus is still being ingested.
+
+        Args:
+            pages: Loaded documents, e.g. from stream_documents()
+            index_type: FAISS index type, one of index_builder.INDEX_TYPES
+
+        Returns:
+            Mapping of source URL to content hash of the ingested pages
+
+        Raises:
+            ValueError: If there are no documents to index
+            BatchEmbeddingError: If some chunks could not be embedded
+        """
+        if self.embeddings is None:
+            self.create_embeddings()
+
+        hasher = SourceHasher()
+        self.documents = []
+        self.vectorstore = None
+        self.chunk_manifest = {}
+        self.lexical_index = BM25Index()
+        self._lexical_index_path = None
+        self.cleaning_stats = {}
+        if self.boilerplate_stripper is not None:
+            self.boilerplate_stripper.reset()
+
+        def batches() -> Iterator[Tuple[List[Document], List[str]]]:
+            batch: List[Document] = []
+            for page in pages:
+                hasher.add(page)
+                batch.extend(self.split_documents(self.clean_documents([page])))
+                while len(batch) >= EMBEDDING_BATCH_SIZE:
+                    chunks, batch = batch[:EMBEDDING_BATCH_SIZE], batch[EMBEDDING_BATCH_SIZE:]
+                    yield chunks, [chunk.metadata["chunk_id"] for chunk in chunks]
+            if batch:
+                yield batch, [chunk.metadata["chunk_id"] for chunk in batch]
+
+        def on_batch(vectorstore: FAISS, docs: List[Document], ids: List[str]) -> None:
+            first_batch = self.vectorstore is None
+            self._record_batch(vectorstore, docs, ids)
+            if first_batch:
+                self.create_retriever()
+
+        self._embed(lambda embedder: embedder.add_stream(None, batches(), on_batch))
+        if self.vectorstore is None:
+            raise ValueError("No documents to index")
+
+        if index_type != "flat":
+            with metrics.span("build_ann_index", index_type=index_type):
+                convert_vectorstore(self.vectorstore, index_type)
+        return hasher.hexdigests()
+
+    def load_or_build_vectorstore(
+        self,
+        urls: List[str] = None,
+        verify_sources: bool = INDEX_CACHE_VERIFY_SOURCES
+    ) -> int:
+        """
+        Load the vector store from the index cache, building it if needed.
+
+        The cache key combines the source content hashes with the embedding
+        model and chunking settings, so the index is only rebuilt when one of
+        them changed. When verify_sources is False, the latest cached index
+        for the current configuration is used without scraping.
+
+        Otherwise the pages are hashed as they stream in and spooled to a
+        temporary file, so deciding between a hit and a miss never holds the
+        corpus in memory. On a miss the index is built from the spooled
+        pages, so the sources are scraped only once. When nothing is cached
+        for the configuration yet, the build starts right away and the pages
+        are hashed as they are ingested.
+
+        Args:
+            urls: List of URLs to load. If None, uses default URLs from config.
+            verify_sources: Re-scrape the sources to check that the cached
+                index is up to date
+
+        Returns:
+            Number of document chunks in the vector store
+        """
+        if urls is None:
+            urls = VICTORIA_ON_MOVE_URLS
+
+        if self.embeddings is None:
+            self.create_embeddings()
+
+        fingerprint = compute_config_fingerprint(urls, self.embedding_model)
+
+        latest_key = self.index_store.latest_key(fingerprint)
+        if latest_key is not None and not verify_sources:
+            self._load_cached_index(latest_key)
+            return len(self.vectorstore.index_to_docstore_id)
+
+        if latest_key is not None:
+            with PageSpool() as spool:
+                source_hashes = self._hash_sources(urls, spool)
+                key = compute_cache_key(fingerprint, source_hashes)
+                if self.index_store.exists(key):
+                    self._load_cached_index(key)
+                else:
+                    self.build_vectorstore_streaming(spool)
+                    self._store_built_index(key, source_hashes)
+        else:
+            source_hashes = self.build_vectorstore_streaming(self.stream_documents(urls))
+            key = compute_cache_key(fingerprint, source_hashes)
+            self._store_built_index(key, source_hashes)
+
+        self.index_store.set_latest(fingerprint, key)
+        self.index_version = key
+        return len(self.vectorstore.index_to_docstore_id)
+
+    def _hash_sources(self, urls: List[str], spool: PageSpool) -> Dict[str, str]:
+        """Hash the pages as they stream in, spooling them instead of keeping them."""
+        hasher = SourceHasher()
+        with metrics.span("hash_sources"):
+            for page in self.stream_documents(urls):
+                hasher.add(page)
+                spool.add(page)
+        return hasher.hexdigests()
+
+    def _load_cached_index(self, key: str) -> None:
+        """Load a cached index version and its chunk manifest."""
+        with metrics.span("load_index"):
+            self.vectorstore = self.index_store.load(key, self.embeddings)
+        # Search parameters are not part of the cache key, apply the current ones
+        apply_search_params(self.vectorstore.index)
+        self.chunk_manifest = self.index_store.read_manifest(key).get("chunks", {})
+        # Only hybrid retrieval reads the lexical index, see get_lexical_index()
+        self.lexical_index = None
+        self._lexical_index_path = self.index_store.lexical_index_path(key)
+        self.index_version = key
+
+    def get_lexical_index(self) -> BM25Index:
+        """
+        Return the BM25 index over the current chunks, loading it on first use.
+
+        Cached index versions do not load their lexical index until hybrid
+        retrieval needs it, so processes serving vector search alone do not
+        hold its postings in memory. Without an up-to-date stored copy, the
+        index is rebuilt from the vector store.
+
+        Returns:
+            BM25 index over the chunks of the vector store
+        """
+        if self.lexical_index is None:
+            if self._lexical_index_path is not None:
+                self.lexical_index = BM25Index.load(self._lexical_index_path)
+            else:
+                self.lexical_index = BM25Index.from_vectorstore(self.vectorstore)
+        return self.lexical_index
+
+    def _save_cached_index(self, key: str, source_hashes: Dict[str, str]) -> None:
+        """Save the current vector store and chunk manifest as an index version."""
+        self.index_store.save(self.vectorstore, key, {
+            "sources": source_hashes,
+            "chunk_count": len(self.chunk_manifest),
+            "chunks": self.chunk_manifest
+        }, lexical_index=self.lexical_index)
+
+    def _store_built_index(self, key: str, source_hashes: Dict[str, str]) -> None:
+        """
+        Save a freshly built index and serve it from the saved copy.
+
+        With the chunk store enabled, reopening the saved version replaces
+        the in-memory docstore with the memory-mapped chunk store, so the
+        building process does not keep its own copy of every chunk either.
+        """
+        self._save_cached_index(key, source_hashes)
+        if self.index_store.chunk_store:
+            self._load_cached_index(key)
+
+    def refresh(self, urls: List[str] = None) -> Dict[str, int]:
+        """
+        Incrementally re-index the sources.
+
+        Newly split chunks are diffed against the chunk manifest by their
+        content-addressed IDs. Only new chunks are embedded and added, and
+        chunks that disappeared are deleted from the live index in place.
+
+        Args:
+            urls: List of URLs to load. If None, uses default URLs from config.
+
+        Returns:
+            Dictionary with the number of added, removed and unchanged chunks
+
+        Raises:
+            Exception: If refreshing the index fails
+        """
+        if urls is None:
+            urls = VICTORIA_ON_MOVE_URLS
+
+        if self.vectorstore is None:
+            raise ValueError("Vector store must be created before refreshing")
+
+        try:
+            with metrics.span("refresh"):
+                documents = self.load_documents(urls)
+                if self.boilerplate_stripper is not None:
+                    # Blocks owned by pages that disappeared go to the next page containing them
+                    self.boilerplate_stripper.retain(doc.metadata.get("source", "") for doc in documents)
+                docs = self.split_documents(self.clean_documents(documents))
+
+                new_docs = {doc.metadata["chunk_id"]: doc for doc in docs}
+                added_ids = [chunk_id for chunk_id in new_docs if chunk_id not in self.chunk_manifest]
+                removed_ids = [chunk_id for chunk_id in self.chunk_manifest if chunk_id not in new_docs]
+
+                if (added_ids or removed_ids) and self.lexical_index is None:
+                    # The stored lexical index of the loaded version no longer matches
+                    self._lexical_index_path = None
+                if removed_ids:
+                    delete_from_vectorstore(self.vectorstore, removed_ids, INDEX_TYPE)
+                    if self.lexical_index is not None:
+                        self.lexical_index.remove(removed_ids)
+                    for chunk_id in removed_ids:
+                        del self.chunk_manifest[chunk_id]
+
+                if added_ids:
+                    self._add_chunks([new_docs[chunk_id] for chunk_id in added_ids], added_ids)
+
+                fingerprint = compute_config_fingerprint(urls, self.embedding_model)
+                source_hashes = compute_source_hashes(documents)
+                key = compute_cache_key(fingerprint, source_hashes)
+                documents.clear()
+                if added_ids or removed_ids or key != self.index_version:
+                    if INDEX_CACHE_ENABLED:
+                        self._save_cached_index(key, source_hashes)
+                        self.index_store.set_latest(fingerprint, key)
+                    self.index_version = key
+                    if self.answer_cache is not None:
+                        self.answer_cache.advance(key)
+
+                return {
+                    "added": len(added_ids),
+                    "removed": len(removed_ids),
+                    "unchanged": len(new_docs) - len(added_ids)
+                }
+        except Exception as e:
+            raise Exception(f"Failed to refresh index: {str(e)}")
+
+    def rebuild(self, urls: List[str] = None) -> bool:
+        """
+        Build a new index generation in the background and hot-swap it in.
+
+        The sources are re-scraped, hashed and spooled as they stream in,
+        then a new vector store, lexical index and retriever are built on a
+        separate service from the spooled pages, reusing a cached index when
+        one matches, while this service keeps serving the current
+        generation. The new generation is then swapped in atomically.
+        Queries already in flight finish on the generation they started
+        with, and answer cache entries of the old index version stop
+        matching. Unlike refresh(), the live index is never modified.
+
+        Args:
+            urls: List of URLs to load. If None, uses default URLs from config.
+
+        Returns:
+            True if a new generation was swapped in, False if the sources
+            were unchanged or another rebuild was already running
+
+        Raises:
+            Exception: If rebuilding the index fails
+        """
+        if urls is None:
+            urls = VICTORIA_ON_MOVE_URLS
+
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        try:
+            if self.embeddings is None:
+                self.create_embeddings()
+
+            with metrics.span("rebuild"):
+                builder = self._create_builder()
+                fingerprint = compute_config_fingerprint(urls, self.embedding_model)
+                with PageSpool() as spool:
+                    source_hashes = builder._hash_sources(urls, spool)
+                    key = compute_cache_key(fingerprint, source_hashes)
+                    if key == self.index_version:
+                        metrics.incr("index_rebuilds_unchanged")
+                        return False
+
+                    if INDEX_CACHE_ENABLED and self.index_store.exists(key):
+                        builder._load_cached_index(key)
+                    else:
+                        builder.build_vectorstore_streaming(spool)
+                        if INDEX_CACHE_ENABLED:
+                            builder._store_built_index(key, source_hashes)
+                if INDEX_CACHE_ENABLED:
+                    self.index_store.set_latest(fingerprint, key)
+                builder.index_version = key
+                builder.create_retriever()
+
+            self._swap_generation(builder)
+            metrics.incr("index_rebuilds")
+            return True
+        except Exception as e:
+            metrics.incr("index_rebuild_failures")
+            raise Exception(f"Failed to rebuild index: {str(e)}")
+        finally:
+            self._rebuild_lock.release()
+
+    def latest_cached_key(self, urls: List[str] = None) -> Optional[str]:
+        """
+        Return the latest index version stored for the current configuration.
+
+        Args:
+            urls: List of URLs the index is built from. If None, uses default URLs from config.
+
+        Returns:
+            Cache key, or None if nothing is cached yet
+        """
+        if urls is None:
+            urls = VICTORIA_ON_MOVE_URLS
+        return self.index_store.latest_key(compute_config_fingerprint(urls, self.embedding_model))
+
+    def load_latest(self, urls: List[str] = None) -> bool:
+        """
+        Hot-swap in the latest cached index version, e.g. one that another
+        worker process built.
+
+        The sources are not scraped. Like rebuild(), the new generation is
+        loaded on a separate service and swapped in atomically.
+
+        Args:
+            urls: List of URLs the index is built from. If None, uses default URLs from config.
+
+        Returns:
+            True if a new generation was swapped in, False if the serving
+            index is already the latest one or a rebuild is running
+
+        Raises:
+            Exception: If loading the index fails
+        """
+        key = self.latest_cached_key(urls)
+        if key is None or key == self.index_version:
+            return False
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        try:
+            if self.embeddings is None:
+                self.create_embeddings()
+            builder = self._create_builder()
+            builder._load_cached_index(key)
+            builder.create_retriever()
+            self._swap_generation(builder)
+            metrics.incr("index_loads_from_cache")
+            return True
+        except Exception as e:
+            raise Exception(f"Failed to load latest index: {str(e)}")
+        finally:
+            self._rebuild_lock.release()
+
+    def _create_builder(self) -> "RAGService":
+        """Create a service that builds a new generation with this service's models."""
+        builder = RAGService()
+        builder.embeddings = self.embeddings
+        builder.embedding_model = self.embedding_model
+        builder.llm = self.llm
+        builder.reranker = self.reranker
+        builder.index_store = self.index_store
+        return builder
+
+    def _swap_generation(self, builder: "RAGService") -> None:
+        """Atomically replace the serving index with the one built by builder."""
+        with self._generation_lock:
+            self.documents = builder.documents
+            self.vectorstore = builder.vectorstore
+            self.lexical_index = builder.lexical_index
+            self._lexical_index_path = builder._lexical_index_path
+            self.chunk_manifest = builder.chunk_manifest
+            self.retriever = builder.retriever
+            self.index_version = builder.index_version
+            self.ingest_stats = builder.ingest_stats
+            self.cleaning_stats = builder.cleaning_stats
+            self.boilerplate_stripper = builder.boilerplate_stripper
+            if self.answer_cache is not None:
+                self.answer_cache.advance(self.index_version)
+
+    def _current_generation(self) -> Tuple[BaseRetriever, Optional[str]]:
+        """Return the retriever and index version of the serving generation."""
+        with self._generation_lock:
+            return self.retriever, self.index_version
     
-    def create_retriever(self):
+    def create_retriever(self, k: int = RETRIEVAL_K):
         """
         Create retriever from vector store.
+
+        With RETRIEVAL_TYPE "hybrid", BM25 and vector results are fused with
+        reciprocal rank fusion. "hybrid" and "similarity" retrievers attach
+        the relevance score of vector hits to the documents. With RERANK_ENABLED, RERANK_FETCH_K candidates
+        are fetched and reranked down to k with a cross-encoder.
+
+        Args:
+            k: Number of documents to retrieve per question
         
         Returns:
             Retriever instance
         """
         if self.vectorstore is None:
             raise ValueError("Vector store must be created before retriever")
-            
-        self.retriever = self.vectorstore.as_retriever(
-            search_type=RETRIEVAL_TYPE,
-            search_kwargs={"k": RETRIEVAL_K}
-        )
+
+        fetch_k = max(k, RERANK_FETCH_K) if RERANK_ENABLED else k
+
+        if RETRIEVAL_TYPE == "hybrid":
+            self.retriever = HybridRetriever(
+                vectorstore=self.vectorstore,
+                lexical_index=self.get_lexical_index(),
+                k=fetch_k,
+                fetch_k=max(HYBRID_FETCH_K, fetch_k)
+            )
+        elif RETRIEVAL_TYPE == "similarity":
+            self.retriever = ScoredVectorRetriever(vectorstore=self.vectorstore, k=fetch_k)
+        else:
+            self.retriever = self.vectorstore.as_retriever(
+                search_type=RETRIEVAL_TYPE,
+                search_kwargs={"k": fetch_k}
+            )
+
+        if RERANK_ENABLED:
+            if self.reranker is None:
+                self.reranker = CrossEncoderReranker()
+            self.retriever = RerankingRetriever(base_retriever=self.retriever, reranker=self.reranker, k=k)
         return self.retriever
     
     def create_llm(self) -> GoogleGenerativeAI:
@@ -168,17 +843,33 @@ class RAGService:
             ("human", "{input}"),
         ])
         
-        question_answer_chain = create_stuff_documents_chain(self.llm, prompt)
-        self.rag_chain = create_retrieval_chain(self.retriever, question_answer_chain)
+        if CONTEXT_PACKING_ENABLED:
+            self.context_packer = ContextPacker()
+
+        self.question_answer_chain = create_stuff_documents_chain(self.llm, prompt)
+        self.rag_chain = create_retrieval_chain(
+            RunnableLambda(self._retrieve_context, afunc=self._aretrieve_context),
+            self.question_answer_chain
+        )
+
+        if ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(self.embeddings)
         
         return self.rag_chain
     
-    def initialize_complete_system(self, urls: List[str] = None) -> Tuple[any, int]:
+    def initialize_complete_system(
+        self,
+        urls: List[str] = None,
+        use_cache: bool = INDEX_CACHE_ENABLED,
+        verify_sources: bool = INDEX_CACHE_VERIFY_SOURCES
+    ) -> Tuple[any, int]:
         """
         Initialize the complete RAG system.
         
         Args:
             urls: List of URLs to load. If None, uses default URLs.
+            use_cache: Reuse a cached index when its cache key matches.
+            verify_sources: Re-scrape the sources before reusing a cached index.
             
         Returns:
             Tuple of (rag_chain, document_count)
@@ -190,26 +881,87 @@ class RAGService:
             # Validate environment
             self.validate_environment()
             
-            # Load and process documents
-            documents = self.load_documents(urls)
-            docs = self.split_documents(documents)
-            
-            # Create embeddings and vector store
+            # Create embeddings
             self.create_embeddings()
-            self.create_vectorstore(docs)
+
+            # Load the cached vector store or build it from the documents
+            if use_cache:
+                doc_count = self.load_or_build_vectorstore(urls, verify_sources)
+            else:
+                self.build_vectorstore_streaming(self.stream_documents(urls))
+                doc_count = len(self.chunk_manifest)
             
             # Create retriever and RAG chain
             self.create_retriever()
             rag_chain = self.create_rag_chain()
             
-            return rag_chain, len(docs)
+            return rag_chain, doc_count
             
         except Exception as e:
             raise Exception(f"Failed to initialize RAG system: {str(e)}")
     
+    def _pack_context(self, question: str, context: List[Document]) -> List[Document]:
+        """Deduplicate retrieved chunks and fit them into the context token budget."""
+        if self.context_packer is None:
+            return context
+        with metrics.span("pack_context"):
+            packed = self.context_packer.pack(question, context)
+        metrics.incr("context_tokens_retrieved", packed.tokens_in)
+        metrics.incr("context_tokens_packed", packed.tokens_out)
+        return packed.documents
+
+    def _retrieve_context(self, inputs: dict, retriever: Optional[BaseRetriever] = None) -> List[Document]:
+        """Retrieve and pack the context for a question, by default from the serving retriever."""
+        retriever = retriever or self.retriever
+        with metrics.span("retrieve"):
+            context = retriever.invoke(inputs["input"])
+        return self._pack_context(inputs["input"], context)
+
+    async def _aretrieve_context(self, inputs: dict, retriever: Optional[BaseRetriever] = None) -> List[Document]:
+        """Asynchronously retrieve and pack the context for a question."""
+        retriever = retriever or self.retriever
+        with metrics.span("retrieve", mode="async"):
+            context = await retriever.ainvoke(inputs["input"])
+        return self._pack_context(inputs["input"], context)
+
+    def _is_out_of_scope(self, context: List[Document]) -> bool:
+        """
+        Check whether retrieval found nothing relevant enough to answer from.
+
+        A question is out of scope when no retrieved chunk has a
+        "relevance_score" reaching the relevance threshold. Context from a
+        retriever that does not score its documents is never gated. Gated
+        questions are counted in the "queries_gated" metric.
+        """
+        if self.relevance_threshold is None:
+            return False
+        scores = [doc.metadata["relevance_score"] for doc in context if "relevance_score" in doc.metadata]
+        if context and not scores:
+            return False
+        if scores and max(scores) >= self.relevance_threshold:
+            return False
+        metrics.incr("queries_gated")
+        return True
+
+    def _get_cached_answer(self, question: str, index_version: Optional[str]) -> Optional[dict]:
+        """Look up a question in the answer cache and count the outcome."""
+        if self.answer_cache is None:
+            return None
+        cached = self.answer_cache.get(question, index_version)
+        metrics.incr("answer_cache_hits" if cached is not None else "answer_cache_misses")
+        return cached
+
     def query(self, question: str) -> dict:
         """
         Query the RAG system with a question.
+
+        Answers are served from the answer cache when the same or a very
+        similar question was answered against the current index version.
+        When the relevance gate is enabled and no retrieved chunk clears the
+        threshold, NO_ANSWER_RESPONSE is returned without calling the LLM.
+        Concurrent calls with the same normalized question share one
+        execution. At most LLM_MAX_CONCURRENCY answers are generated at a
+        time.
         
         Args:
             question: The question to ask
@@ -224,14 +976,192 @@ class RAGService:
             raise ValueError("RAG chain must be initialized before querying")
             
         try:
-            response = self.rag_chain.invoke({"input": question})
-            return response
+            with metrics.span("query"):
+                retriever, index_version = self._current_generation()
+                response = self._coalesce(
+                    ("query", normalize_question(question), index_version),
+                    lambda: self._answer(question, retriever, index_version)
+                )
+                return dict(response, input=question)
+        except Exception as e:
+            raise Exception(f"Error processing query: {str(e)}")
+
+    def _coalesce(self, key: tuple, func: Callable[[], any]) -> any:
+        """Run func, sharing the execution with concurrent calls for the same key."""
+        if self.single_flight is None:
+            return func()
+        return self.single_flight.do(key, func)
+
+    def _share(self, key: tuple, start: Callable[[], TokenStream]) -> TokenStream:
+        """Start a token stream, or join the one already running for the same key."""
+        if self.single_flight is None:
+            return start()
+        return self.single_flight.share(key, start)
+
+    async def _acoalesce(self, key: tuple, func: Callable[[], Awaitable[any]]) -> any:
+        """Await func(), sharing the execution with concurrent calls for the same key."""
+        if self.single_flight is None:
+            return await func()
+        return await self.single_flight.ado(key, func)
+
+    def _answer(self, question: str, retriever: BaseRetriever, index_version: Optional[str]) -> dict:
+        """Answer a question from the answer cache or the RAG chain."""
+        cached = self._get_cached_answer(question, index_version)
+        if cached is not None:
+            return cached
+
+        context = self._retrieve_context({"input": question}, retriever)
+        if self._is_out_of_scope(context):
+            return {"input": question, "context": [], "answer": NO_ANSWER_RESPONSE}
+        with self._llm_gate, metrics.span("generate"):
+            answer = self.question_answer_chain.invoke(
+                {"input": question, "context": context},
+                config={"callbacks": [metrics_callback]}
+            )
+        response = {"input": question, "context": context, "answer": answer}
+
+        if self.answer_cache is not None:
+            self.answer_cache.put(question, index_version, response)
+        return response
+
+    async def aquery(self, question: str) -> dict:
+        """
+        Asynchronously query the RAG system with a question.
+
+        Behaves like query(), but retrieval and generation run without
+        blocking the event loop. Concurrent calls on the same event loop
+        with the same normalized question share one execution. Generation
+        counts against the same process-wide LLM_MAX_CONCURRENCY limit as
+        query().
+
+        Args:
+            question: The question to ask
+
+        Returns:
+            Dictionary containing the response
+
+        Raises:
+            ValueError: If RAG chain is not initialized
+        """
+        if self.rag_chain is None:
+            raise ValueError("RAG chain must be initialized before querying")
+
+        try:
+            with metrics.span("query", mode="async"):
+                retriever, index_version = self._current_generation()
+                response = await self._acoalesce(
+                    ("query", normalize_question(question), index_version),
+                    lambda: self._aanswer(question, retriever, index_version)
+                )
+                return dict(response, input=question)
+        except Exception as e:
+            raise Exception(f"Error processing query: {str(e)}")
+
+    async def _aanswer(self, question: str, retriever: BaseRetriever, index_version: Optional[str]) -> dict:
+        """Asynchronously answer a question from the answer cache or the RAG chain."""
+        cached = await asyncio.to_thread(self._get_cached_answer, question, index_version)
+        if cached is not None:
+            return cached
+
+        context = await self._aretrieve_context({"input": question}, retriever)
+        if self._is_out_of_scope(context):
+            return {"input": question, "context": [], "answer": NO_ANSWER_RESPONSE}
+        async with self._llm_gate:
+            with metrics.span("generate"):
+                answer = await self.question_answer_chain.ainvoke(
+                    {"input": question, "context": context},
+                    config={"callbacks": [metrics_callback]}
+                )
+        response = {"input": question, "context": context, "answer": answer}
+
+        if self.answer_cache is not None:
+            await asyncio.to_thread(self.answer_cache.put, question, index_version, response)
+        return response
+
+    def stream_query(self, question: str) -> Iterator[dict]:
+        """
+        Query the RAG system and stream the answer as it is generated.
+
+        The first item carries the retrieved context, and every following
+        item carries the next piece of the answer. Questions stopped by the
+        relevance gate get an empty context and NO_ANSWER_RESPONSE.
+
+        The answer is generated in a worker thread, so a reader that stops
+        early, e.g. a disconnected client, does not hold an LLM slot; the
+        generation still completes and is stored in the answer cache.
+        Concurrent streams of the same normalized question share one
+        retrieval and one generation, each reader receiving every token.
+
+        Args:
+            question: The question to ask
+
+        Yields:
+            {"context": documents} once, then {"answer": text} per token chunk
+
+        Raises:
+            ValueError: If RAG chain is not initialized
+        """
+        if self.rag_chain is None:
+            raise ValueError("RAG chain must be initialized before querying")
+
+        try:
+            retriever, index_version = self._current_generation()
+            cached = self._get_cached_answer(question, index_version)
+            if cached is not None:
+                yield {"context": cached["context"]}
+                yield {"answer": cached["answer"]}
+                return
+
+            normalized = normalize_question(question)
+            with metrics.span("retrieve", mode="stream"):
+                context = list(self._coalesce(
+                    ("retrieve", normalized, index_version),
+                    lambda: retriever.invoke(question)
+                ))
+            context = self._pack_context(question, context)
+            if self._is_out_of_scope(context):
+                yield {"context": []}
+                yield {"answer": NO_ANSWER_RESPONSE}
+                return
+            yield {"context": context}
+
+            stream = self._share(
+                ("stream", normalized, index_version),
+                lambda: TokenStream(lambda: self._generate_stream(question, context, index_version))
+            )
+            for token in stream:
+                yield {"answer": token}
         except Exception as e:
             raise Exception(f"Error processing query: {str(e)}")
     
+    def _generate_stream(self, question: str, context: List[Document], index_version: Optional[str]) -> Iterator[str]:
+        """Stream answer tokens within the LLM limit, then store the answer in the answer cache."""
+        answer_parts = []
+        with self._llm_gate:
+            # Spans cannot stay open across yields, so generation is timed by hand
+            start = time.perf_counter()
+            for token in self.question_answer_chain.stream(
+                {"input": question, "context": context},
+                config={"callbacks": [metrics_callback]}
+            ):
+                if not answer_parts:
+                    metrics.observe("first_token", time.perf_counter() - start, mode="stream")
+                answer_parts.append(token)
+                yield token
+            metrics.observe("generate", time.perf_counter() - start, mode="stream")
+
+        if self.answer_cache is not None:
+            self.answer_cache.put(question, index_version, {
+                "input": question,
+                "context": context,
+                "answer": "".join(answer_parts)
+            })
+
     def get_relevant_documents(self, question: str) -> List[Document]:
         """
         Get relevant documents for a question without generating an answer.
+
+        Concurrent calls with the same normalized question share one search.
         
         Args:
             question: The question to search for
@@ -242,4 +1172,230 @@ class RAGService:
         if self.retriever is None:
             raise ValueError("Retriever must be initialized before searching")
             
-        return self.retriever.invoke(question)
+        retriever, index_version = self._current_generation()
+        with metrics.span("retrieve"):
+            return list(self._coalesce(
+                ("retrieve", normalize_question(question), index_version),
+                lambda: retriever.invoke(question)
+            ))
+
+    async def aget_relevant_documents(self, question: str) -> List[Document]:
+        """
+        Asynchronously get relevant documents for a question.
+
+        Concurrent calls on the same event loop with the same normalized
+        question share one search.
+
+        Args:
+            question: The question to search for
+
+        Returns:
+            List of relevant documents
+        """
+        if self.retriever is None:
+            raise ValueError("Retriever must be initialized before searching")
+
+        retriever, index_version = self._current_generation()
+        with metrics.span("retrieve", mode="async"):
+            return list(await self._acoalesce(
+                ("retrieve", normalize_question(question), index_version),
+                lambda: retriever.ainvoke(question)
+            ))
+
+    def batch_retrieve(self, questions: List[str]) -> List[dict]:
+        """
+        Get relevant documents for many questions at once.
+
+        Questions are embedded in batched calls and searched with a single
+        FAISS call over the stacked float32 query matrix, instead of one
+        embedding call and one search per question. Retrieval types without
+        a batched form, such as MMR, fall back to one search per question.
+
+        Args:
+            questions: Questions to search for
+
+        Returns:
+            One dictionary per question, in input order, with "input" and
+            "documents", and an "error" message if that question failed
+        """
+        if self.retriever is None:
+            raise ValueError("Retriever must be initialized before searching")
+
+        retriever, _ = self._current_generation()
+        with metrics.span("retrieve", mode="batch"):
+            return self._batch_retrieve(retriever, questions)
+
+    def _batch_retrieve(self, retriever: BaseRetriever, questions: List[str]) -> List[dict]:
+        results = [{"input": question, "documents": []} for question in questions]
+        reranking = retriever if isinstance(retriever, RerankingRetriever) else None
+        if reranking is not None:
+            retriever = reranking.base_retriever
+
+        try:
+            searches = self._batch_search(retriever, questions)
+        except Exception as e:
+            for result in results:
+                result["error"] = str(e)
+            return results
+
+        for result, documents in zip(results, searches):
+            try:
+                if isinstance(documents, Exception):
+                    raise documents
+                if reranking is not None:
+                    documents = reranking.reranker.rerank(result["input"], documents, reranking.k)
+                result["documents"] = documents
+            except Exception as e:
+                result["error"] = str(e)
+        return results
+
+    def _batch_search(
+        self,
+        retriever: BaseRetriever,
+        questions: List[str]
+    ) -> List[Union[List[Document], Exception]]:
+        """Search for many questions, with one matrix FAISS search where the retriever allows it."""
+        batched = isinstance(retriever, (HybridRetriever, ScoredVectorRetriever))
+        if not batched and not (isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity"):
+            searches = []
+            for question in questions:
+                try:
+                    searches.append(retriever.invoke(question))
+                except Exception as e:
+                    searches.append(e)
+            return searches
+
+        vectorstore = retriever.vectorstore
+        vectors = []
+        with metrics.span("embed_queries"):
+            for start in range(0, len(questions), EMBEDDING_BATCH_SIZE):
+                vectors.extend(embed_queries(vectorstore.embeddings, questions[start:start + EMBEDDING_BATCH_SIZE]))
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(questions), -1)
+
+        with metrics.span("vector_search", mode="batch"):
+            if batched:
+                return retriever.batch_search(questions, matrix)
+            k = retriever.search_kwargs.get("k", RETRIEVAL_K)
+            return [lookup_documents(vectorstore, ids, k) for ids in search_vectors(vectorstore, matrix, k)]
+
+    def batch_query(self, questions: List[str], max_concurrency: int = LLM_MAX_CONCURRENCY) -> List[dict]:
+        """
+        Answer many questions at once, e.g. to evaluate or precompute FAQ answers.
+
+        Retrieval runs through batch_retrieve(). Answers are then generated
+        by up to max_concurrency threads, still within the process-wide
+        LLM_MAX_CONCURRENCY limit. Answers are always generated fresh, and
+        are stored in the answer cache so later queries can be served from
+        it. Questions stopped by the relevance gate get NO_ANSWER_RESPONSE.
+
+        Args:
+            questions: Questions to ask
+            max_concurrency: Maximum number of answers generated at a time
+
+        Returns:
+            One response dictionary per question, in input order, like
+            query() returns. A failed question gets an "error" message and
+            a None answer instead.
+
+        Raises:
+            ValueError: If RAG chain is not initialized
+        """
+        if self.rag_chain is None:
+            raise ValueError("RAG chain must be initialized before querying")
+
+        retriever, index_version = self._current_generation()
+
+        def answer(item: dict) -> dict:
+            question = item["input"]
+            if "error" in item:
+                return {"input": question, "context": [], "answer": None, "error": item["error"]}
+            try:
+                context = self._pack_context(question, item["documents"])
+                if self._is_out_of_scope(context):
+                    return {"input": question, "context": [], "answer": NO_ANSWER_RESPONSE}
+                with self._llm_gate, metrics.span("generate", mode="batch"):
+                    answer = self.question_answer_chain.invoke(
+                        {"input": question, "context": context},
+                        config={"callbacks": [metrics_callback]}
+                    )
+                response = {"input": question, "context": context, "answer": answer}
+                if self.answer_cache is not None:
+                    self.answer_cache.put(question, index_version, response)
+                return response
+            except Exception as e:
+                return {"input": question, "context": [], "answer": None, "error": str(e)}
+
+        with metrics.span("query", mode="batch"):
+            with metrics.span("retrieve", mode="batch"):
+                retrieved = self._batch_retrieve(retriever, questions)
+            with ThreadPoolExecutor(max(1, max_concurrency)) as pool:
+                responses = list(pool.map(answer, retrieved))
+        metrics.incr("batch_query_errors", sum("error" in response for response in responses))
+        return responses
+
+    def evaluate_index_recall(
+        self,
+        questions: List[str],
+        k: int = RETRIEVAL_K,
+        index_type: str = INDEX_TYPE
+    ) -> Dict[str, float]:
+        """
+        Report how well an approximate index type matches exact search.
+
+        The flat baseline uses the float16 vectors of the chunk store when
+        it has them. Otherwise the indexed chunks are re-embedded (served by
+        the embedding cache), so the baseline uses exact vectors even when
+        the live index is quantized.
+
+        Args:
+            questions: Sample questions used as queries
+            k: Number of neighbours compared per question
+            index_type: Index type to evaluate
+
+        Returns:
+            Recall@k against the flat index, per-query latencies and index sizes
+        """
+        if self.vectorstore is None:
+            raise ValueError("Vector store must be created before evaluating it")
+
+        index_to_id = self.vectorstore.index_to_docstore_id
+        stored = getattr(self.vectorstore.docstore, "vectors", None)
+        if stored is not None and len(stored) == len(index_to_id):
+            vectors = np.asarray(stored, dtype=np.float32)
+        else:
+            texts = [self.vectorstore.docstore.search(index_to_id[i]).page_content for i in range(len(index_to_id))]
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        queries = np.asarray(embed_queries(self.embeddings, questions), dtype=np.float32)
+        return evaluate_recall(vectors, queries, k, index_type)
+
+
+_shared_service: Optional[RAGService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_shared_service(
+    urls: List[str] = None,
+    verify_sources: bool = INDEX_CACHE_VERIFY_SOURCES
+) -> RAGService:
+    """
+    Return the process-wide RAG service, initializing it on first use.
+
+    The shared instance is safe to query from many threads and event loops
+    at once, so concurrent chat sessions can all use the same index and
+    model clients.
+
+    Args:
+        urls: List of URLs to load on first use. If None, uses default URLs.
+        verify_sources: Re-scrape the sources on first use before reusing a
+            cached index
+
+    Returns:
+        Initialized RAGService instance
+    """
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            service = RAGService()
+            service.initialize_complete_system(urls, verify_sources=verify_sources)
+            _shared_service = service
+    return _shared_service
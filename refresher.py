@@ -0,0 +1,236 @@
+"""
+Index refresher module for Victoria on Move application.
+Rebuilds the index off the request path on a schedule or on demand and
+hot-swaps it into the running service. With several worker processes, one
+elected leader rebuilds and the others load the new version from the index
+cache.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, IO, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from config import INDEX_REFRESH_INTERVAL, INDEX_FOLLOW_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    Inter-process lock electing the one worker process that rebuilds the index.
+
+    The lock is an exclusive flock on a file next to the index cache, held
+    until it is released or the process exits, so another worker takes over
+    when the leader dies. Followers leave rebuild requests in a second file
+    for the leader to pick up. Where flock is not available, every process
+    is its own leader.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock.
+
+        Args:
+            path: Path of the lock file
+        """
+        self.path = path
+        self.request_path = path + ".requested"
+        self._file: Optional[IO] = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        """Whether this process is the leader."""
+        return fcntl is None or self._file is not None
+
+    def acquire(self) -> bool:
+        """
+        Try to become the leader, without blocking.
+
+        Returns:
+            True if this process holds the lock
+        """
+        with self._lock:
+            if self.held:
+                return True
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = open(self.path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._file = lock_file
+            return True
+
+    def release(self) -> None:
+        """Give up leadership."""
+        with self._lock:
+            if self._file is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+                self._file.close()
+                self._file = None
+
+    def request_rebuild(self) -> None:
+        """Ask the leader to rebuild the index."""
+        os.makedirs(os.path.dirname(self.request_path) or ".", exist_ok=True)
+        with open(self.request_path, "w"):
+            pass
+
+    def take_rebuild_request(self) -> bool:
+        """
+        Consume a pending rebuild request.
+
+        Returns:
+            True if a follower requested a rebuild
+        """
+        try:
+            os.remove(self.request_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+
+class IndexRefresher:
+    """
+    Background thread that periodically rebuilds a service's index.
+
+    Each rebuild runs RAGService.rebuild(), which builds the new generation
+    on the side and swaps it in atomically, so queries keep being served
+    from the current index for the whole rebuild.
+
+    With a LeaderLock, only the process holding the lock rebuilds. The
+    others check every poll_interval seconds for a newer index version in
+    the index cache and load it with RAGService.load_latest(), and take
+    over when the leader goes away.
+    """
+
+    def __init__(
+        self,
+        service,
+        interval: float = INDEX_REFRESH_INTERVAL,
+        urls: Optional[List[str]] = None,
+        lock: Optional[LeaderLock] = None,
+        poll_interval: float = INDEX_FOLLOW_INTERVAL
+    ):
+        """
+        Initialize the refresher.
+
+        Args:
+            service: RAGService to rebuild
+            interval: Seconds between scheduled rebuilds. If 0, rebuilds
+                only run when triggered.
+            urls: List of URLs to load. If None, uses default URLs from config.
+            lock: Lock shared by the worker processes. If None, this
+                process always rebuilds.
+            poll_interval: Seconds between checks for a new leader, rebuild
+                requests and index versions, when a lock is used
+        """
+        self.service = service
+        self.interval = interval
+        self.urls = urls
+        self.lock = lock
+        self.poll_interval = poll_interval
+        self.stats: Dict[str, int] = {"rebuilds": 0, "unchanged": 0, "failures": 0, "follows": 0}
+        self.last_error: Optional[str] = None
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "IndexRefresher":
+        """Start the background thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="index-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def trigger(self) -> None:
+        """Request a rebuild as soon as the current one, if any, finishes."""
+        if self.lock is not None and not self.lock.held:
+            self.lock.request_rebuild()
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background thread.
+
+        A rebuild in progress is not interrupted; its result is still
+        swapped in.
+
+        Args:
+            timeout: Seconds to wait for the thread to exit
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> bool:
+        """
+        Rebuild the index now, in the calling thread.
+
+        Returns:
+            True if a new index generation was swapped in
+        """
+        try:
+            swapped = self.service.rebuild(self.urls)
+        except Exception as e:
+            logger.warning("Index rebuild failed: %s", e)
+            self.stats["failures"] += 1
+            self.last_error = str(e)
+            return False
+        self.stats["rebuilds" if swapped else "unchanged"] += 1
+        self.last_error = None
+        return swapped
+
+    def follow_once(self) -> bool:
+        """
+        Load the index version the leader stored last, in the calling thread.
+
+        Returns:
+            True if a new index generation was swapped in
+        """
+        try:
+            swapped = self.service.load_latest(self.urls)
+        except Exception as e:
+            logger.warning("Loading the latest index failed: %s", e)
+            self.stats["failures"] += 1
+            self.last_error = str(e)
+            return False
+        if swapped:
+            self.stats["follows"] += 1
+        self.last_error = None
+        return swapped
+
+    def _run(self) -> None:
+        last_rebuild = time.monotonic()
+        while not self._stopped.is_set():
+            if self.lock is not None:
+                timeout = self.poll_interval
+            else:
+                timeout = self.interval if self.interval > 0 else None
+            triggered = self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+
+            if self.lock is not None:
+                if not self.lock.acquire():
+                    self.follow_once()
+                    continue
+                # Polling wake-ups only rebuild when requested or on schedule
+                triggered = self.lock.take_rebuild_request() or triggered
+                due = self.interval > 0 and time.monotonic() - last_rebuild >= self.interval
+                if not (triggered or due):
+                    continue
+            self.run_once()
+            last_rebuild = time.monotonic()
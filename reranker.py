@@ -0,0 +1,170 @@
+"""
+Reranker module for Victoria on Move application.
+Re-scores over-fetched retrieval candidates with a local cross-encoder and
+keeps the best few, so fewer and more relevant chunks reach the LLM.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from config import (
+    RETRIEVAL_K,
+    RERANK_MODEL,
+    RERANK_BATCH_SIZE,
+    RERANK_CACHE_SIZE
+)
+from index_store import hash_text
+from metrics import metrics
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def get_cross_encoder(model_name: str = RERANK_MODEL) -> Any:
+    """
+    Return the cross-encoder for a model, loading it once per process.
+
+    Args:
+        model_name: sentence-transformers cross-encoder model name
+
+    Returns:
+        sentence_transformers.CrossEncoder instance
+    """
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(model_name, device="cpu")
+            _models[model_name] = model
+        return model
+
+
+class CrossEncoderReranker:
+    """
+    Scores (question, chunk) pairs with a cross-encoder.
+
+    Uncached pairs are scored in one batched pass, and scores are kept in an
+    LRU cache so repeated questions do not re-run the model.
+    """
+
+    def __init__(
+        self,
+        model: Optional[Any] = None,
+        model_name: str = RERANK_MODEL,
+        batch_size: int = RERANK_BATCH_SIZE,
+        cache_size: int = RERANK_CACHE_SIZE
+    ):
+        """
+        Initialize the reranker.
+
+        Args:
+            model: Object with a predict(pairs, batch_size=...) method. If
+                None, the shared cross-encoder for model_name is loaded on
+                first use.
+            model_name: sentence-transformers cross-encoder model name
+            batch_size: Pairs scored per model forward pass
+            cache_size: Maximum number of cached pair scores
+        """
+        self.model = model
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def score(self, question: str, documents: List[Document]) -> List[float]:
+        """
+        Score how well each document answers a question.
+
+        Args:
+            question: The question
+            documents: Candidate documents
+
+        Returns:
+            One relevance score per document, higher is better
+        """
+        keys = [
+            (question, doc.metadata.get("chunk_id") or hash_text(doc.page_content))
+            for doc in documents
+        ]
+        scores: Dict[Tuple[str, str], float] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[key] = self._cache[key]
+
+        missing = [(key, doc) for key, doc in zip(keys, documents) if key not in scores]
+        unique_missing = list(dict(missing).items())
+        metrics.incr("rerank_cache_hits", len(keys) - len(missing))
+        metrics.incr("rerank_cache_misses", len(missing))
+
+        if unique_missing:
+            model = self.model if self.model is not None else get_cross_encoder(self.model_name)
+            pairs = [(question, doc.page_content) for _, doc in unique_missing]
+            predicted = model.predict(pairs, batch_size=self.batch_size)
+            with self._lock:
+                for (key, _), value in zip(unique_missing, predicted):
+                    scores[key] = float(value)
+                    self._cache[key] = float(value)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        with self._lock:
+            self.stats["hits"] += len(keys) - len(missing)
+            self.stats["misses"] += len(missing)
+        return [scores[key] for key in keys]
+
+    def rerank(self, question: str, documents: List[Document], k: int) -> List[Document]:
+        """
+        Keep the k documents that best answer a question.
+
+        Args:
+            question: The question
+            documents: Candidate documents
+            k: Number of documents to keep
+
+        Returns:
+            Copies of the best documents, best first, with a "rerank_score"
+            metadata entry
+        """
+        if not documents:
+            return []
+        with metrics.span("rerank"):
+            scores = self.score(question, documents)
+        ranked = sorted(zip(scores, range(len(documents))), key=lambda item: item[0], reverse=True)[:k]
+        return [
+            Document(page_content=documents[i].page_content, metadata=dict(documents[i].metadata, rerank_score=score))
+            for score, i in ranked
+        ]
+
+
+class RerankingRetriever(BaseRetriever):
+    """Retriever that over-fetches candidates and reranks them with a cross-encoder."""
+
+    base_retriever: BaseRetriever
+    reranker: CrossEncoderReranker
+    k: int = RETRIEVAL_K
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: Optional[CallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        candidates = self.base_retriever.invoke(
+            query,
+            config={"callbacks": run_manager.get_child() if run_manager else None}
+        )
+        return self.reranker.rerank(query, candidates, self.k)
@@ -0,0 +1,368 @@
+"""
+Retrievers module for Victoria on Move application.
+Provides an in-process BM25 lexical index and a hybrid retriever that fuses
+lexical and vector search results with reciprocal rank fusion. Chunks found
+by vector search carry a "relevance_score" metadata entry.
+"""
+
+import heapq
+import json
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from config import RETRIEVAL_K, HYBRID_FETCH_K, RRF_K, BM25_K1, BM25_B
+from metrics import metrics
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from have how i in is it of on or our "
+    "so that the this to we what when where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for lexical matching.
+
+    Digits are kept as terms so phone numbers, postcodes and truck sizes
+    match exactly.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms, without stopwords
+    """
+    terms = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.isdigit():
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class BM25Index:
+    """
+    Inverted index scoring chunks with Okapi BM25.
+
+    Chunks are keyed by the same IDs as the vector store, so results can be
+    looked up in its docstore and kept in sync when chunks are added or
+    removed.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._terms: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        """
+        Add chunks to the index, replacing chunks with the same ID.
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+        """
+        with self._lock:
+            self.remove([chunk_id for chunk_id in ids if chunk_id in self._terms])
+            for chunk_id, text in zip(ids, texts):
+                self._add_terms(chunk_id, dict(Counter(tokenize(text))))
+
+    def _add_terms(self, chunk_id: str, terms: Dict[str, int]) -> None:
+        self._terms[chunk_id] = terms
+        self._lengths[chunk_id] = sum(terms.values())
+        self._total_length += self._lengths[chunk_id]
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+
+    def remove(self, ids: List[str]) -> None:
+        """
+        Remove chunks from the index. Unknown IDs are ignored.
+
+        Args:
+            ids: Chunk IDs
+        """
+        with self._lock:
+            for chunk_id in ids:
+                terms = self._terms.pop(chunk_id, None)
+                if terms is None:
+                    continue
+                self._total_length -= self._lengths.pop(chunk_id)
+                for term in terms:
+                    postings = self._postings[term]
+                    del postings[chunk_id]
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Find the chunks that best match a query.
+
+        Args:
+            query: Query text
+            k: Maximum number of results
+
+        Returns:
+            List of (chunk ID, BM25 score) pairs, best first
+        """
+        with self._lock:
+            count = len(self._terms)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a JSON file.
+
+        Args:
+            path: File to write
+        """
+        with self._lock:
+            payload = {"k1": self.k1, "b": self.b, "chunks": self._terms}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """
+        Read an index written by save().
+
+        Args:
+            path: File to read
+
+        Returns:
+            BM25Index instance
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls(k1=payload["k1"], b=payload["b"])
+        for chunk_id, terms in payload["chunks"].items():
+            index._add_terms(chunk_id, terms)
+        return index
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: FAISS) -> "BM25Index":
+        """
+        Build an index over every chunk in a vector store.
+
+        Args:
+            vectorstore: Vector store whose docstore holds the chunks
+
+        Returns:
+            BM25Index instance
+        """
+        ids = list(vectorstore.index_to_docstore_id.values())
+        index = cls()
+        index.add(ids, [vectorstore.docstore.search(chunk_id).page_content for chunk_id in ids])
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Merge ranked result lists with reciprocal rank fusion.
+
+    Args:
+        rankings: Lists of IDs, each ordered best first
+        k: Rank offset that dampens the weight of top positions
+
+    Returns:
+        List of (ID, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def search_vectors_with_scores(vectorstore: FAISS, vectors: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+    """
+    Search a vector store for many query vectors in one FAISS call.
+
+    Args:
+        vectorstore: FAISS vector store
+        vectors: Float32 query matrix, one row per query
+        k: Number of neighbours per query
+
+    Returns:
+        (docstore ID, relevance score) pairs of the nearest chunks, best
+        first, one list per query. Scores are on the same scale as
+        FAISS.similarity_search_with_relevance_scores, higher is better.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    distances, indices = vectorstore.index.search(vectors, k)
+    relevance = vectorstore._select_relevance_score_fn()
+    return [
+        [(vectorstore.index_to_docstore_id[i], float(relevance(d))) for d, i in zip(row_distances, row) if i != -1]
+        for row_distances, row in zip(distances, indices)
+    ]
+
+
+def search_vectors(vectorstore: FAISS, vectors: np.ndarray, k: int) -> List[List[str]]:
+    """Like search_vectors_with_scores(), returning only the docstore IDs."""
+    return [[chunk_id for chunk_id, _ in row] for row in search_vectors_with_scores(vectorstore, vectors, k)]
+
+
+def lookup_documents(
+    vectorstore: FAISS,
+    ids: List[str],
+    k: int,
+    scores: Optional[Dict[str, float]] = None
+) -> List[Document]:
+    """
+    Fetch up to k documents from a vector store's docstore, skipping missing IDs.
+
+    Args:
+        vectorstore: FAISS vector store
+        ids: Docstore IDs, best first
+        k: Maximum number of documents
+        scores: Relevance scores by ID. Documents with a score are returned
+            as copies with a "relevance_score" metadata entry.
+
+    Returns:
+        Found documents, in ID order
+    """
+    documents = []
+    for chunk_id in ids:
+        doc = vectorstore.docstore.search(chunk_id)
+        if isinstance(doc, Document):
+            if scores is not None and chunk_id in scores:
+                doc = Document(
+                    page_content=doc.page_content,
+                    metadata=dict(doc.metadata, relevance_score=scores[chunk_id])
+                )
+            documents.append(doc)
+        if len(documents) == k:
+            break
+    return documents
+
+
+class ScoredVectorRetriever(BaseRetriever):
+    """
+    Similarity search retriever that keeps the relevance score of each chunk.
+
+    Equivalent to vectorstore.as_retriever(search_type="similarity"), but
+    every document carries its "relevance_score", so callers can tell a
+    weak best match from a strong one.
+    """
+
+    vectorstore: FAISS
+    k: int = RETRIEVAL_K
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: Optional[CallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        with metrics.span("embed"):
+            vector = np.array([self.vectorstore.embeddings.embed_query(query)], dtype=np.float32)
+        with metrics.span("search"):
+            return self.batch_search([query], vector)[0]
+
+    def batch_search(self, queries: List[str], vectors: np.ndarray) -> List[List[Document]]:
+        """
+        Retrieve documents for many queries whose vectors are already embedded.
+
+        Args:
+            queries: Query texts
+            vectors: Float32 query matrix, one row per query
+
+        Returns:
+            Retrieved documents, one list per query
+        """
+        return [
+            lookup_documents(self.vectorstore, [chunk_id for chunk_id, _ in hits], self.k, dict(hits))
+            for hits in search_vectors_with_scores(self.vectorstore, vectors, self.k)
+        ]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever combining BM25 and vector search with reciprocal rank fusion.
+
+    Lexical matching catches exact tokens such as phone numbers and suburb
+    names that embeddings tend to blur, while vector search handles
+    paraphrases. Documents are ordered by fused rank; those that were also
+    vector hits carry their vector "relevance_score".
+    """
+
+    vectorstore: FAISS
+    lexical_index: BM25Index
+    k: int = RETRIEVAL_K
+    fetch_k: int = HYBRID_FETCH_K
+    rrf_k: int = RRF_K
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: Optional[CallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        with metrics.span("embed"):
+            vector = np.array([self.vectorstore.embeddings.embed_query(query)], dtype=np.float32)
+        with metrics.span("search"):
+            return self.batch_search([query], vector)[0]
+
+    def batch_search(self, queries: List[str], vectors: np.ndarray) -> List[List[Document]]:
+        """
+        Retrieve documents for many queries whose vectors are already embedded.
+
+        The vector side runs as a single FAISS search over the query matrix.
+
+        Args:
+            queries: Query texts, used for BM25
+            vectors: Float32 query matrix, one row per query
+
+        Returns:
+            Retrieved documents, one list per query
+        """
+        results = []
+        for query, vector_hits in zip(queries, search_vectors_with_scores(self.vectorstore, vectors, self.fetch_k)):
+            vector_ids = [chunk_id for chunk_id, _ in vector_hits]
+            lexical_ids = [chunk_id for chunk_id, _ in self.lexical_index.search(query, self.fetch_k)]
+            fused = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([vector_ids, lexical_ids], self.rrf_k)]
+            results.append(lookup_documents(self.vectorstore, fused, self.k, dict(vector_hits)))
+        return results
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+HTTP query server for the Victoria on Move RAG service.
+Exposes query, retrieval and streaming endpoints over ASGI, without Streamlit.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Iterator, List, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from langchain_core.documents import Document
+from pydantic import BaseModel
+
+from metrics import PrometheusExporter, get_exporter
+from rag_service import RAGService, get_shared_service
+from refresher import IndexRefresher, LeaderLock
+from config import (
+    INDEX_FOLLOW_INTERVAL,
+    REFRESH_LOCK_PATH,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_WARMUP_QUESTIONS
+)
+
+
+class QuestionRequest(BaseModel):
+    """Request body carrying a single question."""
+
+    question: str
+
+
+def serialize_documents(documents: List[Document]) -> List[dict]:
+    """Convert documents to JSON-serializable dictionaries."""
+    return [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+
+
+def warm_up(service: RAGService, questions: List[str] = SERVER_WARMUP_QUESTIONS) -> None:
+    """
+    Run retrievals so the first real request does not pay for cold clients.
+
+    Args:
+        service: Initialized RAG service
+        questions: Questions to retrieve documents for
+    """
+    for question in questions:
+        service.get_relevant_documents(question)
+
+
+def start_service(lock: LeaderLock, poll_interval: float = INDEX_FOLLOW_INTERVAL) -> RAGService:
+    """
+    Initialize the process-wide shared service in one of several workers.
+
+    Only the leader scrapes the sources to verify or build the index. The
+    other workers wait for an index in the index cache and load it as is,
+    taking over as leader if the current one goes away first.
+
+    Args:
+        lock: Lock electing the leader among the worker processes
+        poll_interval: Seconds between checks for a cached index
+
+    Returns:
+        Initialized RAGService instance
+    """
+    while not lock.acquire():
+        if RAGService().latest_cached_key() is not None:
+            return get_shared_service(verify_sources=False)
+        time.sleep(poll_interval)
+    return get_shared_service()
+
+
+def check_refresh_token(authorization: Optional[str]) -> None:
+    """
+    Only let callers presenting the REFRESH_TOKEN trigger rebuilds.
+
+    Args:
+        authorization: Authorization header of the request
+
+    Raises:
+        HTTPException: 403 if no REFRESH_TOKEN is configured, 401 if the
+            header does not carry it as a bearer token
+    """
+    token = os.getenv("REFRESH_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail="Set REFRESH_TOKEN to enable POST /refresh")
+    expected = f"Bearer {token}".encode("utf-8")
+    if not hmac.compare_digest((authorization or "").encode("utf-8"), expected):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+
+def create_app(service: Optional[RAGService] = None) -> FastAPI:
+    """
+    Create the ASGI application.
+
+    Args:
+        service: RAG service to serve. If None, the process-wide shared
+            service is initialized at startup, loading the index from the
+            index cache when it is up to date.
+
+    The index is rebuilt in the background every INDEX_REFRESH_INTERVAL
+    seconds, or when POST /refresh is called with the REFRESH_TOKEN, and
+    hot-swapped in without interrupting queries. When the app initializes
+    the shared service itself, its worker processes elect one leader
+    through REFRESH_LOCK_PATH to scrape and rebuild; the others load each
+    new index version from the index cache.
+
+    Returns:
+        FastAPI application
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        rag_service = service
+        lock = None
+        if rag_service is None:
+            load_dotenv()
+            lock = LeaderLock(REFRESH_LOCK_PATH)
+            rag_service = await asyncio.to_thread(start_service, lock)
+        await asyncio.to_thread(warm_up, rag_service)
+        app.state.rag_service = rag_service
+        app.state.refresher = IndexRefresher(rag_service, lock=lock).start()
+        yield
+        app.state.refresher.stop(timeout=1.0)
+        if lock is not None:
+            lock.release()
+
+    app = FastAPI(title="Victoria on Move RAG API", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health() -> dict:
+        rag_service: RAGService = app.state.rag_service
+        return {"status": "ok", "index_version": rag_service.index_version}
+
+    @app.get("/metrics")
+    async def prometheus_metrics() -> PlainTextResponse:
+        exporter = get_exporter(PrometheusExporter)
+        if exporter is None:
+            raise HTTPException(status_code=404, detail="Prometheus exporter is not enabled")
+        return PlainTextResponse(exporter.render(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/refresh", status_code=202)
+    async def refresh(authorization: Optional[str] = Header(None)) -> dict:
+        check_refresh_token(authorization)
+        refresher: IndexRefresher = app.state.refresher
+        refresher.trigger()
+        return {"status": "scheduled", "index_version": app.state.rag_service.index_version}
+
+    @app.post("/query")
+    async def query(request: QuestionRequest) -> dict:
+        rag_service: RAGService = app.state.rag_service
+        try:
+            response = await rag_service.aquery(request.question)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return {
+            "question": request.question,
+            "answer": response["answer"],
+            "context": serialize_documents(response["context"])
+        }
+
+    @app.post("/retrieve")
+    async def retrieve(request: QuestionRequest) -> dict:
+        rag_service: RAGService = app.state.rag_service
+        try:
+            documents = await rag_service.aget_relevant_documents(request.question)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return {"question": request.question, "documents": serialize_documents(documents)}
+
+    @app.post("/query/stream")
+    def query_stream(request: QuestionRequest) -> StreamingResponse:
+        rag_service: RAGService = app.state.rag_service
+
+        def events() -> Iterator[str]:
+            # One JSON object per line: the context first, then answer tokens
+            try:
+                for part in rag_service.stream_query(request.question):
+                    if "context" in part:
+                        part = {"context": serialize_documents(part["context"])}
+                    yield json.dumps(part) + "\n"
+            except Exception as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    uvicorn.run("server:app", host=SERVER_HOST, port=SERVER_PORT, workers=SERVER_WORKERS)
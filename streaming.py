@@ -0,0 +1,87 @@
+"""
+Streaming module for Victoria on Move application.
+Generates a streamed answer in a worker thread, so the generation finishes
+and releases its resources even if the reader stops early, and lets any
+number of readers follow the same tokens.
+"""
+
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+class TokenStream:
+    """
+    Token generation running in a background thread.
+
+    Tokens are buffered as they are produced. Every reader iterating over
+    the stream gets all tokens from the first one, whenever it started
+    reading, and then follows the generation live. Readers that stop early
+    do not affect the generation or other readers.
+    """
+
+    def __init__(self, generate: Callable[[], Iterable[str]]):
+        """
+        Start generating.
+
+        Args:
+            generate: Function returning the token iterable, consumed in
+                the worker thread
+        """
+        self.tokens: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, args=(generate,), daemon=True)
+        self._thread.start()
+
+    def _run(self, generate: Callable[[], Iterable[str]]) -> None:
+        try:
+            for token in generate():
+                with self._condition:
+                    self.tokens.append(token)
+                    self._condition.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            with self._condition:
+                self.done = True
+                callbacks, self._callbacks = self._callbacks, []
+                self._condition.notify_all()
+            for callback in callbacks:
+                callback()
+
+    def add_done_callback(self, callback: Callable[[], None]) -> None:
+        """Call callback once generation finished, immediately if it already has."""
+        with self._condition:
+            if not self.done:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Yield the tokens from the first one until generation finishes.
+
+        Raises:
+            Exception: Whatever the generation raised, after the tokens
+                produced before the error
+        """
+        position = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: position < len(self.tokens) or self.done)
+                new_tokens = self.tokens[position:]
+                finished = self.done
+            for token in new_tokens:
+                yield token
+            position += len(new_tokens)
+            if finished and position == len(self.tokens):
+                break
+        if self.error is not None:
+            raise self.error
+
+    def join(self, timeout: Optional[float] = None) -> str:
+        """Wait for generation to finish and return the full text."""
+        self._thread.join(timeout)
+        return "".join(self.tokens)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic answer cache.
+"""
+
+from langchain_core.embeddings import Embeddings
+
+from answer_cache import SemanticAnswerCache
+
+
+class KeywordEmbeddings(Embeddings):
+    """Fake embeddings with one dimension per keyword, so paraphrases are close."""
+
+    keywords = ["truck", "price", "contact", "insurance"]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        text = text.lower()
+        return [1.0 if keyword in text else 0.0 for keyword in self.keywords] + [0.01]
+
+
+def test_exact_and_semantic_hits():
+    cache = SemanticAnswerCache(KeywordEmbeddings(), similarity_threshold=0.95)
+    cache.put("What truck sizes are available?", "v1", {"answer": "Small and large."})
+
+    assert cache.get("  what TRUCK sizes are available ", "v1")["answer"] == "Small and large."
+    assert cache.get("Which trucks do you have?", "v1")["answer"] == "Small and large."
+    assert cache.get("What are your contact details?", "v1") is None
+    assert cache.stats == {"exact_hits": 1, "semantic_hits": 1, "misses": 1}
+
+
+def test_advancing_the_index_version_invalidates():
+    cache = SemanticAnswerCache(KeywordEmbeddings())
+    cache.put("Do you have insurance?", "v1", {"answer": "Yes."})
+
+    # Another version neither hits nor clears the current one
+    assert cache.get("Do you have insurance?", "v2") is None
+    assert cache.get("Do you have insurance?", "v1")["answer"] == "Yes."
+
+    cache.advance("v2")
+    assert cache.get("Do you have insurance?", "v2") is None
+    assert cache.get("Do you have insurance?", "v1") is None
+
+
+def test_late_writes_from_a_stale_version_are_dropped():
+    cache = SemanticAnswerCache(KeywordEmbeddings())
+    cache.put("Do you have insurance?", "v1", {"answer": "Old."})
+    cache.advance("v2")
+    cache.put("What truck sizes are available?", "v2", {"answer": "New."})
+
+    # A request that started before the swap finishes late
+    cache.put("Do you have insurance?", "v1", {"answer": "Old."})
+
+    assert cache.get("What truck sizes are available?", "v2")["answer"] == "New."
+    assert cache.get("Do you have insurance?", "v2") is None
+
+
+def test_ttl_and_lru_eviction():
+    cache = SemanticAnswerCache(KeywordEmbeddings(), max_entries=2)
+    cache.put("truck", "v1", {"answer": "1"})
+    cache.put("price", "v1", {"answer": "2"})
+    cache.get("truck", "v1")
+    cache.put("contact", "v1", {"answer": "3"})
+
+    assert cache.get("price", "v1") is None
+    assert cache.get("truck", "v1")["answer"] == "1"
+
+    cache.ttl_seconds = 0
+    assert cache.get("truck", "v1") is None
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the async query API and the process-wide shared service.
+"""
+
+import asyncio
+import threading
+
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+
+import rag_service
+from benchmark import HashingEmbeddings
+from rag_service import RAGService, get_shared_service
+
+PAGES = [
+    Document(page_content="We move pianos and pool tables across Melbourne.", metadata={"source": "services"}),
+    Document(page_content="Call us on 0400 000 000 for a quote.", metadata={"source": "contact"}),
+]
+
+
+def build_service():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.llm = FakeListLLM(responses=["We can help."])
+    service.create_vectorstore(service.split_documents(PAGES))
+    service.create_retriever(k=1)
+    service.create_rag_chain()
+    service.answer_cache = None
+    return service
+
+
+def test_async_api_matches_the_sync_api():
+    service = build_service()
+
+    async def ask():
+        return await asyncio.gather(
+            service.aquery("Do you move pianos?"),
+            service.aget_relevant_documents("What is your phone number 0400?")
+        )
+
+    response, documents = asyncio.run(ask())
+
+    expected = service.query("Do you move pianos?")
+    assert response["input"] == "Do you move pianos?"
+    assert response["answer"] == expected["answer"] == "We can help."
+    assert [doc.page_content for doc in response["context"]] == [doc.page_content for doc in expected["context"]]
+    assert documents == service.get_relevant_documents("What is your phone number 0400?")
+    assert documents[0].metadata["source"] == "contact"
+
+
+def test_concurrent_async_queries_are_answered_independently():
+    service = build_service()
+    questions = [f"Do you move pianos to suburb {i}?" for i in range(5)]
+
+    async def ask():
+        return await asyncio.gather(*(service.aquery(question) for question in questions))
+
+    responses = asyncio.run(ask())
+
+    assert [response["input"] for response in responses] == questions
+    assert all(response["context"][0].metadata["source"] == "services" for response in responses)
+
+
+def test_shared_service_is_initialized_once(monkeypatch):
+    monkeypatch.setattr(rag_service, "_shared_service", None)
+    initialized = []
+
+    def initialize_complete_system(self, urls=None, use_cache=True, verify_sources=True):
+        initialized.append(self)
+
+    monkeypatch.setattr(RAGService, "initialize_complete_system", initialize_complete_system)
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(get_shared_service())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(initialized) == 1
+    assert all(service is initialized[0] for service in services)
+    assert len(services) == 8
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for answering and retrieving many questions in one batch.
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+from langchain_core.runnables import RunnableLambda
+
+import rag_service
+from benchmark import HashingEmbeddings
+from rag_service import RAGService
+
+PAGES = [
+    Document(page_content="We move pianos and pool tables across Melbourne.", metadata={"source": "services"}),
+    Document(page_content="Secure storage units are available by the week.", metadata={"source": "storage"}),
+    Document(page_content="Call us on 0400 000 000 for a free quote.", metadata={"source": "contact"}),
+]
+QUESTIONS = ["Do you move pianos?", "Is storage available?", "Can I call for a free quote?"]
+
+
+class BatchCountingEmbeddings(HashingEmbeddings):
+    """Hashing embeddings that count single and batched query calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.query_calls = 0
+        self.batch_calls = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+    def embed_queries(self, texts):
+        self.batch_calls += 1
+        return [self._embed(text) for text in texts]
+
+
+def build_service(embeddings):
+    service = RAGService()
+    service.embeddings = embeddings
+    service.llm = FakeListLLM(responses=["answer"])
+    service.create_vectorstore(service.split_documents(PAGES))
+    service.create_retriever(k=1)
+    service.create_rag_chain()
+    service.answer_cache = None
+    return service
+
+
+@pytest.mark.parametrize("retrieval_type", ["hybrid", "similarity"])
+def test_batch_retrieve_matches_single_retrieval(monkeypatch, retrieval_type):
+    monkeypatch.setattr(rag_service, "RETRIEVAL_TYPE", retrieval_type)
+    embeddings = BatchCountingEmbeddings()
+    service = build_service(embeddings)
+
+    results = service.batch_retrieve(QUESTIONS)
+
+    assert embeddings.batch_calls == 1
+    assert embeddings.query_calls == 0
+    assert [result["input"] for result in results] == QUESTIONS
+    assert [result["documents"][0].metadata["source"] for result in results] == ["services", "storage", "contact"]
+    for question, result in zip(QUESTIONS, results):
+        assert result["documents"] == service.get_relevant_documents(question)
+
+
+def test_batch_query_keeps_order_and_reports_errors_per_question():
+    service = build_service(HashingEmbeddings())
+
+    def generate(inputs):
+        if "storage" in inputs["input"]:
+            raise RuntimeError("rate limited")
+        return f"Answer to: {inputs['input']}"
+
+    service.question_answer_chain = RunnableLambda(generate)
+
+    responses = service.batch_query(QUESTIONS, max_concurrency=2)
+
+    assert [response["input"] for response in responses] == QUESTIONS
+    assert responses[0]["answer"] == "Answer to: Do you move pianos?"
+    assert responses[0]["context"][0].metadata["source"] == "services"
+    assert responses[1]["answer"] is None
+    assert "rate limited" in responses[1]["error"]
+    assert "error" not in responses[2]
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the offline benchmark harness.
+"""
+
+from benchmark import percentile, run_benchmark
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_run_benchmark_reports_every_metric():
+    results = run_benchmark(repeat=1)
+
+    assert results["corpus"]["questions"] == 10
+    assert results["index"]["vectors"] == results["corpus"]["chunks"]
+    assert set(results["latency"]) == {"get_relevant_documents", "query"}
+    assert results["latency"]["query"]["count"] == 10
+    assert 0.0 <= results["recall"]["recall_at_k"] <= 1.0
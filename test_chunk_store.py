@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for keeping cached index chunks in memory-mapped files.
+"""
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from benchmark import HashingEmbeddings
+from chunk_store import ChunkIdMap, ChunkStore
+from index_store import IndexStore, compute_chunk_id
+
+PAGES = [
+    ("services", "We move pianos and pool tables across Melbourne."),
+    ("services", "Our removalists pack fragile items with care."),
+    ("contact", "Call us on 0400 123 456 for a free quote."),
+    ("storage", "Secure storage units are available by the week — 24/7 access."),
+]
+
+
+def make_vectorstore():
+    documents = []
+    for source, text in PAGES:
+        doc = Document(page_content=text, metadata={"source": source, "title": source.title()})
+        doc.metadata["chunk_id"] = compute_chunk_id(doc)
+        documents.append(doc)
+    ids = [doc.metadata["chunk_id"] for doc in documents]
+    return FAISS.from_documents(documents, HashingEmbeddings(), ids=ids)
+
+
+def test_chunks_round_trip(tmp_path):
+    vectorstore = make_vectorstore()
+    ChunkStore.write(str(tmp_path), vectorstore)
+    store = ChunkStore(str(tmp_path))
+
+    assert len(store) == len(PAGES)
+    for position, chunk_id in vectorstore.index_to_docstore_id.items():
+        expected = vectorstore.docstore.search(chunk_id)
+        restored = store.search(chunk_id)
+        assert restored.page_content == expected.page_content
+        assert restored.metadata == expected.metadata
+        assert store.id_map()[position] == chunk_id
+    assert store.search("missing") == "ID missing not found."
+    # Metadata shared by chunks of the same page is stored once
+    assert len(store._metadata) == 3
+    assert store.vectors is None
+
+
+def test_added_and_deleted_chunks_are_overlaid(tmp_path):
+    vectorstore = make_vectorstore()
+    ChunkStore.write(str(tmp_path), vectorstore)
+    store = ChunkStore(str(tmp_path))
+    stored_id = vectorstore.index_to_docstore_id[0]
+
+    store.add({"new": Document(page_content="New page.", metadata={"source": "new"})})
+    store.delete([stored_id])
+
+    assert store.search("new").page_content == "New page."
+    assert store.search(stored_id) == f"ID {stored_id} not found."
+    assert len(store) == len(PAGES)
+    with pytest.raises(ValueError):
+        store.add({"new": Document(page_content="Again.")})
+    with pytest.raises(ValueError):
+        store.delete([stored_id])
+
+
+def test_id_map_overlays_new_positions(tmp_path):
+    ChunkStore.write(str(tmp_path), make_vectorstore())
+    id_map = ChunkStore(str(tmp_path)).id_map()
+
+    id_map[len(PAGES)] = "new"
+
+    assert isinstance(id_map, ChunkIdMap)
+    assert len(id_map) == len(PAGES) + 1
+    assert list(id_map)[-1] == len(PAGES)
+    assert id_map[len(PAGES)] == "new"
+    with pytest.raises(KeyError):
+        id_map[len(PAGES) + 1]
+
+
+def test_index_store_serves_chunks_from_the_chunk_store(tmp_path):
+    vectorstore = make_vectorstore()
+    index_store = IndexStore(str(tmp_path), chunk_store=True, float16_vectors=True)
+    index_store.save(vectorstore, "v1", {})
+
+    loaded = index_store.load("v1", HashingEmbeddings())
+
+    assert isinstance(loaded.docstore, ChunkStore)
+    assert loaded.docstore.vectors.dtype == np.float16
+    assert loaded.docstore.vectors.shape == (len(PAGES), vectorstore.index.d)
+    top = loaded.similarity_search("0400 123 456", k=1)[0]
+    assert top.metadata["source"] == "contact"
+
+    # The loaded store can still be updated in place
+    loaded.delete([top.metadata["chunk_id"]])
+    loaded.add_documents([Document(page_content="Piano storage.", metadata={"source": "new"})])
+    sources = {doc.metadata["source"] for doc in loaded.similarity_search("anything", k=len(PAGES))}
+    assert "contact" not in sources and "new" in sources
+
+
+def test_index_store_falls_back_to_pickled_docstore(tmp_path):
+    index_store = IndexStore(str(tmp_path), chunk_store=False)
+    index_store.save(make_vectorstore(), "v1", {})
+
+    loaded = index_store.load("v1", HashingEmbeddings())
+
+    assert not isinstance(loaded.docstore, ChunkStore)
+    assert loaded.similarity_search("pianos", k=1)[0].metadata["source"] == "services"
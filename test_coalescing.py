@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing concurrent identical requests into one execution.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListLLM
+from langchain_core.runnables import RunnableLambda
+
+from coalescing import SingleFlight
+from rag_service import RAGService
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+
+def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def work():
+        executions.append(1)
+        release.wait(2.0)
+        return "answer"
+
+    with ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(single_flight.do, "key", work) for _ in range(5)]
+        wait_for(lambda: single_flight.stats["coalesced"] == 4)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["answer"] * 5
+    assert len(executions) == 1
+    # Nothing is cached once the execution finished
+    assert single_flight.do("key", lambda: "fresh") == "fresh"
+
+
+def test_errors_are_shared_with_waiters():
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(2.0)
+        raise RuntimeError("rate limited")
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(single_flight.do, "key", work) for _ in range(3)]
+        wait_for(lambda: single_flight.stats["coalesced"] == 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="rate limited"):
+                future.result()
+    assert single_flight.in_flight() == 0
+
+
+def test_async_calls_share_one_execution():
+    single_flight = SingleFlight()
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(single_flight.ado("key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert len(executions) == 1
+
+
+def test_cancelling_the_first_async_caller_does_not_cancel_the_others():
+    single_flight = SingleFlight()
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        leader = asyncio.ensure_future(single_flight.ado("key", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(single_flight.ado("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    assert asyncio.run(run()) == ["answer"] * 2
+    assert len(executions) == 1
+    assert single_flight.stats == {"executions": 1, "coalesced": 2}
+    assert single_flight.in_flight() == 0
+
+
+def test_identical_questions_are_answered_once():
+    service = RAGService()
+    service.embeddings = DeterministicFakeEmbedding(size=16)
+    service.create_vectorstore(service.split_documents([
+        Document(page_content="We move pianos and pool tables.", metadata={"source": "services"}),
+    ]))
+    service.create_retriever()
+    service.llm = FakeListLLM(responses=["Yes."])
+    service.create_rag_chain()
+    service.answer_cache = None
+
+    generations = []
+
+    def generate(inputs):
+        generations.append(inputs["input"])
+        time.sleep(0.2)
+        return "Yes, we move pianos."
+
+    service.question_answer_chain = RunnableLambda(generate)
+
+    questions = ["Do you move pianos?", "do you move  pianos", "DO YOU MOVE PIANOS?"]
+    with ThreadPoolExecutor(len(questions)) as pool:
+        responses = list(pool.map(service.query, questions))
+
+    assert len(generations) == 1
+    assert [response["input"] for response in responses] == questions
+    assert all(response["answer"] == "Yes, we move pianos." for response in responses)
+
+
+def test_identical_streams_share_one_generation():
+    service = RAGService()
+    service.embeddings = DeterministicFakeEmbedding(size=16)
+    service.create_vectorstore(service.split_documents([
+        Document(page_content="We move pianos and pool tables.", metadata={"source": "services"}),
+    ]))
+    service.create_retriever()
+    service.llm = FakeListLLM(responses=["Yes."])
+    service.create_rag_chain()
+    service.answer_cache = None
+
+    generations = []
+    release = threading.Event()
+
+    def generate(inputs):
+        generations.append(inputs["input"])
+        yield "Yes, "
+        release.wait(2.0)
+        yield "we move pianos."
+
+    service.question_answer_chain = RunnableLambda(generate)
+    first_tokens = []
+
+    def read(question):
+        answer = []
+        for part in service.stream_query(question):
+            if "answer" in part:
+                if not answer:
+                    first_tokens.append(question)
+                answer.append(part["answer"])
+        return "".join(answer)
+
+    questions = ["Do you move pianos?", "do you move  pianos", "DO YOU MOVE PIANOS?"]
+    with ThreadPoolExecutor(len(questions)) as pool:
+        futures = [pool.submit(read, question) for question in questions]
+        wait_for(lambda: len(first_tokens) == len(questions))
+        release.set()
+        answers = [future.result() for future in futures]
+
+    assert len(generations) == 1
+    assert answers == ["Yes, we move pianos."] * len(questions)
+    wait_for(lambda: service.single_flight.in_flight() == 0)
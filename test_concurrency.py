@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-wide cap on LLM calls in flight.
+"""
+
+import asyncio
+import threading
+import time
+
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+from langchain_core.runnables import RunnableLambda
+
+from benchmark import HashingEmbeddings
+from concurrency import ConcurrencyLimiter
+from rag_service import RAGService
+
+
+class ActiveCounter:
+    """Tracks how many generations run at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.active -= 1
+
+
+def test_cap_holds_across_threads_and_event_loops():
+    limiter = ConcurrencyLimiter(2)
+    counter = ActiveCounter()
+
+    def work():
+        with limiter, counter:
+            time.sleep(0.02)
+
+    async def awork():
+        async with limiter:
+            with counter:
+                await asyncio.sleep(0.02)
+
+    async def many():
+        await asyncio.gather(*(awork() for _ in range(4)))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    threads += [threading.Thread(target=asyncio.run, args=(many(),)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.peak == 2
+    assert limiter.in_use() == 0
+
+
+def test_cancelled_async_waiter_does_not_leak_a_slot():
+    limiter = ConcurrencyLimiter(1)
+
+    async def run():
+        await limiter.aacquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        limiter.release()
+        await asyncio.sleep(0)
+        async with limiter:
+            return limiter.in_use()
+
+    assert asyncio.run(run()) == 1
+    assert limiter.in_use() == 0
+
+
+def test_sync_and_async_queries_share_the_llm_cap():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.llm = FakeListLLM(responses=["We can help."])
+    service.create_vectorstore([Document(page_content="We move pianos.", metadata={"source": "services"})])
+    service.create_retriever(k=1)
+    service.create_rag_chain()
+    service.answer_cache = None
+    service._llm_gate = ConcurrencyLimiter(2)
+    counter = ActiveCounter()
+
+    def generate(inputs):
+        with counter:
+            time.sleep(0.05)
+        return "We can help."
+
+    async def agenerate(inputs):
+        with counter:
+            await asyncio.sleep(0.05)
+        return "We can help."
+
+    service.question_answer_chain = RunnableLambda(generate, afunc=agenerate)
+
+    async def ask_async(prefix):
+        return await asyncio.gather(*(service.aquery(f"{prefix} piano {i}?") for i in range(3)))
+
+    threads = [threading.Thread(target=service.query, args=(f"sync piano {i}?",)) for i in range(3)]
+    threads.append(threading.Thread(target=lambda: list(service.stream_query("stream piano?"))))
+    threads += [threading.Thread(target=asyncio.run, args=(ask_async(f"loop {i}"),)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.peak == 2
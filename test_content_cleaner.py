@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for stripping boilerplate repeated across pages before chunking.
+"""
+
+from langchain_core.documents import Document
+
+from content_cleaner import BoilerplateStripper, split_blocks
+from rag_service import RAGService
+
+MENU = "Home\n\nServices\n\nAbout\n\nContact"
+FOOTER = " ".join(["Victoria on Move. Call 0400 000 000 for a free quote. ABN 12 345 678 901."] * 20)
+
+
+def page(source, body):
+    return Document(page_content=f"{MENU}\n\n{body}\n\n{FOOTER}", metadata={"source": source})
+
+
+PAGES = [
+    page("home", "We are a family owned removalist business in Melbourne."),
+    page("services", "We move houses, offices, pianos and pool tables."),
+    page("storage", "Secure storage units are available by the week."),
+]
+
+
+def test_repeated_blocks_are_kept_on_the_highest_ranked_page_only():
+    stripper = BoilerplateStripper()
+
+    cleaned = [stripper.clean(doc) for doc in PAGES]
+
+    assert split_blocks(cleaned[0].page_content) == split_blocks(PAGES[0].page_content)
+    assert cleaned[1].page_content == "We move houses, offices, pianos and pool tables."
+    assert cleaned[2].metadata == {"source": "storage"}
+    assert stripper.stats["blocks_removed"] == 10
+    assert stripper.stats["chars_removed"] == 2 * (len(FOOTER) + len("HomeServicesAboutContact"))
+
+
+def test_recleaning_a_page_keeps_its_own_blocks():
+    stripper = BoilerplateStripper()
+    for doc in PAGES:
+        stripper.clean(doc)
+
+    assert stripper.clean(PAGES[0]).page_content == PAGES[0].page_content
+    assert "Home" not in stripper.clean(PAGES[2]).page_content
+
+
+def test_owner_does_not_depend_on_page_order():
+    order = ["storage", "home", "services"]
+    forward = BoilerplateStripper(order).clean_pages(PAGES)
+    backward = BoilerplateStripper(order).clean_pages(PAGES[::-1])[::-1]
+
+    assert [doc.page_content for doc in forward] == [doc.page_content for doc in backward]
+    assert "Home" in forward[2].page_content
+    assert "Home" not in forward[0].page_content
+
+
+def test_streamed_and_batch_cleaning_agree_on_crawled_pages():
+    crawled = [page("/zz", "Crawled first."), page("/aa", "Crawled second.")]
+
+    streaming = BoilerplateStripper(["home"])
+    streamed = [streaming.clean(doc) for doc in crawled]
+    batch = BoilerplateStripper(["home"]).clean_pages(crawled)
+
+    assert [doc.page_content for doc in streamed] == [doc.page_content for doc in batch]
+    assert FOOTER in streamed[0].page_content
+    assert FOOTER not in streamed[1].page_content
+    # Re-cleaning on refresh keeps the owners picked while streaming
+    assert [doc.page_content for doc in streaming.clean_pages(crawled[::-1])[::-1]] == [
+        doc.page_content for doc in streamed
+    ]
+
+
+def test_ownership_moves_when_the_owner_changes_or_disappears():
+    stripper = BoilerplateStripper(["home", "services", "storage"])
+    stripper.clean_pages(PAGES)
+
+    # The home page loses its footer, which goes to the next page containing it
+    home = Document(page_content=f"{MENU}\n\nWe are a family owned business.", metadata={"source": "home"})
+    cleaned = stripper.clean_pages([PAGES[2], PAGES[1], home])
+    assert FOOTER not in cleaned[0].page_content
+    assert FOOTER in cleaned[1].page_content
+    assert "Home" in cleaned[2].page_content
+
+    stripper.retain(["services", "storage"])
+    cleaned = stripper.clean_pages([PAGES[2], PAGES[1]])
+    assert "Home" not in cleaned[0].page_content
+    assert split_blocks(cleaned[1].page_content) == split_blocks(PAGES[1].page_content)
+
+
+def test_clean_documents_reports_removed_chars_and_chunks():
+    service = RAGService()
+
+    cleaned = service.clean_documents(PAGES)
+
+    assert service.cleaning_stats["pages"] == 3
+    assert service.cleaning_stats["chars_removed"] == sum(
+        len(raw.page_content) - len(doc.page_content) for raw, doc in zip(PAGES, cleaned)
+    )
+    assert service.cleaning_stats["chunks_removed"] > 0
+    assert len(service.split_documents(cleaned)) < len(service.split_documents(PAGES))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for packing retrieved chunks into the LLM context.
+"""
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from benchmark import HashingEmbeddings
+from context_packer import ContextPacker, overlap_length
+from metrics import estimate_tokens
+from rag_service import RAGService
+from retrievers import ScoredVectorRetriever
+
+PAGE = " ".join(
+    f"Sentence number {i} describes a different part of our removal service in Melbourne."
+    for i in range(40)
+)
+
+
+def split_page(text, source="services"):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=100)
+    return splitter.split_documents([Document(page_content=text, metadata={"source": source})])
+
+
+def test_overlap_length():
+    assert overlap_length("the quick brown fox jumps", "brown fox jumps over the dog", min_overlap=5) == 15
+    assert overlap_length("abc", "xyz", min_overlap=1) == 0
+
+
+def test_overlapping_chunks_are_deduplicated():
+    chunks = split_page(PAGE)[:4]
+    packed = ContextPacker(token_budget=10000).pack("removal service", chunks)
+
+    assert packed.tokens_out < packed.tokens_in
+    text = "\n".join(doc.page_content for doc in packed.documents)
+    for i in range(10):
+        assert text.count(f"Sentence number {i} ") <= 1
+    assert all(doc.metadata["source"] == "services" for doc in packed.documents)
+
+
+def test_sentences_repeated_across_pages_are_dropped():
+    banner = "Call Victoria on Move today for a free quote."
+    docs = [
+        Document(page_content=f"We move pianos. {banner}", metadata={"source": "a"}),
+        Document(page_content=f"We store furniture. {banner}", metadata={"source": "b"}),
+    ]
+
+    packed = ContextPacker().pack("pianos", docs)
+
+    assert [doc.page_content for doc in packed.documents] == [
+        f"We move pianos.\n{banner}",
+        "We store furniture."
+    ]
+
+
+def test_context_fits_token_budget_and_follows_scores():
+    docs = [
+        Document(page_content=PAGE, metadata={"source": "low", "score": 0.1}),
+        Document(page_content="Our trucks range from 2 to 10 tonnes.", metadata={"source": "high", "score": 0.9}),
+    ]
+
+    packed = ContextPacker(token_budget=60).pack("truck sizes", docs)
+
+    assert packed.documents[0].metadata["source"] == "high"
+    assert sum(estimate_tokens(doc.page_content) for doc in packed.documents) <= 60
+
+
+def test_retrieved_chunks_are_packed_by_score():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.create_vectorstore([
+        Document(page_content="Our trucks range from 2 to 10 tonnes.", metadata={"source": "trucks"}),
+        Document(page_content="Truck hire comes with two removalists.", metadata={"source": "hire"}),
+        Document(page_content="We also store furniture.", metadata={"source": "storage"}),
+    ])
+    service.context_packer = ContextPacker()
+    retrieved = ScoredVectorRetriever(vectorstore=service.vectorstore, k=3).invoke("truck sizes in tonnes")
+
+    packed = service._pack_context("truck sizes in tonnes", list(reversed(retrieved)))
+
+    scores = [doc.metadata["relevance_score"] for doc in packed]
+    assert scores == sorted(scores, reverse=True)
+    assert packed[0].metadata["source"] == "trucks"
+
+    # Reranker scores take precedence over vector relevance
+    reranked = [Document(page_content=doc.page_content, metadata=dict(doc.metadata, rerank_score=i))
+                for i, doc in enumerate(retrieved)]
+    packed = service._pack_context("truck sizes in tonnes", reranked)
+    assert [doc.metadata["rerank_score"] for doc in packed] == [2, 1, 0]
+
+
+def test_sentence_extraction_keeps_relevant_sentences():
+    doc = Document(
+        page_content="We have been moving families since 1998. Our trucks range from 2 to 10 tonnes. Ask about storage.",
+        metadata={"source": "about"}
+    )
+
+    packed = ContextPacker(sentence_extraction=True).pack("What size trucks do you have?", [doc])
+
+    assert packed.documents[0].page_content == "Our trucks range from 2 to 10 tonnes."
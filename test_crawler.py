@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for the site crawler against a local HTTP server serving a fixture site.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import NearDuplicateFilter, SiteCrawler, normalize_url, simhash
+
+SERVICES_TEXT = (
+    "We pack, load and move the contents of houses and apartments across Melbourne, "
+    "with trained removalists, padded trucks and free wardrobe boxes on moving day."
+)
+
+
+def page(body, links=()):
+    anchors = "".join(f'<a href="{href}">link</a>' for href in links)
+    return f"<html><body><p>{body}</p>{anchors}</body></html>"
+
+
+FIXTURE_PAGES = {
+    "/": page(
+        "Victoria on Move is a family owned removalist business based in the eastern suburbs.",
+        ["/services", "/services?utm_source=nav#top", "/services-copy", "/private/admin",
+         "/deep/1", "/brochure.pdf", "http://example.com/elsewhere"]
+    ),
+    "/services": page(SERVICES_TEXT),
+    "/services-copy": page(SERVICES_TEXT + " Call today."),
+    "/about": page("Founded in 1998, our team has completed thousands of interstate relocations and storage jobs."),
+    "/private/admin": page("Staff only area with rosters, invoices and internal contact lists."),
+    "/deep/1": page("Depth one page about piano and pool table removals done with care.", ["/deep/2"]),
+    "/deep/2": page("Depth two page describing our secure storage units and insurance cover.", ["/deep/3"]),
+    "/deep/3": page("Depth three page that is past the crawl depth limit and must not be fetched."),
+}
+
+
+def strip_tags(url, html):
+    """Minimal parser so the tests do not need unstructured."""
+    return html.split("<p>")[1].split("</p>")[0]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requested = []
+    delays = {}
+
+    def do_GET(self):
+        FixtureHandler.requested.append(self.path)
+        time.sleep(FixtureHandler.delays.get(self.path, 0))
+        if self.path == "/robots.txt":
+            body = f"User-agent: *\nDisallow: /private/\nSitemap: {self.base_url()}/sitemap.xml\n"
+            return self.respond(body, "text/plain")
+        if self.path == "/sitemap.xml":
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<url><loc>{self.base_url()}/about</loc></url>"
+                "</urlset>"
+            )
+            return self.respond(body, "application/xml")
+
+        body = FIXTURE_PAGES.get(self.path.split("?")[0])
+        if body is None:
+            self.send_error(404)
+            return
+        self.respond(body, "text/html")
+
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def respond(self, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_site():
+    FixtureHandler.requested = []
+    FixtureHandler.delays = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.COM:80/a//b?utm_source=x&b=2&a=1#top") == "http://example.com/a/b?a=1&b=2"
+    assert normalize_url("https://example.com") == "https://example.com/"
+
+
+def test_near_duplicate_filter():
+    duplicates = NearDuplicateFilter(max_distance=3)
+    duplicates.add("a", SERVICES_TEXT)
+
+    assert bin(simhash(SERVICES_TEXT) ^ simhash(SERVICES_TEXT + " Call today.")).count("1") <= 3
+    assert duplicates.find(SERVICES_TEXT + " Call today.") == "a"
+    assert duplicates.find(FIXTURE_PAGES["/about"]) is None
+
+
+def test_crawl_follows_links_sitemap_and_robots(fixture_site):
+    crawler = SiteCrawler([fixture_site + "/"], max_depth=2, retries=0, parser=strip_tags)
+
+    docs = list(crawler.lazy_load())
+
+    sources = {doc.metadata["source"].replace(fixture_site, "") for doc in docs}
+    assert sources == {"/", "/about", "/services", "/deep/1", "/deep/2"}
+    assert crawler.stats["near_duplicates"] == 1
+    assert crawler.stats["disallowed"] == 1
+    assert "/private/admin" not in FixtureHandler.requested
+    assert "/deep/3" not in FixtureHandler.requested
+    assert "/brochure.pdf" not in FixtureHandler.requested
+    assert FixtureHandler.requested.count("/services") == 1
+    assert not any(path.startswith("/services?") for path in FixtureHandler.requested)
+
+
+def test_near_duplicates_resolve_in_frontier_order(fixture_site):
+    # The first copy in crawl order finishes last, but is still the one kept
+    FixtureHandler.delays = {"/services": 0.2}
+    crawler = SiteCrawler([fixture_site + "/"], max_depth=1, max_concurrency=4, retries=0, parser=strip_tags)
+
+    docs = list(crawler.lazy_load())
+
+    sources = [doc.metadata["source"].replace(fixture_site, "") for doc in docs]
+    assert "/services" in sources and "/services-copy" not in sources
+    assert sources.index("/") == 0
+    assert sources.index("/services") < sources.index("/deep/1")
+
+
+def test_crawl_stops_at_max_pages(fixture_site):
+    crawler = SiteCrawler([fixture_site + "/"], max_pages=3, retries=0, parser=strip_tags)
+
+    docs = list(crawler.lazy_load())
+
+    assert crawler.stats["fetched"] == 3
+    assert len(docs) <= 3
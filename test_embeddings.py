@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached embeddings wrapper, using a fake local embedding model.
+"""
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from embeddings import CachedEmbeddings, LocalEmbeddings, embed_queries, embedding_model_id
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic fake embeddings that count the texts they embed."""
+
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_document_embeddings_are_persisted(tmp_path):
+    """Identical texts are embedded once and survive a new wrapper instance."""
+    cache_path = str(tmp_path / "embeddings.sqlite3")
+    underlying = CountingEmbeddings(size=8)
+
+    embeddings = CachedEmbeddings(underlying, model_name="fake", cache_path=cache_path)
+    first = embeddings.embed_documents(["moving", "packing", "moving"])
+    assert underlying.calls == 2
+    assert first[0] == first[2]
+    assert embeddings.stats["document_misses"] == 2
+    assert embeddings.stats["document_hits"] == 1
+
+    reopened = CachedEmbeddings(underlying, model_name="fake", cache_path=cache_path)
+    second = reopened.embed_documents(["packing", "moving"])
+    assert underlying.calls == 2
+    assert reopened.stats["document_hits"] == 2
+    assert second == [first[1], first[0]]
+
+
+def test_cached_vectors_are_namespaced_by_model(tmp_path):
+    """Vectors cached for one model are not reused for another."""
+    cache_path = str(tmp_path / "embeddings.sqlite3")
+    underlying = CountingEmbeddings(size=8)
+
+    CachedEmbeddings(underlying, model_name="a", cache_path=cache_path).embed_documents(["truck"])
+    CachedEmbeddings(underlying, model_name="b", cache_path=cache_path).embed_documents(["truck"])
+    assert underlying.calls == 2
+
+
+def test_query_cache_is_lru():
+    """Repeated queries hit the cache and the oldest entry is evicted first."""
+    underlying = CountingEmbeddings(size=8)
+    embeddings = CachedEmbeddings(underlying, model_name="fake", cache_path=None, query_cache_size=2)
+
+    embeddings.embed_query("a")
+    embeddings.embed_query("b")
+    embeddings.embed_query("a")
+    embeddings.embed_query("c")
+    assert embeddings.stats == {
+        "query_hits": 1,
+        "query_misses": 3,
+        "document_hits": 0,
+        "document_misses": 0
+    }
+
+    embeddings.embed_query("b")
+    assert underlying.calls == 4
+
+
+def test_batched_queries_share_the_query_cache():
+    """Only uncached queries are embedded, and the results fill the cache."""
+    underlying = CountingEmbeddings(size=8)
+    embeddings = CachedEmbeddings(underlying, model_name="fake", cache_path=None)
+    embeddings.embed_query("a")
+
+    vectors = embed_queries(embeddings, ["a", "b", "b", "c"])
+
+    assert vectors[0] == embeddings.embed_query("a")
+    assert vectors[1] == vectors[2] == embeddings.embed_query("b")
+    assert underlying.calls == 3
+
+
+def test_google_embeddings_subclasses_batch_queries():
+    class RecordingGoogleEmbeddings(GoogleGenerativeAIEmbeddings):
+        task_types: list = []
+
+        def embed_documents(self, texts, task_type=None, **kwargs):
+            self.task_types.append(task_type)
+            return [[float(len(text))] for text in texts]
+
+    embeddings = RecordingGoogleEmbeddings(model="models/text-embedding-004", google_api_key="test")
+
+    assert embed_queries(embeddings, ["ab", "c"]) == [[2.0], [1.0]]
+    assert embeddings.task_types == ["RETRIEVAL_QUERY"]
+
+
+class FakeSentenceTransformer:
+    """Stand-in for a sentence-transformers model, recording its batches."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy, show_progress_bar):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_local_embeddings_encode_in_batches():
+    model = FakeSentenceTransformer()
+    embeddings = LocalEmbeddings(model=model, batch_size=16)
+
+    assert embeddings.embed_documents(["ab", "abc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert embeddings.embed_query("a") == [1.0, 1.0]
+    assert embeddings.embed_documents([]) == []
+    assert model.batches == [["ab", "abc"], ["a"]]
+
+
+def test_embedding_model_id_separates_backends():
+    assert embedding_model_id("google") != embedding_model_id("local")
+    assert embedding_model_id("local").startswith("local:")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for approximate nearest neighbour index building.
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from benchmark import HashingEmbeddings
+from index_builder import (
+    INDEX_TYPES,
+    build_index,
+    delete_from_vectorstore,
+    evaluate_recall,
+    index_factory_string
+)
+from rag_service import RAGService
+
+
+def random_vectors(count, dimension=32, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_every_index_type_builds_and_searches(index_type):
+    vectors = random_vectors(500)
+
+    index = build_index(vectors, index_type)
+    _, indices = index.search(vectors[:5], 1)
+
+    assert index.ntotal == 500
+    assert (indices >= 0).all()
+
+
+def test_ivf_lists_are_capped_for_small_corpora():
+    assert index_factory_string("ivf", 32, 390) == "IVF10,Flat"
+    with pytest.raises(ValueError):
+        index_factory_string("annoy", 32, 390)
+
+
+def test_hnsw_recall_against_flat_baseline():
+    vectors = random_vectors(2000)
+    queries = random_vectors(50, seed=1)
+
+    report = evaluate_recall(vectors, queries, k=5, index_type="hnsw")
+
+    assert report["recall_at_k"] >= 0.9
+    assert report["queries"] == 50
+
+
+def test_service_builds_ann_index_and_deletes_from_it():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings(size=64)
+    docs = service.split_documents([
+        Document(page_content=f"page {i} about trains trams and buses number {i}", metadata={"source": f"u{i}"})
+        for i in range(50)
+    ])
+
+    vectorstore = service.create_vectorstore(docs, index_type="hnsw")
+    assert hasattr(vectorstore.index, "hnsw")
+
+    removed = docs[0].metadata["chunk_id"]
+    delete_from_vectorstore(vectorstore, [removed], index_type="hnsw")
+
+    assert hasattr(vectorstore.index, "hnsw")
+    assert vectorstore.index.ntotal == 49
+    assert removed not in vectorstore.index_to_docstore_id.values()
+    results = vectorstore.similarity_search(docs[0].page_content, k=5)
+    assert docs[0].page_content not in [doc.page_content for doc in results]
+
+
+def test_deleting_from_ivf_keeps_positions_in_sync():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    docs = service.split_documents([
+        Document(page_content=f"page topic{i} about trains", metadata={"source": f"u{i}"})
+        for i in range(100)
+    ])
+    vectorstore = service.create_vectorstore(docs, index_type="ivf")
+
+    delete_from_vectorstore(vectorstore, [docs[50].metadata["chunk_id"]], index_type="ivf")
+
+    assert vectorstore.index.ntotal == 99
+    for doc in docs[49:52] + docs[-1:]:
+        results = vectorstore.similarity_search(doc.page_content, k=1)
+        if doc is docs[50]:
+            assert results[0].page_content != doc.page_content
+        else:
+            assert results[0].page_content == doc.page_content
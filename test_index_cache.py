@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Tests for loading the index from the index cache or building it on a miss,
+and for refreshing it incrementally.
+"""
+
+import faiss
+import pytest
+from langchain_core.documents import Document
+
+import rag_service
+from benchmark import HashingEmbeddings
+from chunk_store import ChunkStore
+from index_store import IndexStore
+from rag_service import RAGService
+
+URLS = ["services", "contact", "about"]
+PAGES = [
+    Document(page_content="We move pianos and pool tables across Melbourne.", metadata={"source": "services"}),
+    Document(page_content="Call us on 0400 000 000 for a quote.", metadata={"source": "contact"}),
+    Document(page_content="A family owned business since 1998.", metadata={"source": "about"}),
+]
+NEW_PAGES = [
+    Document(page_content="We move pianos, pool tables and safes across Victoria.", metadata={"source": "services"}),
+    Document(page_content="A family owned business since 1998.", metadata={"source": "about"}),
+    Document(page_content="Secure storage units are available by the week.", metadata={"source": "storage"}),
+]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Hashing embeddings that count the texts they embed."""
+
+    def __init__(self):
+        super().__init__()
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+class Site:
+    """Serves pages to the service and counts passes over them."""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.passes = 0
+        self.loads = 0
+
+    def install(self, monkeypatch):
+        site = self
+
+        def load_documents(self, urls=None):
+            site.loads += 1
+            return list(site.pages)
+
+        def stream_documents(self, urls=None):
+            site.passes += 1
+            yield from site.pages
+        monkeypatch.setattr(RAGService, "load_documents", load_documents)
+        monkeypatch.setattr(RAGService, "stream_documents", stream_documents)
+
+
+def make_service(cache_dir):
+    service = RAGService()
+    service.embeddings = CountingEmbeddings()
+    service.index_store = IndexStore(str(cache_dir))
+    return service
+
+
+@pytest.fixture
+def site(monkeypatch):
+    site = Site(PAGES)
+    site.install(monkeypatch)
+    return site
+
+
+def test_first_build_streams_the_pages_once(tmp_path, site):
+    service = make_service(tmp_path)
+
+    assert service.load_or_build_vectorstore(URLS) == len(PAGES)
+
+    assert site.passes == 1
+    assert site.loads == 0
+    assert service.embeddings.embedded == len(PAGES)
+
+
+def test_cache_hit_is_decided_from_streamed_hashes(tmp_path, site):
+    make_service(tmp_path).load_or_build_vectorstore(URLS)
+    site.passes = 0
+    service = make_service(tmp_path)
+
+    assert service.load_or_build_vectorstore(URLS) == len(PAGES)
+
+    assert site.passes == 1
+    assert site.loads == 0
+    assert service.embeddings.embedded == 0
+    assert service.documents == []
+
+
+def test_changed_pages_miss_the_cache(tmp_path, site):
+    first = make_service(tmp_path)
+    first.load_or_build_vectorstore(URLS)
+    site.pages = NEW_PAGES
+    service = make_service(tmp_path)
+
+    site.passes = 0
+
+    assert service.load_or_build_vectorstore(URLS) == len(NEW_PAGES)
+
+    # The build reuses the pages spooled while checking the cache
+    assert site.passes == 1
+    assert service.index_version != first.index_version
+    assert service.embeddings.embedded == len(NEW_PAGES)
+    assert service.latest_cached_key(URLS) == service.index_version
+    # The previous version stays cached
+    assert service.index_store.exists(first.index_version)
+
+
+def test_changed_settings_invalidate_the_cache(tmp_path, site):
+    make_service(tmp_path).load_or_build_vectorstore(URLS)
+    service = make_service(tmp_path)
+    service.embedding_model = "another-model"
+
+    service.load_or_build_vectorstore(URLS, verify_sources=False)
+
+    assert service.embeddings.embedded == len(PAGES)
+
+
+def test_unverified_start_loads_the_latest_version_without_scraping(tmp_path, site):
+    built = make_service(tmp_path)
+    built.load_or_build_vectorstore(URLS)
+    site.passes = 0
+    service = make_service(tmp_path)
+
+    assert service.load_or_build_vectorstore(URLS, verify_sources=False) == len(PAGES)
+
+    assert site.passes == 0
+    assert service.embeddings.embedded == 0
+    assert service.index_version == built.index_version
+    assert service.vectorstore.similarity_search("0400 000 000", k=1)[0].metadata["source"] == "contact"
+
+
+@pytest.mark.parametrize("reloaded", [False, True], ids=["built", "reloaded"])
+def test_refresh_only_embeds_new_chunks_and_removes_stale_ones(tmp_path, site, reloaded):
+    service = make_service(tmp_path)
+    service.load_or_build_vectorstore(URLS)
+    if reloaded:
+        # A fresh process serving the cached version from the chunk store
+        service = make_service(tmp_path)
+        service.load_or_build_vectorstore(URLS, verify_sources=False)
+        assert isinstance(service.vectorstore.docstore, ChunkStore)
+    old_ids = {doc.metadata["source"]: chunk_id for chunk_id, doc in (
+        (chunk_id, service.vectorstore.docstore.search(chunk_id)) for chunk_id in service.chunk_manifest
+    )}
+    service.embeddings.embedded = 0
+    site.pages = NEW_PAGES
+
+    assert service.refresh(URLS) == {"added": 2, "removed": 2, "unchanged": 1}
+
+    assert service.embeddings.embedded == 2
+    removed = [old_ids["services"], old_ids["contact"]]
+    indexed = set(service.vectorstore.index_to_docstore_id.values())
+    lexical = {chunk_id for chunk_id, _ in service.get_lexical_index().search("pianos 0400 quote", 10)}
+    for chunk_id in removed:
+        assert chunk_id not in indexed
+        assert chunk_id not in service.chunk_manifest
+        assert chunk_id not in lexical
+        assert service.vectorstore.docstore.search(chunk_id) == f"ID {chunk_id} not found."
+    assert old_ids["about"] in indexed
+    assert len(indexed) == service.vectorstore.index.ntotal == len(NEW_PAGES)
+    top = service.vectorstore.similarity_search("storage units", k=1)[0]
+    assert top.metadata["source"] == "storage"
+
+
+@pytest.mark.parametrize("reloaded", [False, True], ids=["built", "reloaded"])
+def test_refresh_keeps_ivf_labels_in_sync(tmp_path, monkeypatch, reloaded):
+    monkeypatch.setattr(rag_service, "INDEX_TYPE", "ivf")
+    topics = [
+        Document(page_content=f"Page topic{i} describes service number {i}.", metadata={"source": f"t{i}"})
+        for i in range(100)
+    ]
+    site = Site(topics)
+    site.install(monkeypatch)
+    service = make_service(tmp_path)
+    service.build_vectorstore_streaming(topics, index_type="ivf")
+    service._store_built_index("v1", {})
+    if reloaded:
+        # The IVF lists of a cached version are memory-mapped read-only
+        service = make_service(tmp_path)
+        service._load_cached_index("v1")
+
+    site.pages = topics + [Document(page_content="Page topic100 is new.", metadata={"source": "t100"})]
+    assert service.refresh()["added"] == 1
+    site.pages = site.pages[:50] + site.pages[51:]
+    assert service.refresh()["removed"] == 1
+
+    assert faiss.try_extract_index_ivf(service.vectorstore.index) is not None
+    for page in site.pages:
+        top = service.vectorstore.similarity_search(page.page_content, k=1)[0]
+        assert top.metadata["source"] == page.metadata["source"]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for batched embedding of document chunks.
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingest import BatchEmbedder, BatchEmbeddingError, is_rate_limit_error
+
+
+class FlakyEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that fail on chosen texts, optionally only a few times."""
+
+    fail_on: str = ""
+    failures_left: int = 0
+
+    def embed_documents(self, texts):
+        if self.fail_on in texts and self.failures_left:
+            self.failures_left -= 1
+            raise RuntimeError("429 Resource has been exhausted")
+        return super().embed_documents(texts)
+
+
+def make_docs(count):
+    docs = [Document(page_content=f"chunk {i}", metadata={"source": "u"}) for i in range(count)]
+    return docs, [f"id-{i}" for i in range(count)]
+
+
+def test_batches_are_added_to_one_index():
+    docs, ids = make_docs(10)
+    embedder = BatchEmbedder(DeterministicFakeEmbedding(size=8), batch_size=3, max_in_flight=2)
+
+    vectorstore = embedder.add_documents(None, docs, ids)
+
+    assert sorted(vectorstore.index_to_docstore_id.values()) == sorted(ids)
+    assert embedder.stats["batches"] == 4
+    assert embedder.stats["chunks"] == 10
+
+
+def test_rate_limited_batches_are_retried():
+    docs, ids = make_docs(4)
+    embeddings = FlakyEmbeddings(size=8, fail_on="chunk 3", failures_left=2)
+    embedder = BatchEmbedder(embeddings, batch_size=2, max_retries=2, backoff_seconds=0.01)
+
+    vectorstore = embedder.add_documents(None, docs, ids)
+
+    assert vectorstore.index.ntotal == 4
+
+
+def test_failed_batches_keep_completed_work():
+    docs, ids = make_docs(6)
+    embeddings = FlakyEmbeddings(size=8, fail_on="chunk 5", failures_left=100)
+    embedder = BatchEmbedder(embeddings, batch_size=2, max_retries=1, backoff_seconds=0.01)
+
+    with pytest.raises(BatchEmbeddingError) as excinfo:
+        embedder.add_documents(None, docs, ids)
+
+    assert excinfo.value.failed_ids == ["id-4", "id-5"]
+    assert sorted(excinfo.value.vectorstore.index_to_docstore_id.values()) == ids[:4]
+
+
+def test_rate_limit_detection_follows_cause():
+    try:
+        try:
+            raise RuntimeError("429 Too Many Requests")
+        except RuntimeError as e:
+            raise ValueError("embedding failed") from e
+    except ValueError as e:
+        assert is_rate_limit_error(e)
+
+    assert not is_rate_limit_error(ValueError("bad input"))
+
+
+def test_add_stream_pulls_batches_lazily():
+    pulled = []
+
+    def batches():
+        for i in range(6):
+            pulled.append(i)
+            docs, ids = make_docs(2)
+            yield docs, [f"{i}-{chunk_id}" for chunk_id in ids]
+
+    added = []
+    embedder = BatchEmbedder(DeterministicFakeEmbedding(size=8), max_in_flight=2)
+
+    def on_batch(vectorstore, docs, ids):
+        # Never more than max_in_flight batches ahead of the index
+        assert len(pulled) <= len(added) + 2
+        added.append(ids)
+
+    vectorstore = embedder.add_stream(None, batches(), on_batch)
+
+    assert vectorstore.index.ntotal == 12
+    assert len(added) == 6
+    assert embedder.stats["batches"] == 6
+
+
+def test_streaming_build_is_searchable_before_ingest_finishes(monkeypatch):
+    import rag_service
+    from rag_service import RAGService
+
+    monkeypatch.setattr(rag_service, "EMBEDDING_BATCH_SIZE", 1)
+    service = RAGService()
+    service.embeddings = DeterministicFakeEmbedding(size=8)
+    seen_while_loading = []
+
+    def pages():
+        for i in range(5):
+            if service.retriever is not None:
+                seen_while_loading.append(len(service.get_relevant_documents("page")))
+            yield Document(page_content=f"page {i} " + "text " * 50, metadata={"source": f"u{i}"})
+
+    source_hashes = service.build_vectorstore_streaming(pages())
+
+    assert sorted(source_hashes) == [f"u{i}" for i in range(5)]
+    assert len(service.chunk_manifest) == service.vectorstore.index.ntotal == 5
+    assert len(service.lexical_index) == 5
+    assert service.documents == []
+    assert seen_while_loading and seen_while_loading[-1] > 0
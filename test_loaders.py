@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent URL loader against a local HTTP server serving fixture pages.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from loaders import ConcurrentURLLoader, FetchMetadataStore
+
+FIXTURE_PAGES = {
+    "/index.html": "<html><body><h1>Victoria on Move</h1><p>Local removalists.</p></body></html>",
+    "/contact.html": "<html><body><p>Call us on 0400 000 000.</p></body></html>",
+    "/slow.html": "<html><body><p>Too slow.</p></body></html>",
+    "/flaky.html": "<html><body><p>Works on retry.</p></body></html>",
+}
+
+
+def strip_tags(url, html):
+    """Minimal picklable parser so the tests do not need unstructured."""
+    return html.split("<body>")[1].split("</body>")[0]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    flaky_attempts = 0
+    etag = '"v1"'
+
+    def do_GET(self):
+        if self.path == "/index.html" and self.headers.get("If-None-Match") == FixtureHandler.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == "/slow.html":
+            time.sleep(1.0)
+        if self.path == "/flaky.html":
+            FixtureHandler.flaky_attempts += 1
+            if FixtureHandler.flaky_attempts == 1:
+                self.send_error(503)
+                return
+
+        page = FIXTURE_PAGES.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        body = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/index.html":
+            self.send_header("ETag", FixtureHandler.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_site():
+    FixtureHandler.flaky_attempts = 0
+    FixtureHandler.etag = '"v1"'
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_loads_pages_in_input_order(fixture_site, parse_workers):
+    urls = [f"{fixture_site}/contact.html", f"{fixture_site}/index.html"]
+    loader = ConcurrentURLLoader(urls, max_concurrency=2, parse_workers=parse_workers, parser=strip_tags)
+
+    documents = loader.load()
+
+    assert [doc.metadata["source"] for doc in documents] == urls
+    assert "0400 000 000" in documents[0].page_content
+    assert loader.failures == {}
+
+
+def test_streamed_pages_keep_input_order(fixture_site):
+    urls = [f"{fixture_site}/slow.html", f"{fixture_site}/missing.html", f"{fixture_site}/index.html"]
+    loader = ConcurrentURLLoader(urls, max_concurrency=3, timeout=5, retries=0, parse_workers=0, parser=strip_tags)
+
+    sources = [doc.metadata["source"] for doc in loader.lazy_load()]
+
+    # The slow first page is waited for instead of being yielded last
+    assert sources == [f"{fixture_site}/slow.html", f"{fixture_site}/index.html"]
+
+
+def test_slow_and_missing_pages_do_not_block_ingest(fixture_site):
+    urls = [
+        f"{fixture_site}/slow.html",
+        f"{fixture_site}/missing.html",
+        f"{fixture_site}/index.html",
+    ]
+    loader = ConcurrentURLLoader(urls, timeout=0.2, retries=0, parse_workers=0, parser=strip_tags)
+
+    start = time.perf_counter()
+    documents = loader.load()
+
+    assert time.perf_counter() - start < 1.0
+    assert [doc.metadata["source"] for doc in documents] == [f"{fixture_site}/index.html"]
+    assert set(loader.failures) == {f"{fixture_site}/slow.html", f"{fixture_site}/missing.html"}
+
+
+def test_transient_errors_are_retried(fixture_site):
+    loader = ConcurrentURLLoader(
+        [f"{fixture_site}/flaky.html"], retries=1, parse_workers=0, parser=strip_tags
+    )
+
+    documents = loader.load()
+
+    assert len(documents) == 1
+    assert FixtureHandler.flaky_attempts == 2
+
+
+def test_unchanged_pages_are_revalidated_and_reused(fixture_site, tmp_path):
+    urls = [f"{fixture_site}/index.html", f"{fixture_site}/contact.html"]
+    metadata_path = str(tmp_path / "fetch_metadata.json")
+
+    def load():
+        loader = ConcurrentURLLoader(
+            urls, parse_workers=0, parser=strip_tags,
+            metadata_store=FetchMetadataStore(metadata_path)
+        )
+        return loader.load(), loader.stats
+
+    first, stats = load()
+    assert stats["parsed"] == 2
+
+    # index.html answers 304 to its ETag, contact.html returns an identical body
+    second, stats = load()
+    assert stats == {"fetched": 2, "not_modified": 1, "unchanged": 1, "parsed": 0}
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+
+    FixtureHandler.etag = '"v2"'
+    _, stats = load()
+    assert stats["not_modified"] == 0
+
+
+def test_metadata_store_keeps_page_text_out_of_memory(fixture_site, tmp_path):
+    urls = [f"{fixture_site}/index.html", f"{fixture_site}/contact.html"]
+    metadata_path = str(tmp_path / "fetch_metadata.json")
+    store = FetchMetadataStore(metadata_path)
+    first = ConcurrentURLLoader(urls, parse_workers=0, parser=strip_tags, metadata_store=store).load()
+
+    assert all("page_content" not in store.get(url) for url in urls)
+    assert "page_content" not in open(metadata_path, encoding="utf-8").read()
+    assert [store.read_text(url) for url in urls] == [doc.page_content for doc in first]
+
+    # A page whose text is missing is fetched and parsed again
+    os.remove(store._page_path(urls[0]))
+    loader = ConcurrentURLLoader(
+        urls, parse_workers=0, parser=strip_tags, metadata_store=FetchMetadataStore(metadata_path)
+    )
+    second = loader.load()
+    assert loader.stats == {"fetched": 2, "not_modified": 0, "unchanged": 1, "parsed": 1}
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
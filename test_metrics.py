@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for pipeline instrumentation, using the in-memory exporter.
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+
+import rag_service
+from benchmark import HashingEmbeddings
+from embeddings import CachedEmbeddings
+from metrics import InMemoryExporter, Metrics, PrometheusExporter, metrics
+from rag_service import RAGService
+
+
+@pytest.fixture
+def exporter():
+    collector = InMemoryExporter()
+    metrics.add_exporter(collector)
+    yield collector
+    metrics.remove_exporter(collector)
+
+
+def test_nested_spans_form_a_breakdown():
+    collector = InMemoryExporter()
+    registry = Metrics([collector])
+
+    with registry.span("query"):
+        with registry.span("retrieve"):
+            registry.observe("embed_query", 0.5)
+        registry.observe("generate", 1.0)
+
+    assert collector.span_names() == ["embed_query", "retrieve", "generate", "query"]
+    root = collector.roots[0]
+    assert root.breakdown()["generate"] == 1.0
+    assert root.breakdown()["embed_query"] == 0.5
+
+
+def test_prometheus_rendering():
+    exporter = PrometheusExporter()
+    registry = Metrics([exporter])
+
+    registry.observe("retrieve", 0.25)
+    registry.incr("chunks_embedded", 10)
+    registry.incr("embedding_cache_hits", 2, kind="query")
+
+    text = exporter.render()
+    assert 'rag_stage_duration_seconds_count{stage="retrieve"} 1' in text
+    assert "rag_chunks_embedded_total 10" in text
+    assert 'rag_embedding_cache_hits_total{kind="query"} 2' in text
+
+
+def test_query_pipeline_is_instrumented(exporter):
+    service = RAGService()
+    service.embeddings = CachedEmbeddings(HashingEmbeddings(), model_name="hashing", cache_path=None)
+    service.create_vectorstore(service.split_documents([
+        Document(page_content="We move pianos and pool tables.", metadata={"source": "index"})
+    ]))
+    service.create_retriever()
+    service.llm = FakeListLLM(responses=["Yes."])
+    service.create_rag_chain()
+
+    service.query("Do you move pianos?")
+    service.query("Do you move pianos?")
+
+    query_span = next(span for span in exporter.roots if span.name == "query")
+    assert {"retrieve", "embed_query", "generate"} <= set(query_span.breakdown())
+    assert exporter.counters["chunks_embedded"] == 1
+    assert exporter.counters["llm_calls"] == 1
+    assert exporter.counters["llm_tokens_in"] > 0
+    assert exporter.counters["answer_cache_hits"] == 1
+
+
+@pytest.mark.parametrize("retrieval_type", ["similarity", "hybrid"])
+def test_retrieval_is_split_into_embed_and_search(exporter, monkeypatch, retrieval_type):
+    monkeypatch.setattr(rag_service, "RETRIEVAL_TYPE", retrieval_type)
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.create_vectorstore(service.split_documents([
+        Document(page_content="We move pianos and pool tables.", metadata={"source": "index"})
+    ]))
+    service.create_retriever()
+
+    service.get_relevant_documents("Do you move pianos?")
+
+    retrieve_span = next(span for span in exporter.roots if span.name == "retrieve")
+    assert [child.name for child in retrieve_span.children] == ["embed", "search"]
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for rebuilding the index in the background and hot-swapping it in.
+"""
+
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+
+import rag_service
+from benchmark import HashingEmbeddings
+from index_store import IndexStore
+from rag_service import RAGService
+from refresher import IndexRefresher, LeaderLock
+
+OLD_PAGES = [
+    Document(page_content="We move pianos and pool tables across Melbourne.", metadata={"source": "services"}),
+    Document(page_content="Call us on 0400 000 000 for a quote.", metadata={"source": "contact"}),
+]
+NEW_PAGES = [
+    Document(page_content="We now offer secure storage units by the week.", metadata={"source": "services"}),
+    Document(page_content="Call us on 0400 000 000 for a quote.", metadata={"source": "contact"}),
+]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(rag_service, "INDEX_CACHE_ENABLED", False)
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.llm = FakeListLLM(responses=["We can help."])
+    service.create_vectorstore(service.split_documents(OLD_PAGES))
+    service.create_retriever(k=1)
+    service.create_rag_chain()
+    service.answer_cache = None
+    return service
+
+
+def serve_pages(monkeypatch, pages, delay=0.0):
+    """Serve pages to the service, returning a list that records each pass over them."""
+    passes = []
+
+    def load_documents(self, urls=None):
+        time.sleep(delay)
+        return list(pages)
+
+    def stream_documents(self, urls=None):
+        passes.append(urls)
+        time.sleep(delay)
+        yield from pages
+    monkeypatch.setattr(RAGService, "load_documents", load_documents)
+    monkeypatch.setattr(RAGService, "stream_documents", stream_documents)
+    return passes
+
+
+def test_rebuild_swaps_in_a_new_generation(service, monkeypatch):
+    old_retriever = service.retriever
+    passes = serve_pages(monkeypatch, NEW_PAGES)
+
+    assert service.rebuild() is True
+
+    # The new generation is built from the pages spooled while hashing them
+    assert len(passes) == 1
+    assert "storage" in service.get_relevant_documents("storage units")[0].page_content
+    assert service.index_version is not None
+    # Block ownership of the new generation comes along for later refreshes
+    assert service.boilerplate_stripper.stats["pages"] == len(NEW_PAGES)
+    # Holders of the old generation keep using it
+    assert "pianos" in old_retriever.invoke("pianos")[0].page_content
+    # Unchanged sources do not trigger another swap
+    assert service.rebuild() is False
+
+
+def test_queries_are_served_during_rebuild(service, monkeypatch):
+    serve_pages(monkeypatch, NEW_PAGES, delay=0.2)
+    rebuild = threading.Thread(target=service.rebuild)
+    rebuild.start()
+
+    answers = []
+    while rebuild.is_alive():
+        answers.append(service.query("Do you move pianos?"))
+    rebuild.join()
+
+    assert answers
+    assert all(response["context"] and response["answer"] == "We can help." for response in answers)
+    assert "storage" in service.query("storage units")["context"][0].page_content
+
+
+def test_refresher_rebuilds_when_triggered():
+    class FakeService:
+        rebuilt = threading.Event()
+
+        def rebuild(self, urls=None):
+            self.rebuilt.set()
+            return True
+
+    fake = FakeService()
+    refresher = IndexRefresher(fake, interval=0).start()
+    refresher.trigger()
+
+    assert fake.rebuilt.wait(2.0)
+    refresher.stop(timeout=2.0)
+    assert refresher.stats["rebuilds"] == 1
+
+
+def test_one_process_at_a_time_leads(tmp_path):
+    path = str(tmp_path / "refresher.lock")
+    first, second = LeaderLock(path), LeaderLock(path)
+
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_followers_load_the_version_the_leader_built(tmp_path, service, monkeypatch):
+    monkeypatch.setattr(rag_service, "INDEX_CACHE_ENABLED", True)
+    serve_pages(monkeypatch, NEW_PAGES)
+    leader = RAGService()
+    leader.embeddings = HashingEmbeddings()
+    leader.index_store = service.index_store = IndexStore(str(tmp_path / "index"))
+    leader.rebuild()
+
+    leader_lock = LeaderLock(str(tmp_path / "refresher.lock"))
+    assert leader_lock.acquire()
+    follower = IndexRefresher(service, lock=LeaderLock(leader_lock.path))
+
+    assert follower.follow_once() is True
+    assert service.index_version == leader.index_version
+    assert "storage" in service.get_relevant_documents("storage units")[0].page_content
+    assert follower.follow_once() is False
+    assert follower.stats["follows"] == 1
+    leader_lock.release()
+
+
+def test_rebuild_requests_from_followers_reach_the_leader(tmp_path):
+    class FakeService:
+        def __init__(self):
+            self.rebuilt = threading.Event()
+
+        def rebuild(self, urls=None):
+            self.rebuilt.set()
+            return True
+
+        def load_latest(self, urls=None):
+            return False
+
+    path = str(tmp_path / "refresher.lock")
+    leader_service, follower_service = FakeService(), FakeService()
+    leader_lock = LeaderLock(path)
+    assert leader_lock.acquire()
+    leader = IndexRefresher(leader_service, interval=0, lock=leader_lock, poll_interval=0.01).start()
+    follower = IndexRefresher(follower_service, interval=0, lock=LeaderLock(path), poll_interval=0.01).start()
+
+    follower.trigger()
+
+    assert leader_service.rebuilt.wait(2.0)
+    assert not follower_service.rebuilt.is_set()
+    leader.stop(timeout=2.0)
+    follower.stop(timeout=2.0)
+    leader_lock.release()
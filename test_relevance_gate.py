@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for score-aware retrieval and the relevance gate in front of the LLM.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+from langchain_core.runnables import RunnableLambda
+
+import rag_service
+from benchmark import HashingEmbeddings
+from config import NO_ANSWER_RESPONSE
+from metrics import InMemoryExporter, metrics
+from rag_service import RAGService
+from retrievers import ScoredVectorRetriever
+
+PAGES = [
+    Document(page_content="We move pianos and pool tables across Melbourne.", metadata={"source": "services"}),
+    Document(page_content="Secure storage units are available by the week.", metadata={"source": "storage"}),
+    Document(page_content="Call us on 0400 000 000 for a free quote.", metadata={"source": "contact"}),
+]
+OFF_TOPIC = "Who won the football grand final?"
+
+
+@pytest.fixture
+def exporter():
+    collector = InMemoryExporter()
+    metrics.add_exporter(collector)
+    yield collector
+    metrics.remove_exporter(collector)
+
+
+def build_service(monkeypatch, retrieval_type="hybrid"):
+    monkeypatch.setattr(rag_service, "RETRIEVAL_TYPE", retrieval_type)
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.llm = FakeListLLM(responses=["We can help."])
+    service.create_vectorstore(service.split_documents(PAGES))
+    service.create_retriever(k=2)
+    service.create_rag_chain()
+    service.answer_cache = None
+    service.relevance_threshold = 0.0
+
+    service.generations = []
+
+    def generate(inputs):
+        service.generations.append(inputs["input"])
+        return "We can help."
+
+    service.question_answer_chain = RunnableLambda(generate)
+    return service
+
+
+def test_similarity_retriever_attaches_relevance_scores():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.create_vectorstore(service.split_documents(PAGES))
+    retriever = ScoredVectorRetriever(vectorstore=service.vectorstore, k=2)
+
+    documents = retriever.invoke("Do you move pianos?")
+    expected = service.vectorstore._similarity_search_with_relevance_scores("Do you move pianos?", k=2)
+
+    assert [doc.page_content for doc in documents] == [doc.page_content for doc, _ in expected]
+    assert [doc.metadata["relevance_score"] for doc in documents] == pytest.approx([score for _, score in expected])
+    # Stored documents are not modified
+    assert all("relevance_score" not in doc.metadata for doc in service.vectorstore.docstore._dict.values())
+
+
+def test_hybrid_retriever_scores_vector_hits(monkeypatch):
+    service = build_service(monkeypatch)
+
+    documents = service.get_relevant_documents("Do you move pianos?")
+
+    assert documents[0].metadata["source"] == "services"
+    assert documents[0].metadata["relevance_score"] > 0
+
+
+@pytest.mark.parametrize("retrieval_type", ["hybrid", "similarity"])
+def test_out_of_scope_questions_skip_the_llm(monkeypatch, exporter, retrieval_type):
+    service = build_service(monkeypatch, retrieval_type)
+
+    response = service.query(OFF_TOPIC)
+
+    assert response == {"input": OFF_TOPIC, "context": [], "answer": NO_ANSWER_RESPONSE}
+    assert service.generations == []
+    assert exporter.counters["queries_gated"] == 1
+
+    answered = service.query("Do you move pianos?")
+    assert answered["answer"] == "We can help."
+    assert service.generations == ["Do you move pianos?"]
+    assert exporter.counters["queries_gated"] == 1
+
+
+def test_gate_applies_to_async_stream_and_batch_queries(monkeypatch, exporter):
+    service = build_service(monkeypatch)
+
+    assert asyncio.run(service.aquery(OFF_TOPIC))["answer"] == NO_ANSWER_RESPONSE
+    assert list(service.stream_query(OFF_TOPIC)) == [{"context": []}, {"answer": NO_ANSWER_RESPONSE}]
+    responses = service.batch_query([OFF_TOPIC, "Is storage available?"])
+
+    assert [response["answer"] for response in responses] == [NO_ANSWER_RESPONSE, "We can help."]
+    assert service.generations == ["Is storage available?"]
+    assert exporter.counters["queries_gated"] == 3
+
+
+def test_gate_is_disabled_without_threshold(monkeypatch):
+    service = build_service(monkeypatch)
+    service.relevance_threshold = None
+
+    assert service.query(OFF_TOPIC)["answer"] == "We can help."
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for cross-encoder reranking, using a fake scoring model.
+"""
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_service import RAGService
+from reranker import CrossEncoderReranker, RerankingRetriever
+from retrievers import HybridRetriever
+
+
+class KeywordModel:
+    """Fake cross-encoder scoring pairs by shared words, counting its calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32):
+        self.calls.append(len(pairs))
+        return [len(set(q.lower().split()) & set(text.lower().split())) for q, text in pairs]
+
+
+DOCS = [
+    Document(page_content="we sell packing boxes", metadata={"source": "boxes"}),
+    Document(page_content="interstate removals to sydney and brisbane", metadata={"source": "interstate"}),
+    Document(page_content="piano removals handled with care", metadata={"source": "piano"}),
+]
+
+
+def test_rerank_orders_by_score_in_one_batch():
+    model = KeywordModel()
+    reranker = CrossEncoderReranker(model=model)
+
+    ranked = reranker.rerank("interstate removals to sydney", DOCS, k=2)
+
+    assert [doc.metadata["source"] for doc in ranked] == ["interstate", "piano"]
+    assert ranked[0].metadata["rerank_score"] == 4
+    assert model.calls == [3]
+    assert "rerank_score" not in DOCS[0].metadata
+
+
+def test_scores_are_cached_per_question_and_chunk():
+    model = KeywordModel()
+    reranker = CrossEncoderReranker(model=model, cache_size=10)
+
+    reranker.rerank("piano removals", DOCS, k=1)
+    reranker.rerank("piano removals", DOCS, k=1)
+    reranker.rerank("packing boxes", DOCS[:1], k=1)
+
+    assert model.calls == [3, 1]
+    assert reranker.stats == {"hits": 3, "misses": 4}
+
+
+def test_reranking_retriever_over_fetches_and_keeps_k():
+    service = RAGService()
+    service.embeddings = DeterministicFakeEmbedding(size=16)
+    service.create_vectorstore(service.split_documents(DOCS))
+    base = HybridRetriever(vectorstore=service.vectorstore, lexical_index=service.lexical_index, k=3)
+    retriever = RerankingRetriever(base_retriever=base, reranker=CrossEncoderReranker(model=KeywordModel()), k=1)
+
+    documents = retriever.invoke("piano removals")
+
+    assert [doc.metadata["source"] for doc in documents] == ["piano"]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 lexical index and the hybrid retriever.
+"""
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from index_store import IndexStore
+from rag_service import RAGService
+from retrievers import BM25Index, HybridRetriever, reciprocal_rank_fusion
+
+PAGES = [
+    Document(page_content="We offer local and interstate removals across Victoria.", metadata={"source": "index"}),
+    Document(page_content="Call us on 0400 123 456 or email hello@example.com.", metadata={"source": "contact"}),
+    Document(page_content="Our 10 tonne trucks suit large family homes.", metadata={"source": "trucks"}),
+    Document(page_content="Packing services and boxes are available on request.", metadata={"source": "packing"}),
+]
+
+
+def make_service():
+    service = RAGService()
+    service.embeddings = DeterministicFakeEmbedding(size=16)
+    service.create_vectorstore(service.split_documents(PAGES))
+    return service
+
+
+def test_bm25_ranks_exact_tokens_first():
+    index = BM25Index()
+    index.add(["a", "b", "c"], [page.page_content for page in PAGES[:3]])
+
+    assert index.search("phone 0400 123 456", 2)[0][0] == "b"
+    assert index.search("10 tonne truck", 1)[0][0] == "c"
+
+
+def test_bm25_remove_and_persist(tmp_path):
+    index = BM25Index()
+    index.add(["a", "b"], [PAGES[0].page_content, PAGES[1].page_content])
+    index.remove(["b", "missing"])
+
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert len(loaded) == 1
+    assert loaded.search("0400", 5) == []
+    assert loaded.search("interstate removals", 5) == index.search("interstate removals", 5)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["x", "y"], ["y", "z"]])
+
+    assert [item for item, _ in fused] == ["y", "x", "z"]
+
+
+def test_hybrid_retriever_finds_lexical_matches():
+    service = make_service()
+    retriever = HybridRetriever(vectorstore=service.vectorstore, lexical_index=service.lexical_index, k=2)
+
+    documents = retriever.invoke("What is your phone number 0400 123 456?")
+
+    assert len(documents) == 2
+    assert "contact" in [doc.metadata["source"] for doc in documents]
+
+
+def test_lexical_index_is_saved_and_kept_in_sync(tmp_path):
+    service = make_service()
+    service.index_store = IndexStore(str(tmp_path))
+    service._save_cached_index("v1", {})
+
+    restored = RAGService()
+    restored.embeddings = service.embeddings
+    restored.index_store = service.index_store
+    restored._load_cached_index("v1")
+
+    # Loaded only when hybrid retrieval needs it
+    assert restored.lexical_index is None
+    assert len(restored.get_lexical_index()) == len(PAGES)
+
+    removed = [chunk_id for chunk_id, source in restored.chunk_manifest.items() if source == "contact"]
+    restored.vectorstore.delete(removed)
+    restored.lexical_index.remove(removed)
+    restored.create_retriever()
+
+    sources = [doc.metadata["source"] for doc in restored.get_relevant_documents("0400 123 456")]
+    assert "contact" not in sources
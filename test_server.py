@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the HTTP query server, using a fake LLM and fake embeddings.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeStreamingListLLM
+
+from rag_service import RAGService
+from server import create_app
+
+
+@pytest.fixture
+def client():
+    service = RAGService()
+    service.embeddings = DeterministicFakeEmbedding(size=16)
+    service.create_vectorstore(service.split_documents([
+        Document(page_content="We offer local and interstate removals.", metadata={"source": "index"}),
+        Document(page_content="Call us on 0400 000 000.", metadata={"source": "contact"}),
+    ]))
+    service.create_retriever()
+    service.llm = FakeStreamingListLLM(responses=["We move homes."])
+    service.create_rag_chain()
+
+    with TestClient(create_app(service)) as test_client:
+        yield test_client
+
+
+def test_query(client):
+    response = client.post("/query", json={"question": "What services do you provide?"})
+
+    assert response.status_code == 200
+    assert response.json()["answer"] == "We move homes."
+    assert len(response.json()["context"]) == 2
+
+
+def test_retrieve(client):
+    response = client.post("/retrieve", json={"question": "What are your contact details?"})
+
+    assert response.status_code == 200
+    sources = {doc["metadata"]["source"] for doc in response.json()["documents"]}
+    assert sources == {"index", "contact"}
+
+
+def test_query_stream(client):
+    response = client.post("/query/stream", json={"question": "Do you offer interstate moving?"})
+
+    parts = [json.loads(line) for line in response.text.splitlines()]
+    assert "context" in parts[0]
+    assert "".join(part["answer"] for part in parts[1:]) == "We move homes."
+
+
+def test_health(client):
+    assert client.get("/health").json()["status"] == "ok"
+
+
+def test_refresh_requires_the_refresh_token(client, monkeypatch):
+    triggered = []
+    monkeypatch.setattr(client.app.state.refresher, "trigger", lambda: triggered.append(True))
+    monkeypatch.delenv("REFRESH_TOKEN", raising=False)
+    assert client.post("/refresh").status_code == 403
+
+    monkeypatch.setenv("REFRESH_TOKEN", "s3cret")
+    assert client.post("/refresh").status_code == 401
+    assert client.post("/refresh", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.post("/refresh", headers={"Authorization": "Bearer s3cret"}).status_code == 202
+    assert triggered == [True]
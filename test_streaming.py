@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming answers token by token.
+"""
+
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+from langchain_core.runnables import RunnableLambda
+
+from answer_cache import SemanticAnswerCache
+from benchmark import HashingEmbeddings
+from concurrency import ConcurrencyLimiter
+from rag_service import RAGService
+from streaming import TokenStream
+
+
+def build_service():
+    service = RAGService()
+    service.embeddings = HashingEmbeddings()
+    service.llm = FakeListLLM(responses=["We can help."])
+    service.create_vectorstore([Document(page_content="We move pianos.", metadata={"source": "services"})])
+    service.create_retriever(k=1)
+    service.create_rag_chain()
+    service.answer_cache = None
+    return service
+
+
+def test_readers_replay_and_follow_the_tokens():
+    release = threading.Event()
+
+    def generate():
+        yield "We "
+        release.wait(2.0)
+        yield "can help."
+
+    stream = TokenStream(generate)
+    early = iter(stream)
+    assert next(early) == "We "
+    release.set()
+
+    assert "".join(early) == "can help."
+    assert list(stream) == ["We ", "can help."]
+    assert stream.join() == "We can help."
+
+
+def test_generation_errors_reach_every_reader():
+    def generate():
+        yield "We "
+        raise RuntimeError("quota exceeded")
+
+    stream = TokenStream(generate)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            list(stream)
+
+
+def test_abandoned_stream_releases_the_llm_slot():
+    service = build_service()
+    service._llm_gate = ConcurrencyLimiter(1)
+    finished = threading.Event()
+
+    def generate(inputs):
+        yield "We "
+        yield "can "
+        yield "help."
+        finished.set()
+
+    service.question_answer_chain = RunnableLambda(generate)
+
+    parts = service.stream_query("Do you move pianos?")
+    assert "context" in next(parts)
+    assert next(parts) == {"answer": "We "}
+    # The reader stops without draining or closing the generator, which stays referenced
+
+    assert finished.wait(2.0)
+    deadline = time.monotonic() + 2.0
+    while service._llm_gate.in_use() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert service._llm_gate.in_use() == 0
+    assert parts.gi_frame is not None
+
+
+def test_stream_yields_context_then_tokens_and_caches_the_answer():
+    service = build_service()
+    service.answer_cache = SemanticAnswerCache(HashingEmbeddings())
+    calls = []
+
+    def generate(inputs):
+        calls.append(inputs["input"])
+        yield "We "
+        yield "can help."
+
+    service.question_answer_chain = RunnableLambda(generate)
+
+    parts = list(service.stream_query("Do you move pianos?"))
+
+    assert [doc.metadata["source"] for doc in parts[0]["context"]] == ["services"]
+    assert parts[1:] == [{"answer": "We "}, {"answer": "can help."}]
+
+    cached = list(service.stream_query("do you move pianos"))
+    assert cached[1:] == [{"answer": "We can help."}]
+    assert cached[0]["context"][0].page_content == "We move pianos."
+    assert calls == ["Do you move pianos?"]